@@ -5,6 +5,7 @@ import win32con
 from ok import Logger, TaskDisabledException
 from src.tasks.DNAOneTimeTask import DNAOneTimeTask
 from src.tasks.CommissionsTask import CommissionsTask, Mission
+from src.tasks.RouteExecutor import Route, DODGE, down, up, press, wait, call, expect
 from src.tasks.BaseCombatTask import BaseCombatTask
 
 from src.tasks.AutoDefence import AutoDefence
@@ -45,6 +46,7 @@ class Auto65ArtifactTask_Fast(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
     def run(self):
         """主运行方法"""
         DNAOneTimeTask.run(self)
+        self.refresh_settings()
         self.move_mouse_to_safe_position(save_current_pos=False)
         self.set_check_monthly_card()
         self.ensure_game_focused()
@@ -57,6 +59,8 @@ class Auto65ArtifactTask_Fast(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         except Exception as e:
             logger.error("AutoMyDungeonTask error", e)
             raise
+        finally:
+            self.stop_recording(self.get_task_by_class(AutoDefence))
 
     # def do_run(self):
     #     """执行任务的核心逻辑"""
@@ -141,86 +145,91 @@ class Auto65ArtifactTask_Fast(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
 
         try:
             # ===== 根据扼守-30or65.json录制的路径 =====
+            # 在原有的等待中检查仍处于队伍界面：只能发现加载画面、对话框等离开队伍界面的情况，
+            # 无法发现走偏路线（本图没有可用的位置模板），走偏由后面的复位传送纠正
+            route = Route("扼守-30or65", [
+                # 0.52s: 开始向前移动
+                down("lalt"),
+                expect("still_in_team", self.in_team, 2),
+                call(self.external_movement_tick),
+                down("w"),
+
+                # 1.11s: 开始冲刺 (0.59s后)
+                wait(0.59),
+                down(DODGE),
+
+                # 1.33s: 向左移动 (0.22s后)
+                wait(0.22),
+                down("a"),
+
+                # 2.41s: 停止前进 (1.08s后)
+                wait(1.08),
+                call(self.external_movement_tick),
+                up("w"),
+
+                # 3.85s: 再次向前 (1.44s后)
+                expect("still_in_team", self.in_team, 1.44),
+                down("w"),
+
+                # 3.94s: 停止向左 (0.09s后)
+                wait(0.09),
+                up("a"),
+
+                # 4.84s: 再次向左 (0.90s后)
+                wait(0.90),
+                down("a"),
+
+                # 5.22s-7.82s: Shift连续切换 (可能在调整位置)
+                wait(0.38),
+                up(DODGE),
+                wait(0.24),
+                press(DODGE, down_time=0.35),
+                wait(0.79),
+                press(DODGE, down_time=0.41),
+                wait(0.80),
+                down(DODGE),
+
+                # 9.09s: 停止前进 (1.27s后)
+                wait(1.27),
+                call(self.external_movement_tick),
+                up("w"),
+
+                # 9.56s: 短暂前进 (0.47s后)
+                wait(0.47),
+                down("w"),
+
+                # 9.91s: 停止前进 (0.35s后)
+                wait(0.35),
+                up("w"),
+
+                # 10.70s: 跳跃 (0.79s后)
+                wait(0.79),
+                press("space", down_time=0.09),
+
+                # 12.83s: 短暂后退调整 (2.04s后)
+                expect("still_in_team", self.in_team, 2.04),
+                press("s", down_time=0.09),
+
+                # 13.32s: 短暂前进调整 (0.40s后)
+                wait(0.40),
+                press("w", down_time=0.10),
+
+                # 13.86s: 再次短暂后退 (0.44s后)
+                wait(0.44),
+                press("s", down_time=0.10),
+
+                # 18.89s-18.99s: 释放所有移动键 (4.93s后)
+                expect("still_in_team", self.in_team, 4.93),
+                call(self.external_movement_tick),
+                up(DODGE),
+                wait(0.10),
+                up("a"),
+
+                up("lalt"),
+            ])
+            if not self.route_executor.run(route):
+                logger.warning("路径偏离，跳过剩余路径直接复位")
 
-            # 0.52s: 开始向前移动
-            self.send_key_down("lalt")
-
-            self.sleep(2)
-            self.external_movement_tick()
-            self.send_key_down("w")
-
-            # 1.11s: 开始冲刺 (0.59s后)
-            self.sleep(0.59)
-            self.send_key_down(self.get_dodge_key())
-
-            # 1.33s: 向左移动 (0.22s后)
-            self.sleep(0.22)
-            self.send_key_down("a")
-
-            # 2.41s: 停止前进 (1.08s后)
-            self.sleep(1.08)
-            self.external_movement_tick()
-            self.send_key_up("w")
-
-            # 3.85s: 再次向前 (1.44s后)
-            self.sleep(1.44)
-            self.send_key_down("w")
-
-            # 3.94s: 停止向左 (0.09s后)
-            self.sleep(0.09)
-            self.send_key_up("a")
-
-            # 4.84s: 再次向左 (0.90s后)
-            self.sleep(0.90)
-            self.send_key_down("a")
-
-            # 5.22s-7.82s: Shift连续切换 (可能在调整位置)
-            self.sleep(0.38)
-            self.send_key_up(self.get_dodge_key())
-            self.sleep(0.24)
-            self.send_key(self.get_dodge_key(), down_time=0.35)
-            self.sleep(0.79)
-            self.send_key(self.get_dodge_key(), down_time=0.41)
-            self.sleep(0.80)
-            self.send_key_down(self.get_dodge_key())
-
-            # 9.09s: 停止前进 (1.27s后)
-            self.sleep(1.27)
-            self.external_movement_tick()
-            self.send_key_up("w")
-
-            # 9.56s: 短暂前进 (0.47s后)
-            self.sleep(0.47)
-            self.send_key_down("w")
-
-            # 9.91s: 停止前进 (0.35s后)
-            self.sleep(0.35)
-            self.send_key_up("w")
-
-            # 10.70s: 跳跃 (0.79s后)
-            self.sleep(0.79)
-            self.send_key("space", down_time=0.09)
-
-            # 12.83s: 短暂后退调整 (2.04s后)
-            self.sleep(2.04)
-            self.send_key("s", down_time=0.09)
-
-            # 13.32s: 短暂前进调整 (0.40s后)
-            self.sleep(0.40)
-            self.send_key("w", down_time=0.10)
-
-            # 13.86s: 再次短暂后退 (0.44s后)
-            self.sleep(0.44)
-            self.send_key("s", down_time=0.10)
-
-            # 18.89s-18.99s: 释放所有移动键 (4.93s后)
-            self.sleep(4.93)
-            self.external_movement_tick()
-            self.send_key_up(self.get_dodge_key())
-            self.sleep(0.10)
-            self.send_key_up("a")
-
-            self.send_key_up("lalt")
             # 19.97s: 复位并传送到目标位置
             if not self.reset_and_transport():
                 raise Exception("复位失败")
@@ -45,6 +45,7 @@ class Auto70jjbTask(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
 
     def run(self):
         DNAOneTimeTask.run(self)
+        self.refresh_settings()
         self.move_mouse_to_safe_position(save_current_pos=False)
         self.set_check_monthly_card()
         self.ensure_game_focused()
@@ -57,6 +58,8 @@ class Auto70jjbTask(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         except Exception as e:
             logger.error('AutoDefence error', e)
             raise
+        finally:
+            self.stop_recording(self.get_task_by_class(AutoDefence))
 
     # def do_run(self):
     #     self.init_param()
@@ -93,6 +93,7 @@ class AutoEscortTask(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
             self.escort_actions = self.escort_paths.get("ESCORT_PATH_A", {}).get("data", [])
         
         DNAOneTimeTask.run(self)
+        self.refresh_settings()
         self.move_mouse_to_safe_position(save_current_pos=False)
         self.move_mouse_to_safe_position(save_current_pos=False)
         self.set_check_monthly_card()
@@ -104,6 +105,8 @@ class AutoEscortTask(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         except Exception as e:
             logger.error("AutoEscortTask error", e)
             raise
+        finally:
+            self.stop_recording()
 
     def do_run(self):
         # 检查是否已阅读注意事项
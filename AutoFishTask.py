@@ -1,24 +1,66 @@
 from qfluentwidgets import FluentIcon
 import time
-import cv2
 import random
-import win32api
+import cv2
+from enum import Enum
 
 from ok import Logger, TaskDisabledException
 from src.tasks.BaseDNATask import BaseDNATask
 from src.tasks.DNAOneTimeTask import DNAOneTimeTask
+from src.tasks.Profiler import HotPathProfiler
+from src.tasks.Replay import SessionRecorder
+from src.tasks.RoiCapture import RoiCapture, benchmark_capture
+from src.tasks.fullauto.FishDetection import benchmark_detectors
+from src.tasks.fullauto.FishFight import FishFight
+from src.tasks.fullauto.FishController import PredictiveFishController, FightRoundMetrics
 
 logger = Logger.get_logger(__name__)
 
 
-class AutoFishTask(DNAOneTimeTask, BaseDNATask):
+class FishState(Enum):
+    NONE = 0
+    CAST = 1
+    EASE = 2
+    BITE = 3
+    CHANCE = 4
+
+
+class FishStateResult:
+    """Fishing state icons matched in one poll: state is the highest priority icon found among those checked"""
+    PRIORITY = (FishState.CHANCE, FishState.CAST, FishState.EASE, FishState.BITE)
+
+    def __init__(self, matches: dict, threshold: float):
+        # matches: FishState -> (score, center)
+        self.matches = matches
+        self.threshold = threshold
+        self.state = next((state for state in self.PRIORITY if self.found(state)), FishState.NONE)
+
+    @property
+    def scores(self) -> dict:
+        return {state.name.lower(): score for state, (score, _) in self.matches.items()}
+
+    def found(self, *states) -> bool:
+        return any(state in self.matches and self.matches[state][0] >= self.threshold for state in states)
+
+    def center(self, state) -> tuple:
+        return self.matches[state][1] if self.found(state) else (0, 0)
+
+    def __str__(self):
+        return f"{self.state.name} " + ", ".join(f"{name}={score:.2f}" for name, score in self.scores.items())
+
+
+class AutoFishTask(DNAOneTimeTask, FishFight, BaseDNATask):
     """AutoFishTask
     No-Idle Auto Fishing
     """
-    BAR_MIN_AREA = 1200
-    ICON_MIN_AREA = 70
-    ICON_MAX_AREA = 400
-    CONTROL_ZONE_RATIO = 0.25
+    FISH_STATE_THRESHOLD = 0.8  # fish state icon match threshold
+    # State -> (template, shared box)
+    FISH_STATE_TEMPLATES = {
+        FishState.CAST: ("fish_cast", "fish_bite"),
+        FishState.EASE: ("fish_ease", "fish_bite"),
+        FishState.BITE: ("fish_bite", "fish_bite"),
+        FishState.CHANCE: ("fish_chance", "fish_chance"),
+    }
 
     def __init__(self, *args, **kwargs):
         logger.info("AutoFishTask initializing...")
@@ -35,6 +77,10 @@ class AutoFishTask(DNAOneTimeTask, BaseDNATask):
             "MAX_START_SEC": 20.0,
             "MAX_FIGHT_SEC": 60.0,
             "MAX_END_SEC": 20.0,
+            "Fish Controller": "Hysteresis",
+            "Fish Capture": "Full",
+            "Profile Hot Paths": False,
+            "Record Session": False,
             "Play Sound Notification": True,
             "Jitter Mode": "Disabled",
             "External Movement Min Delay": 4.0,
@@ -52,12 +98,29 @@ class AutoFishTask(DNAOneTimeTask, BaseDNATask):
             "MAX_START_SEC": "Start phase timeout (s)",
             "MAX_FIGHT_SEC": "Fishing phase timeout (s)",
             "MAX_END_SEC": "End phase timeout (s)",
+            "Fish Controller": "Hysteresis: react to last frame, Predictive: compensate loop latency",
+            "Fish Capture": "Full: framework frames, ROI: copy only the fish strip while fighting",
+            "Profile Hot Paths": "Record finder / detector / wait timings to the profiles folder (flamegraph, speedscope)",
+            "Record Session": "Record frames, inputs and detections to the sessions folder for offline replay",
             "Play Sound Notification": "Play sound on completion",
             "Jitter Mode": "Control when mouse jitter happens (Disabled, Always, Combat Only)",
             "External Movement Min Delay": "Minimum interval for random mouse movement (seconds)",
             "External Movement Max Delay": "Maximum interval for random mouse movement (seconds)",
             "External Movement Jitter Amount": "Maximum pixel distance to move mouse (default: 20)",
         })
+        self.config_type["Fish Controller"] = {
+            "type": "drop_down",
+            "options": ["Hysteresis", "Predictive"],
+        }
+        self.config_type["Fish Capture"] = {
+            "type": "drop_down",
+            "options": ["Full", "ROI"],
+        }
+        self.fish_controller = PredictiveFishController()
+        self.fight_metrics = FightRoundMetrics()
+        self.roi_capture = RoiCapture(self)
+        self.profiler = HotPathProfiler(self)
+        self.recorder = SessionRecorder(self)
 
         # runtime
         self.stats = {
@@ -75,6 +138,8 @@ class AutoFishTask(DNAOneTimeTask, BaseDNATask):
 
     def run(self):
         DNAOneTimeTask.run(self)
+        self.profiler.enable(self.config.get("Profile Hot Paths", False))
+        self.recorder.enable(self.config.get("Record Session", False))
         if self.config.get("Jitter Mode", "Disabled") != "Disabled":
             self.log_info("External movement enabled: Forcing game window focus...")
             try:
@@ -88,6 +153,9 @@ class AutoFishTask(DNAOneTimeTask, BaseDNATask):
         except Exception as e:
             logger.error("AutoFishTask error", e)
             raise
+        finally:
+            self.profiler.dump()
+            self.recorder.enable(False)
 
     def init(self):
         self.stats = {
@@ -99,143 +167,68 @@ class AutoFishTask(DNAOneTimeTask, BaseDNATask):
         }
         self.external_movement_tick.reset()
 
+    def get_fish_state_boxes(self):
+        return {
+            "fish_bite": self.box_of_screen_scaled(3840, 2160, 3147, 1566, 3383, 1797, name="fish_bite"),
+            "fish_chance": self.box_of_screen_scaled(3840, 2160, 3467, 1797, 3703, 2033, name="fish_chance"),
+        }
+
+    def detect_fish_state(self, states=None, first=False) -> FishStateResult:
+        """Check the fishing state icons with find_one, building each shared box only once
+
+        states: check these FishState values in this order (default PRIORITY order)
+        first: stop at the first icon found
+        fish_ease is skipped once fish_cast was found, as both mean the cast / reel prompt.
+        """
+        states = states or FishStateResult.PRIORITY
+        boxes = self.get_fish_state_boxes()
+        matches = {}
+        for state in states:
+            if state is FishState.EASE and matches.get(FishState.CAST, (0.0,))[0] > 0:
+                continue
+            if first and any(score > 0 for score, _ in matches.values()):
+                break
+            template_name, box_name = self.FISH_STATE_TEMPLATES[state]
+            found = self.find_one(template_name, box=boxes[box_name], threshold=self.FISH_STATE_THRESHOLD)
+            matches[state] = (found.confidence, (found.x + found.width // 2, found.y + found.height // 2)) \
+                if found else (0.0, (0, 0))
+        return FishStateResult(matches, self.FISH_STATE_THRESHOLD)
+
     def find_fish_cast(self) -> tuple[bool, tuple]:
         """Find fish_cast icon (Cast/Reel), return (found, center)"""
-        CAST_THRESHOLD = 0.8  # fish_cast match threshold
-        fish_box = self.box_of_screen_scaled(3840, 2160, 3147, 1566, 3383, 1797, name="fish_bite")
-        box = self.find_one("fish_cast", box=fish_box, threshold=CAST_THRESHOLD) or self.find_one("fish_ease",
-                                                                                                  box=fish_box,
-                                                                                                  threshold=CAST_THRESHOLD)
-        if box:
-            return True, (box.x + box.width // 2, box.y + box.height // 2)
-        return False, (0, 0)
+        result = self.detect_fish_state((FishState.CAST, FishState.EASE))
+        if result.found(FishState.CAST):
+            return True, result.center(FishState.CAST)
+        return result.found(FishState.EASE), result.center(FishState.EASE)
 
     def find_fish_bite(self) -> tuple[bool, tuple]:
         """Find fish_bite icon (Waiting for bite), return (found, center)"""
-        BITE_THRESHOLD = 0.8  # fish_bite match threshold
-        fish_box = self.box_of_screen_scaled(
-            3840, 2160, 3147, 1566, 3383, 1797, name="fish_bite"
-        )
-        box = self.find_one("fish_bite", box=fish_box, threshold=BITE_THRESHOLD)
-        if box:
-            return True, (box.x + box.width // 2, box.y + box.height // 2)
-        return False, (0, 0)
+        result = self.detect_fish_state((FishState.BITE,))
+        return result.found(FishState.BITE), result.center(FishState.BITE)
 
     def find_fish_chance(self) -> tuple[bool, tuple]:
         """Find fish_chance icon (Chance), return (found, center)"""
-        CHANCE_THRESHOLD = 0.8  # fish_chance match threshold
-        fish_chance_box = self.box_of_screen_scaled(3840, 2160, 3467, 1797, 3703, 2033, name="fish_chance")
-        box = self.find_one("fish_chance", box=fish_chance_box, threshold=CHANCE_THRESHOLD)
-        if box:
-            return True, (box.x + box.width // 2, box.y + box.height // 2)
-        return False, (0, 0)
-
-    def find_bar_and_fish_by_area(self):
-        """Find fish bar and icon area and size based on ROI
-
-        Return: ((has_bar, bar_center, bar_rect), (has_icon, icon_center, icon_rect))
-        Note: bar_center and icon_center are relative to ROI, bar_rect and icon_rect too
-        """
-
-        # Get ROI area
-        box = self.box_of_screen_scaled(1920, 1080, 1620, 325, 1645, 725, name="fish_roi")
-
-        try:
-            # frame = self.frame
-            # Box object uses x, y, width, height attributes
-            # box_x1, box_y1 = box.x, box.y
-            # box_x2, box_y2 = box.x + box.width, box.y + box.height
-            # box_x1 = max(0, min(box_x1, frame_width - 1))
-            # box_y1 = max(0, min(box_y1, frame_height - 1))
-            # box_x2 = max(box_x1 + 1, min(box_x2, frame_width))
-            # box_y2 = max(box_y1 + 1, min(box_y2, frame_height))
-            # roi_img = frame[box_y1:box_y2, box_x1:box_x2]
-            frame_height, _ = self.frame.shape[:2]
-            res_ratio = frame_height / 1080
-            roi_img = box.crop_frame(self.frame)
-
-            # Convert to grayscale
-            gray = cv2.cvtColor(roi_img, cv2.COLOR_BGR2GRAY)
-
-            # Binarize: Extract bright areas (bar and icon are white/bright)
-            _, scene_bin = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY)
-
-            # Find contours
-            contours, _ = cv2.findContours(scene_bin, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
-
-            # Collect all contours meeting minimum area
-            blobs = []
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                if area > self.ICON_MIN_AREA * res_ratio ** 2:
-                    blobs.append({"contour": contour, "area": area})
-
-            # Sort by area descending
-            blobs.sort(key=lambda b: b["area"], reverse=True)
-
-            has_bar = has_icon = False
-            bar_center = bar_rect = icon_center = icon_rect = None
-            bar_area = icon_area = 0.0
-
-            # Find fish bar (largest valid contour)
-            for blob in blobs:
-                if blob["area"] > self.BAR_MIN_AREA * res_ratio ** 2:
-                    contour = blob["contour"]
-                    moments = cv2.moments(contour)
-                    if moments["m00"] > 0:
-                        has_bar = True
-                        bar_area = blob["area"]
-                        # Note: relative to ROI
-                        bar_center = (
-                            int(moments["m10"] / moments["m00"]),
-                            int(moments["m01"] / moments["m00"]),
-                        )
-                        x, y, w, h = cv2.boundingRect(contour)
-                        # Rect relative to ROI
-                        bar_rect = (x, y, x + w, y + h)
-                    break
-
-            # Find fish icon (second largest valid contour, excluding bar)
-            for blob in blobs:
-                if blob["area"] == bar_area:
-                    continue
-                if self.ICON_MIN_AREA * res_ratio ** 2 < blob["area"] < self.ICON_MAX_AREA * res_ratio ** 2:
-                    contour = blob["contour"]
-                    moments = cv2.moments(contour)
-                    if moments["m00"] > 0:
-                        has_icon = True
-                        icon_area = blob["area"]
-                        # Relative to ROI
-                        icon_center = (
-                            int(moments["m10"] / moments["m00"]),
-                            int(moments["m01"] / moments["m00"]),
-                        )
-                        x, y, w, h = cv2.boundingRect(contour)
-                        icon_rect = (x, y, x + w, y + h)
-                    break
-
-            if has_bar:
-                zone_ratio = bar_area / box.area()
-                if self.CONTROL_ZONE_RATIO <= 0 or abs(
-                        zone_ratio - self.CONTROL_ZONE_RATIO) / self.CONTROL_ZONE_RATIO > 0.1:
-                    self.CONTROL_ZONE_RATIO = zone_ratio
-                    self.log_info(f"set CONTROL_ZONE_RATIO {self.CONTROL_ZONE_RATIO}")
-
-            # Update stats
-            self.stats.update({
-                "last_bar_found": has_bar,
-                "last_bar_area": float(bar_area),
-                "last_icon_found": has_icon,
-                "last_icon_area": float(icon_area),
-            })
-
-            return (has_bar, bar_center, bar_rect), (has_icon, icon_center, icon_rect)
-        except TaskDisabledException:
-            # cv2.destroyAllWindows()
-            raise
-        except Exception as e:
-            logger.error("find_bar_and_fish_by_area error", e)
-            return (False, None, None), (False, None, None)
+        result = self.detect_fish_state((FishState.CHANCE,))
+        return result.found(FishState.CHANCE), result.center(FishState.CHANCE)
+
+    def benchmark_fish_detectors(self, repeat=200):
+        """Benchmark all fish bar detectors on the current frame's ROI and log the result"""
+        box, res_ratio = self.get_fish_roi()
+        report = benchmark_detectors([box.crop_frame(self.frame)], res_ratio, self.BAR_MIN_AREA,
+                                     self.ICON_MIN_AREA, self.ICON_MAX_AREA, repeat=repeat)
+        for name, result in report.items():
+            self.log_info(f"Fish detector {name}: {result['mean_ms']:.3f} ms (p95 {result['p95_ms']:.3f} ms, "
+                          f"{result['hz']:.0f} Hz), agreement {result['agreement']:.0%}")
+        return report
+
+    def benchmark_fish_capture(self, seconds=3.0):
+        """Compare full-frame and ROI-only capture handling for the fish strip and log the result"""
+        box, _ = self.get_fish_roi()
+        report = benchmark_capture(self.roi_capture.grab, [box], seconds=seconds)
+        for mode, result in report.items():
+            self.log_info(f"Fish capture {mode}: {result['fps']:.0f} fps, "
+                          f"{result['bytes_per_frame'] / 1024:.1f} KiB copied per frame")
+        return report
 
     def create_external_movement_ticker(self):
         def action():
@@ -248,6 +241,9 @@ class AutoFishTask(DNAOneTimeTask, BaseDNATask):
                 self.log_error(f"Failed to focus window (ignoring): {e}")
             
             try:
+                # Imported here so the fishing logic also loads headless (see FishSimulator)
+                import win32api
+
                 if not self.is_mouse_in_window():
                     self.log_info("Mouse outside window, moving to center...")
                     hwnd_window = self.executor.device_manager.hwnd_window
@@ -291,11 +287,13 @@ class AutoFishTask(DNAOneTimeTask, BaseDNATask):
         # ensure foreground handled by framework interaction activation
         start_deadline = time.monotonic() + cfg.get("MAX_START_SEC", 20.0)
 
-        has_cast_icon, _ = self.find_fish_cast()
+        fish_state = self.detect_fish_state((FishState.CAST, FishState.EASE, FishState.CHANCE))
+        has_cast_icon = fish_state.found(FishState.CAST, FishState.EASE)
         self.stats["last_cast_icon_found"] = has_cast_icon
+        logger.debug(f"Fish state: {fish_state}")
 
         # Check for fish chance
-        has_chance_icon, _ = self.find_fish_chance()
+        has_chance_icon = fish_state.found(FishState.CHANCE)
         if has_chance_icon:
             logger.info("Detected fish_chance -> Pressing E to use chance")
             self.stats["chance_used"] = self.stats.get("chance_used", 0) + 1
@@ -347,116 +345,6 @@ class AutoFishTask(DNAOneTimeTask, BaseDNATask):
         logger.info("Timeout: Waiting for fish_cast")
         return False
 
-    def phase_fight(self) -> bool:
-        cfg = self.config
-        self.stats["current_phase"] = "Fighting"
-        self.info_set("Current Phase", "Fighting")
-        logger.info("Entering fighting phase...")
-
-        # Hardcoded constants
-        BAR_MISSING_TIMEOUT = 2.5  # Bar missing timeout
-        MERGE_GRACE_SECONDS = 0.20  # Merge grace time
-
-        # Runtime state
-        is_holding_space = False
-        icon_was_visible_prev = False
-        last_known_icon_y_relative = 0.0
-
-        bar_missing_start_time = None
-        merge_start_time = None
-
-        def set_hold(target_hold: bool):
-            nonlocal is_holding_space
-            if target_hold != is_holding_space:
-                if target_hold:
-                    self.send_key_down("space")
-                else:
-                    self.send_key_up("space")
-                is_holding_space = target_hold
-                self.stats["last_hold_state"] = is_holding_space
-
-        try:
-            while True:
-                now = time.monotonic()
-                if now >= time.monotonic() + cfg.get("MAX_FIGHT_SEC", 60.0):
-                    logger.info("Fighting timeout")
-                    return False
-
-                (has_bar, bar_center, bar_rect), (has_icon, icon_center, icon_rect) = self.find_bar_and_fish_by_area()
-
-                # Record icon relative position (for merge handling)
-                if has_bar and has_icon:
-                    last_known_icon_y_relative = icon_center[1] - bar_center[1]
-
-                # Check if bar is missing
-                if not has_bar:
-                    if bar_missing_start_time is None:
-                        bar_missing_start_time = now
-                    elif now - bar_missing_start_time >= BAR_MISSING_TIMEOUT:
-                        logger.info(f"Bar missing for > {BAR_MISSING_TIMEOUT}s -> Fighting ended")
-                        return True
-                else:
-                    bar_missing_start_time = None
-
-                # Main control logic: Two-layer control system
-                if has_bar and bar_rect:
-                    bar_top = bar_rect[1]
-                    bar_bottom = bar_rect[3]
-                    bar_height = bar_bottom - bar_top
-
-                    if bar_height <= 0:
-                        bar_height = 1
-
-                    # Calculate control zone boundaries
-                    control_zone_ratio = self.CONTROL_ZONE_RATIO
-                    control_height = int(bar_height * control_zone_ratio)
-                    control_top = bar_top + control_height
-                    control_bottom = bar_bottom - control_height
-
-                    is_merged = has_bar and (not has_icon) and icon_was_visible_prev
-
-                    if has_icon:
-                        merge_start_time = None
-                        icon_y = icon_center[1]
-
-                        # Simplified two-layer control logic
-                        if icon_y < control_top:
-                            # Icon in upper control zone -> Hold Space
-                            set_hold(True)
-                        elif icon_y > control_bottom:
-                            # Icon in lower control zone -> Release Space
-                            set_hold(False)
-                        # else: Icon in neutral zone -> Maintain current state (Hysteresis)
-
-                    else:
-                        # Handle merge case
-                        if is_merged:
-                            if merge_start_time is None:
-                                merge_start_time = now
-                                self.stats["last_merge_event"] = (f"merged, last_rel={last_known_icon_y_relative:.1f}")
-                            elapsed = now - merge_start_time
-                            if elapsed <= MERGE_GRACE_SECONDS:
-                                # Decide based on last known relative position
-                                if last_known_icon_y_relative < 0:
-                                    set_hold(True)
-                                else:
-                                    set_hold(False)
-                        else:
-                            merge_start_time = None
-                else:
-                    set_hold(False)
-
-                icon_was_visible_prev = has_icon
-
-                self.next_frame()
-                self.external_movement_tick()
-
-        except TaskDisabledException:
-            self.send_key_up("space")
-            raise
-        finally:
-            self.send_key_up("space")
-
     def phase_end(self) -> bool:
         cfg = self.config
         self.stats["current_phase"] = "Reeling"
@@ -473,9 +361,10 @@ class AutoFishTask(DNAOneTimeTask, BaseDNATask):
         # wait and verify
         confirm_deadline = time.monotonic() + cfg.get("MAX_END_SEC", 20.0)
         while time.monotonic() < confirm_deadline:
-            has_cast_icon, _ = self.find_fish_cast()
-            has_bite_icon, _ = self.find_fish_bite()
-            has_chance_icon, _ = self.find_fish_chance()
+            fish_state = self.detect_fish_state(first=True)
+            has_cast_icon = fish_state.found(FishState.CAST, FishState.EASE)
+            has_bite_icon = fish_state.found(FishState.BITE)
+            has_chance_icon = fish_state.found(FishState.CHANCE)
             self.stats["last_cast_icon_found"] = has_cast_icon
             self.stats["last_bite_icon_found"] = has_bite_icon
             if has_cast_icon or has_bite_icon or has_chance_icon:
@@ -489,6 +378,14 @@ class AutoFishTask(DNAOneTimeTask, BaseDNATask):
         logger.info("End phase verification failed")
         return False
 
+    def run_phase(self, name, phase) -> bool:
+        """Run a phase and record how long it took"""
+        start = time.monotonic()
+        try:
+            return phase()
+        finally:
+            self.stats.setdefault("phase_seconds", {})[name] = time.monotonic() - start
+
     # main run
     def do_run(self):
         cfg = self.config
@@ -537,15 +434,19 @@ class AutoFishTask(DNAOneTimeTask, BaseDNATask):
                         self.soundBeep()
                         break
 
-                if not self.phase_start():
+                self.stats["phase_seconds"] = {}
+                if not self.run_phase("start", self.phase_start):
                     self.sleep(1.0)
                     continue
-                if not self.phase_fight():
+                if not self.run_phase("fight", self.phase_fight):
+                    self.log_fight_metrics(False)
                     self.sleep(1.0)
                     continue
-                if not self.phase_end():
+                if not self.run_phase("end", self.phase_end):
+                    self.log_fight_metrics(False)
                     self.sleep(1.0)
                     continue
+                self.log_fight_metrics(True)
 
                 # Round completed
                 self.stats["rounds_completed"] += 1
@@ -569,6 +470,8 @@ class AutoFishTask(DNAOneTimeTask, BaseDNATask):
                 logger.info(f"  Remaining: {remaining}")
                 logger.info("=" * 50)
 
+                self.profiler.maybe_dump()
+
                 # Continue
                 self.sleep(1.0)
                 self.sleep(1.0)
@@ -38,6 +38,7 @@ class AutoSkill(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
 
     def run(self):
         DNAOneTimeTask.run(self)
+        self.refresh_settings()
         self.ensure_game_focused()
         try:
             return self.do_run()
@@ -46,25 +47,28 @@ class AutoSkill(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         except Exception as e:
             logger.error('AutoCombatSkill error', e)
             raise
+        finally:
+            self.stop_recording()
 
     def do_run(self):
         self.load_char()
         self.init_all()
         self.wait_until(self.in_team, time_out=30)
+        self.poll_governor = self.create_poll_governor()
         while True:
-            if self.in_team():
-                self.skill_tick()
-                self.external_movement_tick()
+            in_team = self.in_team()
+            if in_team:
+                self.scheduler.tick()
             else:
                 if self.config.get('Main Screen Detection', False):
                     self.log_info_notify('Task Completed')
                     self.soundBeep()
                     return
-            if time.time() - self.start_time >= self.config.get('Timeout', 120):
+            if time.time() - self.start_time >= self.settings.timeout:
                 self.log_info_notify('Task Timeout')
                 self.soundBeep()
                 return
-            self.sleep(0.2)
+            self.poll_sleep("in_team" if in_team else "interface")
 
     def init_all(self):
         self.skill_tick.reset()
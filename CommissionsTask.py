@@ -1,12 +1,26 @@
+import hashlib
 import re
+import sqlite3
 import time
 import random
-import win32api
-import win32con
+from dataclasses import dataclass
 from enum import Enum
 
-from ok import find_boxes_by_name, TaskDisabledException
+from ok import find_boxes_by_name, TaskDisabledException, WaitFailedException
 from src.tasks.BaseDNATask import BaseDNATask, isolate_white_text_to_black
+from src.tasks.FrameRecorder import FrameRecorder
+from src.tasks.OcrCache import OcrCache
+from src.tasks.PollGovernor import PollGovernor
+from src.tasks.Profiler import HotPathProfiler
+from src.tasks.Replay import SessionRecorder
+from src.tasks.RoundHistory import round_history
+from src.tasks.RouteExecutor import RouteExecutor
+from src.tasks.RoundTimeline import RoundTimeline
+from src.tasks.ScreenStateMachine import ScreenStateMachine, ScreenState
+from src.tasks.SettleDetector import SettleDetector
+from src.tasks.SkillScheduler import SkillScheduler
+from src.tasks.StallWatchdog import StallWatchdog, WORLD
+from src.tasks.TaskScheduler import TaskScheduler
 
 
 class Mission(Enum):
@@ -15,6 +29,83 @@ class Mission(Enum):
     STOP = 3
     GIVE_UP = 4
 
+# Same default as ok's wait_until when time_out is 0
+DEFAULT_WAIT_TIMEOUT = 10
+
+
+def frame_fingerprint(frame, step=4):
+    """Cheap content hash of a frame (every step-th pixel); equal for recaptures of an unchanged screen"""
+    if frame is None:
+        return None
+    return hashlib.blake2b(frame[::step, ::step].tobytes(), digest_size=16).digest()
+
+
+# Round timeline phase for each mission screen
+SCREEN_PHASES = {
+    ScreenState.IN_TEAM: "combat",
+    ScreenState.LETTER_SELECT: "letter",
+    ScreenState.LETTER_REWARD: "settlement",
+    ScreenState.DROP_RATE: "drop_rate",
+    ScreenState.START: "menu",
+    ScreenState.CONTINUE: "settlement",
+    ScreenState.ESC_MENU: "menu",
+    ScreenState.LOADING: "loading",
+}
+
+
+@dataclass(frozen=True)
+class CommissionSettings:
+    """Immutable snapshot of the commission settings read by the hot loops and tickers."""
+    use_skill: str = "Disabled"
+    skill_cast_mode: str = "Fixed Frequency"
+    skill_cast_frequency: float = 5.0
+    timeout: float = 120.0
+    play_sound: bool = True
+    jitter_mode: str = "Disabled"
+    movement_min_delay: float = 4.0
+    movement_max_delay: float = 9.0
+    jitter_amount: int = 20
+    poll_min_interval: float = 0.1
+    poll_max_interval: float = 0.5
+    profile_hot_paths: bool = False
+    record_session: bool = False
+    record_frames: str = "Disabled"
+    adaptive_timeout: bool = False
+    timeout_floor: float = 30.0
+    timeout_ceiling: float = 300.0
+    stall_watchdog: bool = False
+    stall_frozen_time: float = 20.0
+    stall_idle_time: float = 30.0
+    stall_screen_time: float = 60.0
+    compress_frames: bool = True
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            use_skill=config.get("Use Skill", "Disabled"),
+            skill_cast_mode=config.get("Skill Cast Mode", "Fixed Frequency"),
+            skill_cast_frequency=float(config.get("Skill Cast Frequency", 5.0)),
+            timeout=float(config.get("Timeout", 120)),
+            play_sound=bool(config.get("Play Sound Notification", True)),
+            jitter_mode=config.get("Jitter Mode", "Disabled"),
+            movement_min_delay=float(config.get("External Movement Min Delay", 4.0)),
+            movement_max_delay=float(config.get("External Movement Max Delay", 9.0)),
+            jitter_amount=int(config.get("External Movement Jitter Amount", 20)),
+            poll_min_interval=float(config.get("Poll Min Interval", 0.1)),
+            poll_max_interval=float(config.get("Poll Max Interval", 0.5)),
+            profile_hot_paths=bool(config.get("Profile Hot Paths", False)),
+            record_session=bool(config.get("Record Session", False)),
+            record_frames=config.get("Record Frames", "Disabled"),
+            compress_frames=bool(config.get("Compress Recorded Frames", True)),
+            adaptive_timeout=bool(config.get("Adaptive Timeout", False)),
+            timeout_floor=float(config.get("Adaptive Timeout Floor", 30)),
+            timeout_ceiling=float(config.get("Adaptive Timeout Ceiling", 300)),
+            stall_watchdog=bool(config.get("Stall Watchdog", False)),
+            stall_frozen_time=float(config.get("Stall Frozen Time", 20)),
+            stall_idle_time=float(config.get("Stall Idle Time", 30)),
+            stall_screen_time=float(config.get("Stall Screen Time", 60)),
+        )
+
 
 class CommissionsTask(BaseDNATask):
 
@@ -25,13 +116,63 @@ class CommissionsTask(BaseDNATask):
         self.mission_status = None
         self.action_timeout = 10
         self.wave_future = None
+        self.ocr_cache = OcrCache()
+        self.frame_wait_stats = {"waits": 0, "evaluations": 0, "skipped": 0}
+        self.poll_governor = PollGovernor()
+        self.screen_state = ScreenStateMachine(self)
+        self._settings = None
+        self.scheduler = TaskScheduler()
+        self.profiler = HotPathProfiler(self)
+        self.recorder = SessionRecorder(self)
+        self.frame_recorder = FrameRecorder(self, phase=lambda: self.screen_state.state.name)
+        self.round_timeline = RoundTimeline(type(self).__name__)
+        self.settle_detector = SettleDetector()
+        self.route_executor = RouteExecutor(self)
+        self.skill_scheduler = SkillScheduler(self)
+        self.round_history = round_history
+        self.timed_run = None  # (kind, start) of the round or wave the Timeout setting currently applies to
+        self.stall_watchdog = StallWatchdog()
+        self._stall_boxes = None
+        self._stall_boxes_shape = None
+
+    @property
+    def settings(self) -> CommissionSettings:
+        """Config snapshot, rebuilt after refresh_settings() instead of read per access."""
+        if self._settings is None:
+            self._settings = CommissionSettings.from_config(self.config)
+        return self._settings
+
+    def refresh_settings(self):
+        """Call when the base or external config changed (task start, config_external_movement)."""
+        self._settings = None
+        self.profiler.enable(self.settings.profile_hot_paths)
+        self.recorder.enable(self.settings.record_session)
+        rois = self.frame_recording_rois if self.settings.record_frames == "ROIs" else None
+        self.frame_recorder.enable(self.settings.record_frames != "Disabled", rois=rois,
+                                   compress=self.settings.compress_frames)
+        self.stall_watchdog.frozen_time = self.settings.stall_frozen_time
+        self.stall_watchdog.screen_time = self.settings.stall_screen_time
+
+    def stop_recording(self, *delegates):
+        """End this run's recordings; call from run()'s finally, with the task do_run() was delegated to"""
+        for task in dict.fromkeys((self,) + delegates):
+            task.recorder.enable(False)
+            task.frame_recorder.enable(False)
 
     def setup_commission_config(self):
         self.default_config.update({
             'Timeout': 120,
+            "Adaptive Timeout": False,
+            "Adaptive Timeout Floor": 30,
+            "Adaptive Timeout Ceiling": 300,
+            "Stall Watchdog": False,
+            "Stall Frozen Time": 20,
+            "Stall Idle Time": 30,
+            "Stall Screen Time": 60,
             "Commission Manual": "Disabled",
             "Commission Manual Specific Rounds": "",
             "Use Skill": "Disabled",
+            "Skill Cast Mode": "Fixed Frequency",
             "Skill Cast Frequency": 5.0,
             "Enable Auto Resonance": True,
             "Play Sound Notification": True,
@@ -41,11 +182,25 @@ class CommissionsTask(BaseDNATask):
             "External Movement Min Delay": 4.0,
             "External Movement Max Delay": 8.0,
             "External Movement Jitter Amount": 20,
+            "Poll Min Interval": 0.1,
+            "Poll Max Interval": 0.5,
+            "Profile Hot Paths": False,
+            "Record Session": False,
+            "Record Frames": "Disabled",
+            "Compress Recorded Frames": True,
         })
         self.config_description.update({
             "Commission Manual Specific Rounds": "Example: 3,5,8",
             "Timeout": "Restart task after timeout",
-            "Skill Cast Frequency": "Cast skill every X seconds",
+            "Adaptive Timeout": "Use p99 x 1.2 of this dungeon's recorded round/wave times instead of Timeout once 20 are recorded",
+            "Adaptive Timeout Floor": "Lowest adaptive timeout (seconds)",
+            "Adaptive Timeout Ceiling": "Highest adaptive timeout (seconds)",
+            "Stall Watchdog": "Recover as soon as the game looks frozen, idle or stuck on a screen instead of waiting for Timeout",
+            "Stall Frozen Time": "Seconds without any screen change before recovering (0 disables)",
+            "Stall Idle Time": "Seconds without movement in the game view while walking a route before recovering (0 disables)",
+            "Stall Screen Time": "Seconds on the same non-combat screen before recovering (0 disables)",
+            "Skill Cast Mode": "Cooldown Aware (experimental, default HUD layout only) casts as soon as the skill icon shows ready",
+            "Skill Cast Frequency": "Cast skill every X seconds (Cooldown Aware: until the icon is calibrated)",
             "Enable Auto Resonance": "Enable auto resonance trigger when map traversal is needed",
             "Play Sound Notification": "Play sound notification when needed",
             "Auto Select First Letter and Reward": "Recommended to enable next option when farming weapon letters",
@@ -54,6 +209,12 @@ class CommissionsTask(BaseDNATask):
             "External Movement Min Delay": "Minimum interval for random mouse movement (seconds)",
             "External Movement Max Delay": "Maximum interval for random mouse movement (seconds)",
             "External Movement Jitter Amount": "Maximum pixel distance to move mouse (default: 20)",
+            "Poll Min Interval": "Main loop interval on menus and after changes (seconds)",
+            "Poll Max Interval": "Main loop interval during quiet waves (seconds)",
+            "Profile Hot Paths": "Record finder / OCR / wait timings to the profiles folder (flamegraph, speedscope)",
+            "Record Session": "Record frames, inputs and detections to the sessions folder for offline replay",
+            "Record Frames": "Record captured frames (or only the detection ROIs) to the recordings folder for debugging",
+            "Compress Recorded Frames": "Losslessly compress each finished recording chunk",
         })
         self.config_type["Commission Manual"] = {
             "type": "drop_down",
@@ -67,10 +228,18 @@ class CommissionsTask(BaseDNATask):
             "type": "drop_down",
             "options": ["Disabled", "Combat Skill", "Ultimate Skill", "Geniemon Support"],
         }
+        self.config_type["Skill Cast Mode"] = {
+            "type": "drop_down",
+            "options": ["Fixed Frequency", "Cooldown Aware"],
+        }
         self.config_type["Prioritize Letter Reward"] = {
             "type": "drop_down",
             "options": ["Disabled", "Owned Count 0", "Owned Count Min", "Owned Count Max"],
         }
+        self.config_type["Record Frames"] = {
+            "type": "drop_down",
+            "options": ["Disabled", "Full Frame", "ROIs"],
+        }
 
     def find_quit_btn(self, threshold=0, box=None):
         if box is None:
@@ -148,16 +317,16 @@ class CommissionsTask(BaseDNATask):
 
     def quit_mission(self, timeout=0):
         action_timeout = self.action_timeout if timeout == 0 else timeout
-        quit_btn = self.wait_until(self.find_quit_btn, time_out=action_timeout, raise_if_not_found=True)
-        self.sleep(0.5)
-        self.wait_until(
+        quit_btn = self.wait_until_frame(self.find_quit_btn, time_out=action_timeout, raise_if_not_found=True)
+        self.settle(0.5, box=quit_btn)
+        self.wait_until_frame(
             condition=lambda: not self.find_quit_btn(),
             post_action=lambda: self.click_box(quit_btn, after_sleep=0.25),
             time_out=action_timeout,
             raise_if_not_found=True,
         )
-        self.sleep(1)
-        self.wait_until(lambda: not self.in_team(), time_out=action_timeout, raise_if_not_found=True)
+        self.settle(1, until=lambda: not self.in_team())
+        self.wait_until_frame(lambda: not self.in_team(), time_out=action_timeout, raise_if_not_found=True)
 
     def give_up_mission(self, timeout=0):
         def is_mission_start_iface():
@@ -173,7 +342,7 @@ class CommissionsTask(BaseDNATask):
                 time_out=action_timeout,
                 raise_if_not_found=True,
             )
-            self.sleep(0.5)
+            self.settle(0.5, box=box)
             self.wait_until(
                 condition=lambda: not self.find_start_btn(box=box),
                 post_action=lambda: self.click_box(self.find_start_btn(box=box), after_sleep=0.25),
@@ -187,14 +356,15 @@ class CommissionsTask(BaseDNATask):
         if self.in_team():
             return False
         action_timeout = self.action_timeout if timeout == 0 else timeout
-        continue_btn = self.wait_until(self.find_continue_btn, time_out=action_timeout, raise_if_not_found=True)
-        self.wait_until(
+        continue_btn = self.wait_until_frame(self.find_continue_btn, time_out=action_timeout,
+                                             raise_if_not_found=True)
+        self.wait_until_frame(
             condition=lambda: not self.find_continue_btn(),
             post_action=lambda: self.click_box(continue_btn, after_sleep=0.25),
             time_out=action_timeout,
             raise_if_not_found=True,
         )
-        self.sleep(0.5)
+        self.settle(0.5)
         return True
 
     def choose_drop_rate(self, timeout=0):
@@ -202,7 +372,7 @@ class CommissionsTask(BaseDNATask):
             if (box:=self.find_drop_rate_btn()):
                 self.click_box(box, after_sleep=0.25)
         action_timeout = self.action_timeout if timeout == 0 else timeout
-        self.sleep(0.5)
+        self.settle(0.5)
         self.choose_drop_rate_item()
         self.wait_until(
             condition=lambda: not self.find_drop_item() and not self.find_drop_item(800),
@@ -247,7 +417,7 @@ class CommissionsTask(BaseDNATask):
                 self.click(0.56, 0.5, down_time=0.02)
                 self.move_back_from_safe_position()
                 self.sleep(0.1)
-                self.wait_until(
+                self.wait_until_frame(
                     condition=lambda: not self.find_letter_interface(),
                     post_action=lambda: (
                         self.move_mouse_to_safe_position(box=box),
@@ -261,7 +431,7 @@ class CommissionsTask(BaseDNATask):
         else:
             self.log_info_notify("Please select letter manually")
             self.soundBeep()
-            self.wait_until(
+            self.wait_until_frame(
                 lambda: not self.find_letter_interface(),
                 time_out=300,
                 raise_if_not_found=True,
@@ -351,38 +521,29 @@ class CommissionsTask(BaseDNATask):
                 time_out=300,
                 raise_if_not_found=True,
             )
-        self.sleep(3)
+        # Done once the settlement (continue / start) screen shows up
+        self.settle(3, until=lambda: self.screen_state.update() in (ScreenState.CONTINUE, ScreenState.START))
 
     def use_skill(self, skill_time):
         if not hasattr(self, "config"):
             return
-        if self.config.get("Use Skill", "Disabled") != "Disabled" and time.time() - skill_time >= self.config.get("Skill Cast Frequency", 5):
+        settings = self.settings
+        if settings.use_skill != "Disabled" and time.time() - skill_time >= settings.skill_cast_frequency:
             skill_time = time.time()
-            if self.config.get("Use Skill") == "Combat Skill":
+            if settings.use_skill == "Combat Skill":
                 self.get_current_char().send_combat_key()
-            elif self.config.get("Use Skill") == "Ultimate Skill":
+            elif settings.use_skill == "Ultimate Skill":
                 self.get_current_char().send_ultimate_key()
-            elif self.config.get("Use Skill") == "Geniemon Support":
+            elif settings.use_skill == "Geniemon Support":
                 self.get_current_char().send_geniemon_key()
         return skill_time
 
     def create_skill_ticker(self):
-
-        def action():
-            if self.config.get("Use Skill", "Disabled") == "Disabled":
-                return
-            if self.config.get("Use Skill") == "Combat Skill":
-                self.get_current_char().send_combat_key()
-            elif self.config.get("Use Skill") == "Ultimate Skill":
-                self.get_current_char().send_ultimate_key()
-            elif self.config.get("Use Skill") == "Geniemon Support":
-                self.get_current_char().send_geniemon_key()
-
-        return self.create_ticker(action, interval=lambda: self.config.get("Skill Cast Frequency", 5))
+        return self.skill_scheduler.create_ticker()
 
     def create_external_movement_ticker(self):
         def action():
-            if self.config.get("Jitter Mode", "Disabled") == "Disabled":
+            if self.settings.jitter_mode == "Disabled":
                 # self.log_info("External movement disabled in config")
                 return
             self.log_info("Triggering External Movement Logic...")
@@ -394,6 +555,9 @@ class CommissionsTask(BaseDNATask):
             # self.try_bring_to_front() # Removed duplicate call
             
             try:
+                # Imported here so the mission logic also loads headless (see Replay)
+                import win32api
+
                 # Check if mouse is in window
                 if not self.is_mouse_in_window():
                     self.log_info("Mouse outside window, moving to center...")
@@ -410,7 +574,7 @@ class CommissionsTask(BaseDNATask):
                 current_x, current_y = win32api.GetCursorPos()
                 
                 # Get jitter amount from config
-                jitter_amount = int(self.config.get("External Movement Jitter Amount", 20))
+                jitter_amount = self.settings.jitter_amount
                 
                 # Generate small random offset (jitter)
                 offset_x = random.randint(-jitter_amount, jitter_amount)
@@ -426,12 +590,10 @@ class CommissionsTask(BaseDNATask):
                 
             except Exception as e:
                 self.log_error(f"External movement error: {e}")
-        return self.create_ticker(
+        return self.scheduler.register(
+            "external_movement",
             action,
-            interval=lambda: random.uniform(
-                float(self.config.get("External Movement Min Delay", 4.0)),
-                float(self.config.get("External Movement Max Delay", 9.0))
-            )
+            interval=lambda: random.uniform(self.settings.movement_min_delay, self.settings.movement_max_delay)
         )
 
     def ensure_game_focused(self):
@@ -439,7 +601,7 @@ class CommissionsTask(BaseDNATask):
         If external movement logic is enabled, force focus the game window immediately.
         This is useful to call at the start of a task to ensure the game is active.
         """
-        if self.config.get("Jitter Mode", "Disabled") != "Disabled":
+        if self.settings.jitter_mode != "Disabled":
             self.log_info("External movement enabled: Forcing game window focus...")
             try:
                 self.try_bring_to_front()
@@ -451,9 +613,9 @@ class CommissionsTask(BaseDNATask):
         if self.in_team():
             return
 
-        self.sleep(1)
         round_info_box = self.box_of_screen_scaled(2560, 1440, 531, 517, 618, 602, name="round_info", hcenter=True)
-        texts = self.ocr(box=round_info_box)
+        self.settle(1, box=round_info_box)
+        texts = self.cached_ocr(box=round_info_box)
 
         prev_round = self.current_round
         new_round_from_ocr = None
@@ -467,6 +629,8 @@ class CommissionsTask(BaseDNATask):
 
         if prev_round != self.current_round:
             self.info_set("Current Round", self.current_round)
+            self.info_set("OCR Cache Hit Rate", str(self.ocr_cache))
+            self.info_set("Skipped Wait Evaluations", self.frame_wait_stats["skipped"])
 
     def get_wave_info(self):
         if not self.in_team():
@@ -484,14 +648,43 @@ class CommissionsTask(BaseDNATask):
                     self.info_set("Current Wave", self.current_wave)
             return
         if self.wave_future is None:
-            mission_info_box = self.box_of_screen_scaled(2560, 1440, 275, 372, 445, 470, name="mission_info",
-                                                         hcenter=True)
             frame = self.frame.copy()
-            self.wave_future = self.thread_pool_executor.submit(self.ocr, frame=frame,
-                                                                box=mission_info_box,
+            self.wave_future = self.thread_pool_executor.submit(self.cached_ocr, frame=frame,
+                                                                box=self.get_mission_info_box(),
                                                                 frame_processor=isolate_white_text_to_black,
                                                                 match=re.compile(r"\d/\d"))
 
+    def frame_recording_rois(self):
+        """Screen regions the mission detectors read, recorded when Record Frames is set to ROIs"""
+        return {
+            "mission_info": self.get_mission_info_box(),
+            "round_info": self.box_of_screen_scaled(2560, 1440, 531, 517, 618, 602, name="round_info", hcenter=True),
+            "quit_mission": self.box_of_screen_scaled(2560, 1440, 729, 960, 854, 1025, name="quit_mission",
+                                                      hcenter=True),
+            "start_mission": self.box_of_screen_scaled(2560, 1440, 2094, 1262, 2153, 1328, name="start_mission",
+                                                       hcenter=True),
+            "continue_mission": self.box_of_screen(0.610, 0.671, 0.647, 0.714, name="continue_mission", hcenter=True),
+        }
+
+    def get_mission_info_box(self):
+        return self.box_of_screen_scaled(2560, 1440, 275, 372, 445, 470, name="mission_info", hcenter=True)
+
+    def get_world_box(self):
+        """Central part of the game view, away from the HUD"""
+        return self.box_of_screen(0.3, 0.3, 0.7, 0.7, name="world")
+
+    def settle_after_mission_start(self, before_route=False):
+        """Replaces the fixed 2s wait after entering a mission.
+
+        Before an open-loop route (before_route, or an external movement) the full 2s is kept,
+        since a route started before the character can move fails the round. Otherwise done
+        once in team with the game view (intro camera) stable for 0.5s.
+        """
+        if before_route or self.follows_route():
+            self.sleep(2)
+            return 2
+        return self.settle(2, box=self.get_world_box(), until=self.in_team, stable_time=0.5)
+
     def reset_wave_info(self):
         if self.wave_future is not None:
             self.wave_future.cancel()
@@ -506,51 +699,171 @@ class CommissionsTask(BaseDNATask):
             self.sleep(0.2)
 
     def handle_mission_interface(self, stop_func=lambda: False):
-        if self.in_team():
+        state = self.screen_state.update()
+        self.round_timeline.mark(SCREEN_PHASES[state])
+        if state == ScreenState.IN_TEAM:
             return False
 
         self.check_for_monthly_card()
 
-        if self.find_letter_reward_btn():
+        if state == ScreenState.LETTER_REWARD:
             self.log_info("Handling mission interface: Selecting letter reward")
             self.choose_letter_reward()
             return
 
-        if self.find_letter_interface():
+        if state == ScreenState.LETTER_SELECT:
             self.log_info("Handling mission interface: Selecting letter")
             self.choose_letter()
             return self.get_return_status()
-        elif self.find_drop_item() or self.find_drop_item(800):
+        elif state == ScreenState.DROP_RATE:
             self.log_info("Handling mission interface: Selecting commission manual")
             self.choose_drop_rate()
             return self.get_return_status()
 
-        if self.find_retry_btn() or self.find_bottom_start_btn() or self.find_big_bottom_start_btn():
+        if state == ScreenState.START:
             self.log_info("Handling mission interface: Starting mission")
+            self.finish_round(Mission.START)
             self.start_mission()
             self.mission_status = Mission.START
             return
-        elif self.find_continue_btn():
+        elif state == ScreenState.CONTINUE:
             if stop_func():
                 self.log_info("Handling mission interface: Stopping mission")
                 return Mission.STOP
             self.log_info("Handling mission interface: Continuing mission")
+            self.finish_round(Mission.CONTINUE)
             self.continue_mission()
             self.mission_status = Mission.CONTINUE
             return
-        elif self.find_esc_menu():
+        elif state == ScreenState.ESC_MENU:
             self.log_info("Handling mission interface: Giving up mission")
             self.give_up_mission()
             return Mission.GIVE_UP
         return False
 
+    def history_key(self):
+        """(task, dungeon type, mod folder) the round history is kept under; routed runs count for the route's task"""
+        owner = getattr(getattr(self, "external_movement", None), "__self__", self)
+        return (type(owner).__name__, str(self.config.get("Dungeon Type") or ""),
+                str(self.config.get("External Folder") or ""))
+
+    def mission_timeout(self, kind="round"):
+        """Timeout (seconds) for a round or wave: the Timeout setting, or the adaptive one from round history"""
+        if not self.settings.adaptive_timeout:
+            return self.settings.timeout
+        try:
+            return self.round_history.timeout(kind, self.history_key(), self.settings.timeout,
+                                              self.settings.timeout_floor, self.settings.timeout_ceiling)
+        except sqlite3.Error as e:
+            self.log_error(f"Round history unavailable: {e}")
+            return self.settings.timeout
+
+    def start_timed_run(self, kind="round"):
+        """Start timing the round or wave the timeout applies to; an unfinished previous run is discarded"""
+        self.timed_run = (kind, time.time())
+        self.info_set("Timeout", f"{self.mission_timeout(kind):.0f}s per {kind}")
+
+    def end_timed_run(self, outcome):
+        """Store the running round or wave in the round history with outcome 'cleared', 'timeout', 'stall' or 'abandoned'"""
+        if self.timed_run is None:
+            return
+        (kind, start), self.timed_run = self.timed_run, None
+        casts = self.skill_scheduler.end_run()
+        if self.settings.use_skill != "Disabled":
+            self.info_set(f"Skill Casts/{kind.capitalize()}", casts)
+            self.info_set("Skill Casting", str(self.skill_scheduler))
+        try:
+            self.round_history.record(kind, self.history_key(), time.time() - start, outcome,
+                                      self.mission_timeout(kind), self.settings.timeout, start=start,
+                                      skill_mode=self.settings.skill_cast_mode, casts=casts)
+        except sqlite3.Error as e:
+            self.log_error(f"Failed to write round history: {e}")
+
+    def stall_roi_boxes(self):
+        """Regions the stall watchdog watches; WORLD is the game view, the rest HUD (override per task)"""
+        return {
+            WORLD: self.get_world_box(),
+            "mission_info": self.get_mission_info_box(),
+        }
+
+    def follows_route(self):
+        """Whether the character walks a route in team; without one, standing still is intended."""
+        return getattr(self, "external_movement", _default_movement) is not _default_movement
+
+    def check_stall(self):
+        """Feed the stall watchdog once per loop; recovers right away when a stall signature holds."""
+        frame = self.frame
+        if not self.settings.stall_watchdog or frame is None:
+            return
+        # A quiet game view only means stuck while walking a route (AutoDefence alone holds position)
+        self.stall_watchdog.idle_time = self.settings.stall_idle_time if self.follows_route() else 0
+        if self._stall_boxes_shape != frame.shape:
+            self._stall_boxes = self.stall_roi_boxes()
+            self._stall_boxes_shape = frame.shape
+        state = self.screen_state.state
+        crops = {name: box.crop_frame(frame) for name, box in self._stall_boxes.items()}
+        event = self.stall_watchdog.observe(crops, state.name, state is ScreenState.IN_TEAM, time.monotonic())
+        if event is None:
+            return
+        saved = 0.0
+        if self.timed_run is not None:
+            kind, start = self.timed_run
+            saved = max(0.0, start + self.mission_timeout(kind) - time.time())
+        self.stall_watchdog.record_saved(saved)
+        self.log_info(f"Stall detected: {event.kind} for {event.seconds:.0f}s on {state.name}, "
+                      f"recovering {saved:.0f}s before Timeout")
+        self.info_set("Stall Watchdog", str(self.stall_watchdog))
+        self.end_timed_run("stall")
+        self.recover_from_stall(event)
+
+    def recover_from_stall(self, event):
+        """Back out of an unexpected screen with esc; otherwise restart through the in-mission menu."""
+        if event.kind == "stuck_screen":
+            self.send_key("esc", after_sleep=1)
+        else:
+            self.open_in_mission_menu(raise_if_not_found=False)
+
+    def finish_round(self, status: Mission):
+        """Close the round timeline and show rounds/hour and the phase breakdown."""
+        # Only the settlement screen (CONTINUE) follows a cleared round; a round still running when the
+        # start screen shows was given up or failed and retried
+        self.end_timed_run("cleared" if status == Mission.CONTINUE else "abandoned")
+        try:
+            record = self.round_timeline.end_round(status=status.name, current_round=self.current_round,
+                                                   sleep_saved=round(self.settle_detector.end_round(), 2))
+        except OSError as e:
+            self.log_error(f"Failed to write round timeline: {e}")
+            return
+        if record is None:
+            return
+        self.info_set("Rounds/Hour", f"{self.round_timeline.rounds_per_hour:.1f}")
+        self.info_set("Phase Breakdown", str(self.round_timeline))
+        self.info_set("Sleep Saved/Round", f"{record['sleep_saved']:.1f}s ({self.settle_detector})")
+        self.log_info(f"Round {record['round']} took {record['seconds']:.1f}s: "
+                      + ", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in record["phases"].items()))
+
     def get_return_status(self):
         ret = self.mission_status if self.mission_status else Mission.START
         self.mission_status = None
         return ret
 
+    def cached_ocr(self, box, match=None, frame=None, frame_processor=None, **kwargs):
+        """OCR through the ROI content cache; unchanged text skips the recognizer."""
+        if frame is None:
+            frame = self.frame
+        roi_img = box.crop_frame(frame)
+        if frame_processor is not None:
+            roi_img = frame_processor(roi_img)
+        key = self.ocr_cache.make_key(roi_img, match=match, box=box, **kwargs)
+        hit, texts = self.ocr_cache.get(key)
+        if hit:
+            return texts
+        texts = self.ocr(frame=frame, box=box, match=match, frame_processor=frame_processor, **kwargs)
+        self.ocr_cache.put(key, texts)
+        return texts
+
     def find_next_hint(self, x1, y1, x2, y2, s, box_name="hint_text"):
-        texts = self.ocr(
+        texts = self.cached_ocr(
             box=self.box_of_screen(x1, y1, x2, y2, hcenter=True),
             target_height=540,
             name=box_name,
@@ -560,23 +873,24 @@ class CommissionsTask(BaseDNATask):
             return True
 
     def reset_and_transport(self):
+        self.round_timeline.mark("route")
         self.open_in_mission_menu()
-        self.sleep(0.8)
-        self.wait_until(
+        self.settle(0.8)
+        self.wait_until_frame(
             condition=lambda: not self.find_esc_menu(),
             post_action=self.click(0.73, 0.92, after_sleep=0.5),
             time_out=10,
         )
         setting_box = self.box_of_screen_scaled(2560, 1440, 738, 4, 1123, 79, name="other_section", hcenter=True)
-        setting_other = self.wait_until(lambda: self.find_one("setting_other", box=setting_box), time_out=10,
-                                        raise_if_not_found=True)
-        self.wait_until(
+        setting_other = self.wait_until_frame(lambda: self.find_one("setting_other", box=setting_box), time_out=10,
+                                              raise_if_not_found=True)
+        self.wait_until_frame(
             condition=lambda: self.calculate_color_percentage(setting_menu_selected_color, setting_other) > 0.24,
             post_action=lambda: self.click_box(setting_other, after_sleep=0.5),
             time_out=10,
         )
         confirm_box = self.box_of_screen_scaled(2560, 1440, 1298, 776, 1368, 843, name="confirm_btn", hcenter=True)
-        self.wait_until(
+        self.wait_until_frame(
             condition=lambda: self.find_start_btn(box=confirm_box),
             post_action=lambda: (
                 self.move_mouse_to_safe_position(),
@@ -586,12 +900,116 @@ class CommissionsTask(BaseDNATask):
             ),
             time_out=10,
         )
-        if not self.wait_until(condition=self.in_team, post_action=self.click(0.59, 0.56, after_sleep=0.5),
-                               time_out=10):
+        if not self.wait_until_frame(condition=self.in_team, post_action=self.click(0.59, 0.56, after_sleep=0.5),
+                                     time_out=10):
             self.ensure_main()
             return False
         return True
 
+    def wait_until_frame(self, condition, time_out=0, pre_action=None, post_action=None, settle_time=0,
+                         post_action_interval=0.5, raise_if_not_found=False):
+        """wait_until that evaluates the condition once per new frame content.
+
+        A recaptured frame whose frame_fingerprint matches the last evaluated one reuses the
+        previous result; such skips are counted in frame_wait_stats.
+        settle_time: the condition must have held on every evaluation for settle_time seconds.
+        post_action: run while the condition fails, at most once per post_action_interval.
+        time_out: 0 means ok's default wait timeout, like wait_until.
+        """
+        start = time.monotonic()
+        time_out = time_out or DEFAULT_WAIT_TIMEOUT
+        last_fingerprint = None
+        result = None
+        true_since = None
+        next_post_action = start
+        skipped = evaluations = 0
+        self.frame_wait_stats["waits"] += 1
+        try:
+            while True:
+                if pre_action is not None:
+                    pre_action()
+                self.next_frame()
+                now = time.monotonic()
+                fingerprint = frame_fingerprint(self.frame)
+                if evaluations and fingerprint == last_fingerprint:
+                    skipped += 1
+                else:
+                    last_fingerprint = fingerprint
+                    evaluations += 1
+                    result = condition()
+                    if not result:
+                        true_since = None
+                    elif true_since is None:
+                        true_since = now
+                if result:
+                    if now - true_since >= settle_time:
+                        return result
+                elif post_action is not None and now >= next_post_action:
+                    post_action()
+                    next_post_action = time.monotonic() + post_action_interval
+                if now - start >= time_out:
+                    if raise_if_not_found:
+                        raise WaitFailedException(f"wait_until_frame timed out after {time_out}s")
+                    return None
+        finally:
+            self.frame_wait_stats["evaluations"] += evaluations
+            self.frame_wait_stats["skipped"] += skipped
+            self.log_debug(f"wait_until_frame: {evaluations} evaluations, {skipped} stale frames skipped "
+                           f"in {time.monotonic() - start:.2f}s")
+
+    def settle(self, ceiling, box=None, until=None, stable_time=0.2):
+        """Condition-based replacement for a fixed sleep(ceiling).
+
+        Without `until`: returns once the box (whole frame if None) has been visually stable
+        for stable_time. With `until`: returns once until() is truthy (the next expected screen),
+        and with a box as well, once the box has also been stable for stable_time while it holds.
+        until() is evaluated again only when the frame content changed (frame_fingerprint).
+        Never waits longer than ceiling; the time saved is credited to the current round.
+        """
+        start = time.monotonic()
+        deadline = start + ceiling
+        detector = self.settle_detector
+        detector.start()
+        last_fingerprint = None
+        condition = False
+        reason = "ceiling"
+        while time.monotonic() < deadline:
+            self.next_frame()
+            if until is not None:
+                fingerprint = frame_fingerprint(self.frame)
+                if fingerprint != last_fingerprint:
+                    last_fingerprint = fingerprint
+                    condition = until()
+                if not condition:
+                    detector.start()
+                    continue
+                if box is None:
+                    reason = "condition"
+                    break
+            # Unchanged frames are fed too: they are what a stable region looks like
+            if detector.update(box.crop_frame(self.frame) if box is not None else self.frame,
+                               time.monotonic(), stable_time):
+                reason = "stable"
+                break
+        elapsed = time.monotonic() - start
+        saved = detector.record(ceiling, elapsed)
+        self.log_debug(f"settle: {reason} after {elapsed:.2f}s of {ceiling}s, saved {saved:.2f}s")
+        return elapsed
+
+    def create_poll_governor(self):
+        return PollGovernor(self.settings.poll_min_interval, self.settings.poll_max_interval)
+
+    def poll_sleep(self, state, activity=None):
+        """Sleep for the governed main loop interval; state is "in_team" or "interface"."""
+        interval = self.poll_governor.tick(state, activity)
+        self.profiler.maybe_dump()
+        if self.poll_governor.report_due():
+            self.info_set("Poll Rate", str(self.poll_governor))
+            self.info_set("Screen State", str(self.screen_state))
+            self.info_set("Tickers", str(self.scheduler))
+        self.check_stall()
+        self.sleep(interval)
+
     def find_letter_interface(self):
         box = self.find_letter_btn() or self.find_not_use_letter_icon()
         return box
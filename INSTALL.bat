@@ -117,6 +117,98 @@ echo [7/7] ImportTask.py
 copy /Y "src\tasks\fullauto\ImportTask.py" "!OK_DNA_PATH!\src\tasks\fullauto\" >nul
 if errorlevel 1 (echo   FAILED!) else (echo   OK)
 
+echo.
+echo Installing support modules...
+echo.
+
+echo OcrCache.py
+copy /Y "src\tasks\OcrCache.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo FishDetection.py
+copy /Y "src\tasks\fullauto\FishDetection.py" "!OK_DNA_PATH!\src\tasks\fullauto\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo FishController.py
+copy /Y "src\tasks\fullauto\FishController.py" "!OK_DNA_PATH!\src\tasks\fullauto\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo FishSimulator.py
+copy /Y "src\tasks\fullauto\FishSimulator.py" "!OK_DNA_PATH!\src\tasks\fullauto\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo RoiCapture.py
+copy /Y "src\tasks\RoiCapture.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo PollGovernor.py
+copy /Y "src\tasks\PollGovernor.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo ScreenStateMachine.py
+copy /Y "src\tasks\ScreenStateMachine.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo TaskScheduler.py
+copy /Y "src\tasks\TaskScheduler.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo Profiler.py
+copy /Y "src\tasks\Profiler.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo RoundTimeline.py
+copy /Y "src\tasks\RoundTimeline.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo SettleDetector.py
+copy /Y "src\tasks\SettleDetector.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo SharedResources.py
+copy /Y "src\tasks\SharedResources.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo Replay.py
+copy /Y "src\tasks\Replay.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo Benchmarks.py
+copy /Y "src\tasks\Benchmarks.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo FrameRecorder.py
+copy /Y "src\tasks\FrameRecorder.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo RouteExecutor.py
+copy /Y "src\tasks\RouteExecutor.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo RoundHistory.py
+copy /Y "src\tasks\RoundHistory.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo StallWatchdog.py
+copy /Y "src\tasks\StallWatchdog.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo SkillScheduler.py
+copy /Y "src\tasks\SkillScheduler.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo InstanceHooks.py
+copy /Y "src\tasks\InstanceHooks.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo FishFight.py
+copy /Y "src\tasks\fullauto\FishFight.py" "!OK_DNA_PATH!\src\tasks\fullauto\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
+echo SampleStats.py
+copy /Y "src\tasks\SampleStats.py" "!OK_DNA_PATH!\src\tasks\" >nul
+if errorlevel 1 (echo   FAILED!) else (echo   OK)
+
 echo.
 echo ========================================
 echo Installation Complete!
@@ -1,8 +1,6 @@
 from qfluentwidgets import FluentIcon
 import re
 import time
-import win32con
-import win32api
 import cv2
 import os
 import json
@@ -15,6 +13,8 @@ from ok import Logger, TaskDisabledException, GenshinInteraction
 from ok import find_boxes_by_name
 from src.tasks.DNAOneTimeTask import DNAOneTimeTask
 from src.tasks.CommissionsTask import CommissionsTask, Mission, QuickMoveTask
+from src.tasks.ScreenStateMachine import ScreenState
+from src.tasks.SharedResources import shared_resources, folder_key
 from src.tasks.BaseCombatTask import BaseCombatTask
 
 from src.tasks.trigger.AutoMazeTask import AutoMazeTask
@@ -90,14 +90,19 @@ class ImportTask(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
 
     def run(self):
         DNAOneTimeTask.run(self)
+        self.refresh_settings()
         self.move_mouse_to_safe_position(save_current_pos=False)
         self.set_check_monthly_card()
         self.ensure_game_focused()
+        _to_do_task = self
         try:
-            path = Path.cwd()
-            self.script = self.process_json_files(f'{path}/mod/{self.config.get("External Folder")}/scripts')
-            self.img = self.load_png_files(f'{path}/mod/{self.config.get("External Folder")}/map')
-            _to_do_task = self
+            mod_folder = f'{Path.cwd()}/mod/{self.config.get("External Folder")}'
+            # Shared by every task running the same mod; loaded again whenever a file in the folder changed
+            script_folder, map_folder = f'{mod_folder}/scripts', f'{mod_folder}/map'
+            self.script = shared_resources.get(folder_key("scripts", script_folder),
+                                               lambda: self.process_json_files(script_folder))
+            self.img = shared_resources.get(folder_key("map", map_folder), lambda: self.load_png_files(map_folder))
+            self.info_set("Shared Resources", str(shared_resources))
             dungeon_type = self.config.get('Dungeon Type')
             if dungeon_type == 'Endless Defence':
                 _to_do_task = self.get_task_by_class(AutoDefence)
@@ -114,6 +119,8 @@ class ImportTask(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         except Exception as e:
             logger.error('AutoDefence error', e)
             raise
+        finally:
+            self.stop_recording(_to_do_task)
 
     def do_run(self):
         self.init_all()
@@ -121,16 +128,19 @@ class ImportTask(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         if self.in_team():
             self.open_in_mission_menu()
             self.sleep(0.5)
+        self.poll_governor = self.create_poll_governor()
+        self.screen_state.reset()
         while True:
-            if self.in_team():
+            in_team = self.screen_state.update() == ScreenState.IN_TEAM
+            if in_team:
                 self.get_wave_info()
                 if self.current_wave != -1:
                     if self.current_wave != self.runtime_state["wave"]:
                         self.runtime_state["wave"] = self.current_wave
-                self.skill_tick()
-                self.external_movement_tick()
-                if time.time() - self.runtime_state["wave_start_time"] >= self.config.get('Timeout', 180):
+                self.scheduler.tick()
+                if time.time() - self.runtime_state["wave_start_time"] >= self.mission_timeout("round"):
                     self.log_info('Task Timeout')
+                    self.end_timed_run("timeout")
                     self.open_in_mission_menu()
                     self.sleep(0.5)
                 if self.delay_index is not None and time.time() > self.runtime_state["delay_task_start"]:
@@ -147,17 +157,23 @@ class ImportTask(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
                 self.wait_until(self.in_team, time_out=30)
                 self.log_info('Task Started')
                 self.init_all()
-                self.sleep(2)
+                self.settle_after_mission_start(before_route=True)
                 self.walk_to_aim()
                 now = time.time()
                 self.runtime_state.update({"wave_start_time": now, "delay_task_start": now + 1})
+                self.start_timed_run("round")
             elif _status == Mission.CONTINUE:
                 self.log_info('Task Continued')
                 self.wait_until(self.in_team, time_out=30)
                 self.init_for_next_round()
                 now = time.time()
                 self.runtime_state.update({"wave_start_time": now, "delay_task_start": now + 1})
-            self.sleep(0.2)
+                self.start_timed_run("round")
+            self.poll_sleep("in_team" if in_team else "interface", (self.current_wave, _status))
+
+    def follows_route(self):
+        """do_run() always walks the mod's routes"""
+        return True
 
     def init_all(self):
         self.init_for_next_round()
@@ -237,6 +253,7 @@ class ImportTask(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         """
         Try to match the next map node and execute macro.
         """
+        self.round_timeline.mark("route")
         # Precompile regex for efficiency
         # Logic: if no former point, skip names ending with letter (usually steps after start point)
         end_with_letter_pattern = re.compile(r'[a-zA-Z]$')
@@ -418,7 +435,7 @@ class ImportTask(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
                     raise MacroFailedException
 
                 # next_frame should include tiny sleep to prevent CPU 100% spin
-                if self.config.get("Jitter Mode") == "Always":
+                if self.settings.jitter_mode == "Always":
                     self.external_movement_tick()
                 self.next_frame()
 
@@ -428,7 +445,7 @@ class ImportTask(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
                 self.delay_index = None
                 self.execute_action(action)
 
-        self.sleep(2)
+        self.settle(2)
 
     def execute_action(self, action):
         """
@@ -5,6 +5,7 @@ from ok import Logger, TaskDisabledException
 from src.tasks.DNAOneTimeTask import DNAOneTimeTask
 from src.tasks.BaseCombatTask import BaseCombatTask
 from src.tasks.CommissionsTask import CommissionsTask, Mission, QuickMoveTask, _default_movement
+from src.tasks.ScreenStateMachine import ScreenState
 
 logger = Logger.get_logger(__name__)
 
@@ -46,8 +47,9 @@ class AutoDefence(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
             return super().config
         else:
             if self._merged_config_cache is None:
+                # Merged once per config_external_movement instead of on every access
                 self._merged_config_cache = super().config.copy()
-            self._merged_config_cache.update(self._external_config)
+                self._merged_config_cache.update(self._external_config)
             return self._merged_config_cache
 
     def config_external_movement(self, func: callable, config: dict):
@@ -57,9 +59,11 @@ class AutoDefence(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
             self.external_movement = _default_movement
         self._merged_config_cache = None
         self._external_config = config
+        self.refresh_settings()
 
     def run(self):
         DNAOneTimeTask.run(self)
+        self.refresh_settings()
         self.move_mouse_to_safe_position(save_current_pos=False)
         self.set_check_monthly_card()
         self.ensure_game_focused()
@@ -71,6 +75,8 @@ class AutoDefence(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         except Exception as e:
             logger.error("AutoDefence error", e)
             raise
+        finally:
+            self.stop_recording()
 
     def do_run(self):
         self.init_all()
@@ -79,15 +85,18 @@ class AutoDefence(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         if self.external_movement is not _default_movement and self.in_team():
             self.open_in_mission_menu()
 
+        self.poll_governor = self.create_poll_governor()
+        self.screen_state.reset()
         while True:
-            if self.in_team():
+            in_team = self.screen_state.update() == ScreenState.IN_TEAM
+            if in_team:
                 self.handle_in_mission()
                 self.external_movement_tick()
 
             _status = self.handle_mission_interface(stop_func=self.stop_func)
             if _status == Mission.START:
                 self.wait_until(self.in_team, time_out=30)
-                self.sleep(2)
+                self.settle_after_mission_start()
                 self.init_all()
                 self.handle_mission_start()
             elif _status == Mission.STOP:
@@ -98,7 +107,7 @@ class AutoDefence(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
                 self.init_for_next_round()
                 self.wait_until(self.in_team, time_out=DEFAULT_ACTION_TIMEOUT)
 
-            self.sleep(0.1)
+            self.poll_sleep("in_team" if in_team else "interface", (self.current_wave, _status))
 
     def init_all(self):
         self.init_for_next_round()
@@ -121,17 +130,20 @@ class AutoDefence(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
             if self.current_wave != self.runtime_state["wave"]:
                 self.runtime_state.update(
                     {"wave": self.current_wave, "wave_start_time": time.time(), "wait_next_wave": False})
+                self.end_timed_run("cleared")
+                self.start_timed_run("wave")
                 self.quick_move_task.reset()
 
             # Check if wave timeout
             if not self.runtime_state["wait_next_wave"] and time.time() - self.runtime_state[
-                "wave_start_time"] >= self.config.get("Timeout", 120):
+                "wave_start_time"] >= self.mission_timeout("wave"):
+                self.end_timed_run("timeout")
                 if self.external_movement is not _default_movement:
                     self.log_info("Task Timeout")
                     self.open_in_mission_menu()
                     return
                 else:
-                    if self.config.get("Play Sound Notification", True):
+                    if self.settings.play_sound:
                         self.log_info_notify("Task Timeout")
                     else:
                         self.log_info("Task Timeout")
@@ -139,8 +151,7 @@ class AutoDefence(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
 
             # If not timeout, use skill
             if not self.runtime_state["wait_next_wave"]:
-                self.skill_tick()
-                self.external_movement_tick()
+                self.scheduler.tick()
         else:
             if self.runtime_state["wave"] > 0:
                 self.init_runtime_state()
@@ -151,7 +162,11 @@ class AutoDefence(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         """Handle mission start logic"""
         if self.external_movement is not _default_movement:
             self.log_info("Task Started, executing external movement")
-            self.external_movement()
+            self.round_timeline.mark("route")
+            if self.external_movement() is False:
+                self.log_info("External movement left its route, restarting")
+                self.open_in_mission_menu()
+                return
             self.log_info(f"External movement finished, waiting for combat start, timeout in {DEFAULT_ACTION_TIMEOUT+10}s")
             if not self.wait_until(lambda: self.current_wave != -1, post_action=self.get_wave_info,
                                    time_out=DEFAULT_ACTION_TIMEOUT+10):
@@ -160,7 +175,7 @@ class AutoDefence(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
             else:
                 self.log_info("Combat Started")
         else:
-            if self.config.get("Play Sound Notification", True):
+            if self.settings.play_sound:
                 self.log_info_notify("Task Started")
             else:
                 self.log_info("Task Started")
@@ -3,6 +3,7 @@ import time
 
 from ok import Logger, TaskDisabledException
 from src.tasks.CommissionsTask import CommissionsTask, QuickMoveTask, Mission, _default_movement
+from src.tasks.ScreenStateMachine import ScreenState
 from src.tasks.BaseCombatTask import BaseCombatTask
 from src.tasks.DNAOneTimeTask import DNAOneTimeTask
 
@@ -46,8 +47,9 @@ class AutoExploration(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
             return super().config
         else:
             if self._merged_config_cache is None:
+                # Merged once per config_external_movement instead of on every access
                 self._merged_config_cache = super().config.copy()
-            self._merged_config_cache.update(self._external_config)
+                self._merged_config_cache.update(self._external_config)
             return self._merged_config_cache
 
     def config_external_movement(self, func: callable, config: dict):
@@ -57,9 +59,11 @@ class AutoExploration(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
             self.external_movement = _default_movement
         self._merged_config_cache = None
         self._external_config = config
+        self.refresh_settings()
 
     def run(self):
         DNAOneTimeTask.run(self)
+        self.refresh_settings()
         self.move_mouse_to_safe_position(save_current_pos=False)
         self.set_check_monthly_card()
         self.ensure_game_focused()
@@ -71,6 +75,8 @@ class AutoExploration(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         except Exception as e:
             logger.error("AutoExploration error", e)
             raise
+        finally:
+            self.stop_recording()
 
     def do_run(self):
         self.init_all()
@@ -79,14 +85,17 @@ class AutoExploration(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         if self.external_movement is not _default_movement and self.in_team():
             self.open_in_mission_menu()
 
+        self.poll_governor = self.create_poll_governor()
+        self.screen_state.reset()
         while True:
-            if self.in_team():
+            in_team = self.screen_state.update() == ScreenState.IN_TEAM
+            if in_team:
                 self.handle_in_mission()
 
             _status = self.handle_mission_interface(stop_func=self.stop_func)
             if _status == Mission.START:
                 self.wait_until(self.in_team, time_out=30)
-                self.sleep(2)
+                self.settle_after_mission_start()
                 self.init_all()
                 self.handle_mission_start()
             elif _status == Mission.STOP:
@@ -97,7 +106,7 @@ class AutoExploration(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
                 self.init_for_next_round()
                 self.wait_until(self.in_team, time_out=DEFAULT_ACTION_TIMEOUT)
 
-            self.sleep(0.1)
+            self.poll_sleep("in_team" if in_team else "interface", (self.runtime_state["wait_next_round"], _status))
 
     def init_all(self):
         self.init_for_next_round()
@@ -115,23 +124,24 @@ class AutoExploration(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         if self.find_serum():
             if self.runtime_state["start_time"] == 0:
                 self.runtime_state["start_time"] = time.time()
+                self.start_timed_run("round")
                 self.quick_move_task.reset()
             
-            if not self.runtime_state["wait_next_round"] and time.time() - self.runtime_state["start_time"] >= self.config.get("Timeout", 120):
+            if not self.runtime_state["wait_next_round"] and time.time() - self.runtime_state["start_time"] >= self.mission_timeout("round"):
+                self.end_timed_run("timeout")
                 if self.external_movement is not _default_movement:
                     self.log_info("Task Timeout")
                     self.open_in_mission_menu()
                     return
                 else:
-                    if self.config.get("Play Sound Notification", True):
+                    if self.settings.play_sound:
                         self.log_info_notify("Task Timeout")
                     else:
                         self.log_info("Task Timeout")
                     self.runtime_state["wait_next_round"] = True
             
             if not self.runtime_state["wait_next_round"]:
-                self.skill_tick()
-                self.external_movement_tick()
+                self.scheduler.tick()
         else:
             if self.runtime_state["start_time"] > 0:
                 self.init_runtime_state()
@@ -140,7 +150,11 @@ class AutoExploration(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
     def handle_mission_start(self):
         if self.external_movement is not _default_movement:
             self.log_info("Task Started")
-            self.external_movement()
+            self.round_timeline.mark("route")
+            if self.external_movement() is False:
+                self.log_info("External movement left its route, restarting")
+                self.open_in_mission_menu()
+                return
             self.log_info(f"External movement finished, waiting for combat start, timeout in {DEFAULT_ACTION_TIMEOUT+10}s")
             if not self.wait_until(self.find_serum, time_out=DEFAULT_ACTION_TIMEOUT+10):
                 self.log_info("Timeout, restarting")
@@ -148,7 +162,7 @@ class AutoExploration(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
             else:
                 self.log_info("Combat Started")
         else:
-            if self.config.get("Play Sound Notification", True):
+            if self.settings.play_sound:
                 self.log_info_notify("Task Started")
             else:
                 self.log_info("Task Started")
@@ -6,6 +6,7 @@ from ok import Logger, TaskDisabledException
 from src.tasks.DNAOneTimeTask import DNAOneTimeTask
 from src.tasks.BaseCombatTask import BaseCombatTask
 from src.tasks.CommissionsTask import CommissionsTask, Mission
+from src.tasks.ScreenStateMachine import ScreenState
 
 logger = Logger.get_logger(__name__)
 
@@ -50,6 +51,7 @@ class AutoExpulsion(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
 
     def run(self):
         DNAOneTimeTask.run(self)
+        self.refresh_settings()
         self.move_mouse_to_safe_position(save_current_pos=False)
         self.set_check_monthly_card()
         try:
@@ -59,19 +61,24 @@ class AutoExpulsion(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         except Exception as e:
             logger.error("AutoExpulsion error", e)
             raise
+        finally:
+            self.stop_recording()
 
     def do_run(self):
         self.init_all()
         self.load_char()
         self.count = 0
+        self.poll_governor = self.create_poll_governor()
+        self.screen_state.reset()
         while True:
-            if self.in_team():
+            in_team = self.screen_state.update() == ScreenState.IN_TEAM
+            if in_team:
                 self.handle_in_mission()
 
             _status = self.handle_mission_interface(stop_func=self.stop_func)
             if _status == Mission.START:
                 self.wait_until(self.in_team, time_out=30)
-                self.sleep(2)
+                self.settle_after_mission_start()
                 self.init_all()
                 self.handle_mission_start()
             elif _status == Mission.STOP:
@@ -79,7 +86,7 @@ class AutoExpulsion(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
             elif _status == Mission.CONTINUE:
                 pass
 
-            self.sleep(0.1)
+            self.poll_sleep("in_team" if in_team else "interface", (self.count, _status))
 
     def init_all(self):
         self.init_for_next_round()
@@ -98,23 +105,29 @@ class AutoExpulsion(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         if self.runtime_state["start_time"] == 0:
             self.move_on_begin()
             self.runtime_state["start_time"] = time.time()
+            self.start_timed_run("round")
             self.count += 1
 
-        if time.time() - self.runtime_state["start_time"] >= self.config.get("Timeout", 120):
+        if time.time() - self.runtime_state["start_time"] >= self.mission_timeout("round"):
             logger.info("Timeout, restarting task...")
+            self.end_timed_run("timeout")
             self.give_up_mission()
             self.wait_until(lambda: not self.in_team(), time_out=30, settle_time=1)
 
-        self.random_walk_tick()
-        self.skill_tick()
-        self.external_movement_tick()
+        self.scheduler.tick()
+
+    def recover_from_stall(self, event):
+        if event.kind == "stuck_screen":
+            return super().recover_from_stall(event)
+        self.give_up_mission()
+        self.wait_until(lambda: not self.in_team(), time_out=30, settle_time=1)
 
     def handle_mission_start(self):
         if self.count >= self.config.get("Repeat Count", 999):
             self.sleep(1)
             self.open_in_mission_menu()
             self.log_info_notify("Task Terminated")
-            if self.config.get("Play Sound Notification", True):
+            if self.settings.play_sound:
                 self.soundBeep()
             return
         self.log_info("Task Started")
@@ -134,24 +147,13 @@ class AutoExpulsion(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
 
     def create_random_walk_ticker(self):
         """Create a random walk ticker function."""
-        last_time = 0
 
-        def tick():
-            nonlocal last_time
+        def action():
             if not self.config.get("Random Walk", False):
                 return
-            
-            interval = 3
+
             duration = 1
-            now = time.perf_counter()
-            if now - last_time >= interval:
-                last_time = now
-                direction = random.choice(["w", "a", "s", "d"])
-                self.send_key(direction, down_time=duration)
-
-        def reset():
-            nonlocal last_time
-            last_time = 0
-
-        tick.reset = reset
-        return tick
+            direction = random.choice(["w", "a", "s", "d"])
+            self.send_key(direction, down_time=duration)
+
+        return self.scheduler.register("random_walk", action, interval=3)
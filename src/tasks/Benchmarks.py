@@ -0,0 +1,499 @@
+"""Detector benchmarks over recorded frame corpora.
+
+    python -m src.tasks.Benchmarks --corpus benchmarks/corpus --out benchmarks/results
+    python -m src.tasks.Benchmarks --corpus benchmarks/corpus --compare benchmarks/results/<old>.json
+
+Corpus layout, one folder of PNG frames per screen state (any source resolution; every
+frame is rescaled to 1080p, 1440p and 4K):
+
+    result/  letter/  fishing/  map/  wave_hud/     frames
+    maps/                                            ImportTask map templates (optional)
+
+export_session() copies frames from a recorded session (see Replay) into a state folder;
+benchmarks/corpus/README.md lists what each state folder should hold. ImportTask map
+templates must come from the mod's map folder, not from the benchmarked frames.
+
+The numbers are detector-logic-only: the task methods run for real behind BenchHost, but
+BenchHost answers the ok primitives (find_one, ocr) with stand-ins, plain OpenCV template
+matching on the game's feature templates (--features, the COCO json ok-dna loads) and OCR
+through rapidocr_onnxruntime when installed. They compare task-side changes between runs
+of this script; they are not timings of ok's matcher or OCR. Benchmarks whose inputs are
+missing are reported as skipped. The output JSON uses pytest-benchmark's layout
+(machine_info, commit_info, benchmarks[].stats in seconds) plus "scope"; --compare exits
+1 when a mean got slower than --threshold.
+"""
+import importlib
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.tasks.Replay import ReplayBox, ReplayExecutor, ReplayHost, InlineExecutor, SessionReader
+from src.tasks.ScreenStateMachine import SCAN_ORDER
+
+RESOLUTIONS = {"1080p": (1920, 1080), "1440p": (2560, 1440), "4k": (3840, 2160)}
+STATES = ("result", "letter", "fishing", "map", "wave_hud")
+SCOPE = "detector-logic-only: ok find_one / ocr replaced by OpenCV and rapidocr stand-ins"
+
+COMMISSION_TASK = "src.tasks.AutoDefence:AutoDefence"
+IMPORT_TASK = "src.tasks.fullauto.ImportTask:ImportTask"
+FISH_TASK = "src.tasks.fullauto.AutoFishTask:AutoFishTask"
+EXPLORATION_TASK = "src.tasks.fullauto.AutoExploration_Fast:AutoExploration_Fast"
+
+
+class SkipBenchmark(Exception):
+    """Raised when a benchmark's inputs (frames, templates, OCR backend) are not available."""
+
+
+def load_corpus(folder):
+    """state -> [frames] from <folder>/<state>/*.png, plus "maps" -> {name: gray template}"""
+    folder = Path(folder)
+    corpus = {}
+    for state in STATES:
+        paths = sorted((folder / state).glob("*.png"))
+        corpus[state] = [frame for frame in (cv2.imread(str(path), cv2.IMREAD_COLOR) for path in paths)
+                         if frame is not None]
+    corpus["maps"] = {path.stem: cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+                      for path in sorted((folder / "maps").glob("*.png"))}
+    return corpus
+
+
+def export_session(session_folder, corpus_folder, state, every=1, limit=None):
+    """Copy every n-th frame of a recorded session into corpus_folder/state; returns the count"""
+    session = SessionReader(session_folder)
+    out = Path(corpus_folder) / state
+    out.mkdir(parents=True, exist_ok=True)
+    count = 0
+    for position in range(0, len(session.frames), every):
+        if limit is not None and count >= limit:
+            break
+        index = session.frames[position]["index"]
+        cv2.imwrite(str(out / f"{Path(session_folder).name}-{index:06d}.png"), session.image(position))
+        count += 1
+    return count
+
+
+def synthetic_fishing_frames(count=8, seed=0):
+    """Fishing fight frames rendered by FishSimulator, used when the corpus has none"""
+    from src.tasks.fullauto import FishSimulator as sim
+
+    simulation = sim.FishFightSimulation(sim.FishMotion("sine", seed=seed), seed=seed)
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(count):
+        simulation.step(i * 0.1)
+        frame = np.full((1080, 1920, 3), sim.BACKGROUND_COLOR, dtype=np.uint8)
+        strip = frame[sim.STRIP_Y1:sim.STRIP_Y2, sim.STRIP_X1:sim.STRIP_X2]
+        simulation.render(strip, 1.0, rng=rng)
+        frames.append(frame)
+    return frames
+
+
+def rescale(frame, size):
+    width, height = size
+    if frame.shape[1] == width and frame.shape[0] == height:
+        return frame
+    interpolation = cv2.INTER_AREA if height < frame.shape[0] else cv2.INTER_LINEAR
+    return cv2.resize(frame, (width, height), interpolation=interpolation)
+
+
+class FeatureTemplates:
+    """ok-dna feature templates from its COCO json (or a folder of <feature>.png at ref_height)"""
+
+    def __init__(self, path=None, ref_height=1440):
+        self.templates = {}  # name -> (template, bbox or None, ref_height)
+        self._scaled = {}
+        if path is None:
+            return
+        path = Path(path)
+        if path.is_dir():
+            for png in path.glob("*.png"):
+                self.templates[png.stem] = (cv2.imread(str(png), cv2.IMREAD_COLOR), None, ref_height)
+            return
+        coco = json.loads(path.read_text(encoding="utf-8"))
+        images = {image["id"]: image for image in coco["images"]}
+        categories = {category["id"]: category["name"] for category in coco["categories"]}
+        loaded = {}
+        for annotation in coco["annotations"]:
+            image = images[annotation["image_id"]]
+            if image["id"] not in loaded:
+                loaded[image["id"]] = cv2.imread(str(path.parent / image["file_name"]), cv2.IMREAD_COLOR)
+            source = loaded[image["id"]]
+            if source is None:
+                continue
+            x, y, width, height = (int(round(v)) for v in annotation["bbox"])
+            self.templates[categories[annotation["category_id"]]] = (
+                source[y:y + height, x:x + width].copy(), (x, y, width, height), source.shape[0])
+
+    def __bool__(self):
+        return bool(self.templates)
+
+    def get(self, name, frame_height):
+        """(template scaled to frame_height, bbox scaled or None), or None if unknown"""
+        key = (name, frame_height)
+        if key not in self._scaled:
+            if name not in self.templates:
+                return None
+            template, bbox, ref_height = self.templates[name]
+            scale = frame_height / ref_height
+            if scale != 1:
+                template = cv2.resize(template, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                bbox = tuple(int(v * scale) for v in bbox) if bbox else None
+            self._scaled[key] = (template, bbox)
+        return self._scaled[key]
+
+
+def load_ocr_engine():
+    try:
+        from rapidocr_onnxruntime import RapidOCR
+    except ImportError:
+        return None
+    return RapidOCR()
+
+
+class BenchHost(ReplayHost):
+    """ReplayHost whose frame is set by the benchmark; its ok primitives are OpenCV / rapidocr stand-ins"""
+
+    def bench_setup(self, features: FeatureTemplates, ocr_engine, config):
+        self.features = features
+        self.ocr_engine = ocr_engine
+        self.config = config
+        self.info = {}
+        self.unanswered = 0
+        self.thread_pool_executor = InlineExecutor()
+
+    @property
+    def frame(self):
+        return self._replay_frame
+
+    @frame.setter
+    def frame(self, frame):
+        self._replay_frame = frame
+
+    def next_frame(self):
+        return self._replay_frame
+
+    def get_feature_by_name(self, name):
+        found = self.features.get(name, self.height)
+        if found is None:
+            return None
+        return type("Feature", (), {"mat": found[0]})
+
+    def find_one(self, feature_name=None, box=None, threshold=0, frame=None, horizontal_variance=0,
+                 vertical_variance=0, **kwargs):
+        frame = self.frame if frame is None else frame
+        found = self.features.get(feature_name, frame.shape[0])
+        if found is None:
+            raise SkipBenchmark(f"feature {feature_name} not in --features")
+        template, bbox = found
+        if box is None:
+            if bbox is None:
+                box = ReplayBox(0, 0, frame.shape[1], frame.shape[0])
+            else:
+                margin_x = int(max(horizontal_variance, 0.01) * frame.shape[1])
+                margin_y = int(max(vertical_variance, 0.01) * frame.shape[0])
+                x, y = max(0, bbox[0] - margin_x), max(0, bbox[1] - margin_y)
+                box = ReplayBox(x, y, bbox[2] + 2 * margin_x, bbox[3] + 2 * margin_y)
+        region = box.crop_frame(frame)
+        if region.shape[0] < template.shape[0] or region.shape[1] < template.shape[1]:
+            return None
+        _, score, _, (x, y) = cv2.minMaxLoc(cv2.matchTemplate(region, template, cv2.TM_CCOEFF_NORMED))
+        if score < (threshold or 0.8):
+            return None
+        return ReplayBox(box.x + x, box.y + y, template.shape[1], template.shape[0], name=feature_name,
+                         confidence=float(score))
+
+    def calculate_color_percentage(self, color, box):
+        region = box.crop_frame(self.frame)
+        lower = np.array([color["b"][0], color["g"][0], color["r"][0]], np.uint8)
+        upper = np.array([color["b"][1], color["g"][1], color["r"][1]], np.uint8)
+        return cv2.countNonZero(cv2.inRange(region, lower, upper)) / max(region.shape[0] * region.shape[1], 1)
+
+    def ocr(self, box=None, match=None, frame=None, frame_processor=None, **kwargs):
+        if self.ocr_engine is None:
+            raise SkipBenchmark("no OCR backend (pip install rapidocr_onnxruntime)")
+        frame = self.frame if frame is None else frame
+        box = box or ReplayBox(0, 0, frame.shape[1], frame.shape[0])
+        image = box.crop_frame(frame)
+        if frame_processor is not None:
+            image = frame_processor(image)
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        result, _ = self.ocr_engine(image)
+        boxes = []
+        for points, text, score in result or []:
+            xs, ys = [p[0] for p in points], [p[1] for p in points]
+            found = ReplayBox(box.x + int(min(xs)), box.y + int(min(ys)), int(max(xs) - min(xs)),
+                              int(max(ys) - min(ys)), name=text, confidence=float(score))
+            if match is None or _ocr_matches(text, match):
+                boxes.append(found)
+        return boxes
+
+
+def _ocr_matches(text, match):
+    if isinstance(match, (list, tuple)):
+        return any(_ocr_matches(text, item) for item in match)
+    if isinstance(match, re.Pattern):
+        return match.search(text) is not None
+    return match in text
+
+
+def make_host(task_path, features, ocr_engine, config=None):
+    module, name = task_path.split(":")
+    task_cls = getattr(importlib.import_module(module), name)
+    cls = type(f"Bench{task_cls.__name__}", (BenchHost, task_cls), {})
+    executor = ReplayExecutor()
+    host = cls(executor=executor)
+    executor.host = host
+    merged = dict(getattr(host, "default_config", {}))
+    merged.update(config or {})
+    host.bench_setup(features, ocr_engine, merged)
+    return host
+
+
+class Benchmark:
+    def __init__(self, name, task, states, op, setup=None):
+        self.name = name
+        self.task = task
+        self.states = states
+        self.op = op
+        self.setup = setup
+
+
+BENCHMARKS = []
+
+
+def benchmark(name, task, states, setup=None):
+    def register(op):
+        BENCHMARKS.append(Benchmark(name, task, states, op, setup))
+        return op
+
+    return register
+
+
+# handle_mission_interface detectors, one benchmark per screen, plus a cold state machine scan
+for _state in SCAN_ORDER:
+    benchmark(f"screen.detect.{_state.name.lower()}", COMMISSION_TASK, ("result", "letter", "wave_hud"))(
+        lambda host, state=_state: host.screen_state.detectors[state]())
+
+
+@benchmark("screen.state_machine.full_scan", COMMISSION_TASK, ("result", "letter", "wave_hud"))
+def _full_scan(host):
+    host.screen_state.reset()
+    return host.screen_state.update()
+
+
+def _round_info_box(host):
+    return host.box_of_screen_scaled(2560, 1440, 531, 517, 618, 602, name="round_info", hcenter=True)
+
+
+@benchmark("ocr.round_info", COMMISSION_TASK, ("result",))
+def _ocr_round_info(host):
+    host.ocr_cache.clear()
+    return host.cached_ocr(box=_round_info_box(host))
+
+
+@benchmark("ocr.round_info.cached", COMMISSION_TASK, ("result",))
+def _ocr_round_info_cached(host):
+    return host.cached_ocr(box=_round_info_box(host))
+
+
+@benchmark("ocr.wave_info", COMMISSION_TASK, ("wave_hud",))
+def _ocr_wave_info(host):
+    from src.tasks.BaseDNATask import isolate_white_text_to_black
+
+    host.ocr_cache.clear()
+    return host.cached_ocr(box=host.get_mission_info_box(), frame_processor=isolate_white_text_to_black,
+                           match=re.compile(r"\d/\d"))
+
+
+def _setup_maps(host, corpus):
+    maps = corpus.get("maps")
+    if not maps:
+        # Templates cut from the benchmarked frames would always match; use the mod's map folder
+        raise SkipBenchmark("no map templates in corpus/maps (copy them from the mod's map folder)")
+    host.img = maps
+
+
+@benchmark("map.match_map", IMPORT_TASK, ("map",), setup=_setup_maps)
+def _match_map(host):
+    return host.match_map(None, pattern=re.compile(r".*"))
+
+
+@benchmark("map.detect_current_map", EXPLORATION_TASK, ("map",))
+def _detect_current_map(host):
+    return host.detect_current_map()
+
+
+@benchmark("fish.find_bar_and_fish_by_area", FISH_TASK, ("fishing",))
+def _fish_by_area(host):
+    return host.find_bar_and_fish_by_area()
+
+
+@benchmark("fish.detect_fish_state", FISH_TASK, ("fishing",))
+def _fish_state(host):
+    if not host.features:
+        raise SkipBenchmark("fish state icons need --features")
+    return host.detect_fish_state(tuple(host.FISH_STATE_TEMPLATES))
+
+
+def measure(host, op, frames, min_time=0.5, min_rounds=5, max_rounds=2000, warmup=3):
+    """pytest-benchmark style stats (seconds) of op over frames, cycling through them"""
+    for i in range(warmup):
+        host.frame = frames[i % len(frames)]
+        op(host)
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < max_rounds and (len(timings) < min_rounds or time.perf_counter() - start < min_time):
+        host.frame = frames[len(timings) % len(frames)]
+        t = time.perf_counter()
+        op(host)
+        timings.append(time.perf_counter() - t)
+    q1, median, q3 = statistics.quantiles(timings, n=4) if len(timings) > 1 else (timings[0],) * 3
+    mean = statistics.fmean(timings)
+    return {
+        "min": min(timings),
+        "max": max(timings),
+        "mean": mean,
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "median": median,
+        "q1": q1,
+        "q3": q3,
+        "iqr": q3 - q1,
+        "rounds": len(timings),
+        "ops": 1 / mean if mean > 0 else 0.0,
+    }
+
+
+def run_suite(corpus, features=None, ocr_engine=None, resolutions=RESOLUTIONS, pattern=None, min_time=0.5):
+    frames = dict(corpus)
+    if not frames.get("fishing"):
+        frames["fishing"] = synthetic_fishing_frames()
+    hosts = {}
+    results, skipped = [], []
+    for bench in BENCHMARKS:
+        if pattern and not re.search(pattern, bench.name):
+            continue
+        try:
+            if bench.task not in hosts:
+                hosts[bench.task] = make_host(bench.task, features or FeatureTemplates(), ocr_engine)
+            host = hosts[bench.task]
+            if bench.setup:
+                bench.setup(host, corpus)
+        except SkipBenchmark as e:
+            skipped.append({"name": bench.name, "reason": str(e)})
+            continue
+        except Exception as e:
+            skipped.append({"name": bench.name, "reason": f"setup failed: {e!r}"})
+            continue
+        for state in bench.states:
+            if not frames.get(state):
+                skipped.append({"name": f"{bench.name}[{state}]", "reason": f"no {state} frames in corpus"})
+                continue
+            for resolution, size in resolutions.items():
+                name = f"{bench.name}[{resolution}-{state}]"
+                scaled = [rescale(frame, size) for frame in frames[state]]
+                try:
+                    stats = measure(host, bench.op, scaled, min_time=min_time)
+                except SkipBenchmark as e:
+                    skipped.append({"name": name, "reason": str(e)})
+                    break
+                except Exception as e:
+                    skipped.append({"name": name, "reason": f"failed: {e!r}"})
+                    break
+                results.append({"group": bench.name.split(".")[0], "name": name, "fullname": bench.name,
+                                "params": {"resolution": resolution, "state": state, "frames": len(scaled)},
+                                "stats": stats})
+    return results, skipped
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, timeout=10,
+                              cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def report(results, skipped):
+    return {
+        "machine_info": {"node": platform.node(), "processor": platform.processor(), "machine": platform.machine(),
+                         "system": platform.system(), "python_version": platform.python_version(),
+                         "cpu_count": os.cpu_count(), "opencv": cv2.__version__, "numpy": np.__version__},
+        "commit_info": {"id": _git("rev-parse", "HEAD"), "describe": _git("describe", "--always", "--dirty"),
+                        "dirty": bool(_git("status", "--porcelain"))},
+        "datetime": datetime.now().isoformat(),
+        "version": "1",
+        "scope": SCOPE,
+        "benchmarks": results,
+        "skipped": skipped,
+    }
+
+
+def compare(old, new, threshold=0.10):
+    """[(name, old mean, new mean, change)] for benchmarks present in both; change is relative"""
+    old_means = {bench["name"]: bench["stats"]["mean"] for bench in old["benchmarks"]}
+    rows = []
+    for bench in new["benchmarks"]:
+        if bench["name"] in old_means and old_means[bench["name"]] > 0:
+            before, after = old_means[bench["name"]], bench["stats"]["mean"]
+            rows.append((bench["name"], before, after, after / before - 1))
+    regressions = [row for row in rows if row[3] > threshold]
+    return rows, regressions
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark task detectors over a recorded frame corpus")
+    parser.add_argument("--corpus", default="benchmarks/corpus")
+    parser.add_argument("--features", default=None, help="ok-dna COCO json or folder of <feature>.png")
+    parser.add_argument("--feature-height", type=int, default=1440, help="source height of a feature folder")
+    parser.add_argument("--out", default="benchmarks/results")
+    parser.add_argument("-k", dest="pattern", default=None, help="only benchmarks whose name matches")
+    parser.add_argument("--resolutions", default=",".join(RESOLUTIONS))
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per benchmark and resolution")
+    parser.add_argument("--compare", default=None, help="previous result json to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown counted as regression")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    features = FeatureTemplates(args.features, args.feature_height) if args.features else FeatureTemplates()
+    resolutions = {name: RESOLUTIONS[name] for name in args.resolutions.split(",")}
+    results, skipped = run_suite(corpus, features, load_ocr_engine(), resolutions, args.pattern, args.min_time)
+    data = report(results, skipped)
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    path = out / f"{data['commit_info']['describe'] or 'unknown'}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+    print(f"scope: {SCOPE}")
+    for bench in results:
+        stats = bench["stats"]
+        print(f"{bench['name']:<60} {stats['mean'] * 1000:9.3f} ms  median {stats['median'] * 1000:9.3f}  "
+              f"rounds {stats['rounds']}")
+    for skip in skipped:
+        print(f"{skip['name']:<60} skipped: {skip['reason']}")
+    print(f"wrote {path}")
+
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        rows, regressions = compare(old, data, args.threshold)
+        for name, before, after, change in rows:
+            flag = "  REGRESSION" if change > args.threshold else ""
+            print(f"{name:<60} {before * 1000:9.3f} -> {after * 1000:9.3f} ms ({change:+.1%}){flag}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""Chunked frame recordings for debugging detection failures.
+
+Captured frames, or crops of declared ROIs, are appended to fixed-size chunk files that
+are memory mapped while being written. index.bin holds one fixed-size record per frame
+(time, task phase, chunk, offset, length), so a reader can bisect by time and map a
+single frame without touching the others. When a chunk is full it is closed and, with
+compression on, zlib-compressed as a whole; all of this happens on a writer thread.
+
+    python -m src.tasks.FrameRecorder recordings/<folder> --at 12.5 --out frame.png
+"""
+import json
+import mmap
+import queue
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from src.tasks.InstanceHooks import install_hook, uninstall_hooks
+from src.tasks.Replay import unique_folder
+
+INDEX_DTYPE = np.dtype([("t", "<f8"), ("phase", "<u2"), ("chunk", "<u4"), ("offset", "<u8"), ("length", "<u4")])
+ROI_HEADER = struct.Struct("<IIB")  # height, width, channels (0 for gray), before each ROI's pixels
+FULL_FRAME = "frame"
+
+
+def chunk_path(folder, number, compressed=False):
+    return Path(folder) / f"chunk-{number:05d}.bin{'.z' if compressed else ''}"
+
+
+class ChunkWriter:
+    """Writes frame records into memory mapped chunk files on a background thread.
+
+    add() only queues references; when the queue is full the frame is dropped (and
+    counted) instead of stalling the capture loop.
+    """
+
+    def __init__(self, folder, rois, chunk_bytes=64 * 1024 * 1024, compress=False, queue_size=32):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.rois = list(rois)
+        self.chunk_bytes = chunk_bytes
+        self.compress = compress
+        self.phases = []
+        self._phase_ids = {}
+        self.chunks = []
+        self.frames = 0
+        self.dropped = 0
+        self.bytes = 0
+        self.stored_bytes = 0
+        self._file = None
+        self._mmap = None
+        self._view = None
+        self._used = 0
+        self._index = open(self.folder / "index.bin", "wb")
+        self._queue = queue.Queue(queue_size)
+        self.write_meta()
+        self._thread = threading.Thread(target=self._run, name="frame-writer", daemon=True)
+        self._thread.start()
+
+    def write_meta(self):
+        meta = {"rois": self.rois, "phases": self.phases, "chunk_bytes": self.chunk_bytes,
+                "compress": self.compress, "chunks": self.chunks}
+        (self.folder / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    def add(self, t, phase, crops):
+        try:
+            self._queue.put_nowait((t, phase, crops))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while (item := self._queue.get()) is not None:
+            self._write(*item)
+        self._close_chunk()
+        self.write_meta()
+
+    def _write(self, t, phase, crops):
+        if phase not in self._phase_ids:
+            self._phase_ids[phase] = len(self.phases)
+            self.phases.append(phase)
+            self.write_meta()
+        length = sum(ROI_HEADER.size + crop.nbytes for crop in crops)
+        if self._mmap is None or self._used + length > len(self._mmap):
+            self._close_chunk()
+            self._open_chunk(max(self.chunk_bytes, length))
+        offset = position = self._used
+        for crop in crops:
+            channels = crop.shape[2] if crop.ndim == 3 else 0
+            self._view[position:position + ROI_HEADER.size] = np.frombuffer(
+                ROI_HEADER.pack(crop.shape[0], crop.shape[1], channels), np.uint8)
+            position += ROI_HEADER.size
+            self._view[position:position + crop.nbytes] = crop.reshape(-1)
+            position += crop.nbytes
+        self._used = position
+        record = np.array([(t, self._phase_ids[phase], len(self.chunks) - 1, offset, length)], INDEX_DTYPE)
+        self._index.write(record.tobytes())
+        self._index.flush()
+        self.frames += 1
+        self.bytes += length
+
+    def _open_chunk(self, size):
+        path = chunk_path(self.folder, len(self.chunks))
+        self._file = open(path, "w+b")
+        self._file.truncate(size)
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        self._view = np.frombuffer(self._mmap, np.uint8)
+        self._used = 0
+        self.chunks.append({"size": 0, "compressed": False})
+
+    def _close_chunk(self):
+        if self._mmap is None:
+            return
+        number, used = len(self.chunks) - 1, self._used
+        self._view = None  # release the buffer export before closing the map
+        self._mmap.flush()
+        self._mmap.close()
+        self._mmap = None
+        self._file.truncate(used)
+        self._file.close()
+        self._file = None
+        self.chunks[number]["size"] = used
+        path = chunk_path(self.folder, number)
+        if self.compress:
+            data = zlib.compress(path.read_bytes(), 1)
+            chunk_path(self.folder, number, compressed=True).write_bytes(data)
+            path.unlink()
+            self.chunks[number]["compressed"] = True
+            self.stored_bytes += len(data)
+        else:
+            self.stored_bytes += used
+        self.write_meta()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._index.close()
+
+
+class FrameReader:
+    """Random access to a recording by position or time; uncompressed chunks are mapped, not read"""
+
+    def __init__(self, folder, cached_chunks=2):
+        self.folder = Path(folder)
+        meta = json.loads((self.folder / "meta.json").read_text(encoding="utf-8"))
+        self.rois = meta["rois"]
+        self.phases = meta["phases"]
+        self.index = np.fromfile(self.folder / "index.bin", INDEX_DTYPE)
+        self.times = self.index["t"]
+        self.cached_chunks = cached_chunks
+        self._maps = {}
+        self._decompressed = OrderedDict()
+
+    def __len__(self):
+        return len(self.index)
+
+    def position_at(self, t):
+        """Position of the last frame captured at or before t (the first frame if t is earlier)"""
+        return max(int(np.searchsorted(self.times, t, side="right")) - 1, 0)
+
+    def positions_between(self, start, end):
+        return range(int(np.searchsorted(self.times, start, side="left")),
+                     int(np.searchsorted(self.times, end, side="right")))
+
+    def phase(self, position):
+        return self.phases[self.index["phase"][position]]
+
+    def at(self, t):
+        return self.read(self.position_at(t))
+
+    def read(self, position):
+        """{roi name: image} for the frame at position; views into the chunk where possible"""
+        record = self.index[position]
+        buffer = self._chunk(int(record["chunk"]))
+        position = int(record["offset"])
+        images = {}
+        for name in self.rois:
+            height, width, channels = ROI_HEADER.unpack_from(buffer, position)
+            position += ROI_HEADER.size
+            shape = (height, width, channels) if channels else (height, width)
+            size = int(np.prod(shape))
+            images[name] = np.frombuffer(buffer, np.uint8, size, position).reshape(shape)
+            position += size
+        return images
+
+    def _chunk(self, number):
+        if number in self._maps:
+            return self._maps[number]
+        if number in self._decompressed:
+            self._decompressed.move_to_end(number)
+            return self._decompressed[number]
+        compressed = chunk_path(self.folder, number, compressed=True)
+        if compressed.exists():
+            data = zlib.decompress(compressed.read_bytes())
+            self._decompressed[number] = data
+            while len(self._decompressed) > self.cached_chunks:
+                self._decompressed.popitem(last=False)
+            return data
+        with open(chunk_path(self.folder, number), "rb") as f:
+            self._maps[number] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._maps[number]
+
+    def phase_counts(self):
+        counts = np.bincount(self.index["phase"], minlength=len(self.phases))
+        return {phase: int(count) for phase, count in zip(self.phases, counts)}
+
+    def close(self):
+        # Maps are released once the last image view into them is gone
+        self._maps = {}
+        self._decompressed.clear()
+
+
+class FrameRecorder:
+    """Records every new frame a task captures, with the task's phase, into a chunked recording.
+
+    install() wraps next_frame on the task instance as an InstanceHooks layer (like
+    SessionRecorder). rois is a
+    callable returning {name: box} for the current resolution, or None to keep the whole
+    frame; boxes are resolved again when the frame size changes. The capture thread only
+    slices views and queues them; copying, compression and file writes happen on the
+    writer thread. uninstall() (CommissionsTask.stop_recording at the end of each run)
+    finishes the last chunk, so every run is a complete recording in its own folder.
+    """
+
+    def __init__(self, task, folder=None, phase=None, rois=None, compress=True, chunk_bytes=64 * 1024 * 1024):
+        self.task = task
+        self.folder = Path(folder) if folder else Path.cwd() / "recordings"
+        self.phase = phase
+        self.rois = rois
+        self.compress = compress
+        self.chunk_bytes = chunk_bytes
+        self.writer = None
+        self._last_frame = None
+        self._boxes = None
+        self._boxes_shape = None
+        self._record_time = 0.0
+        self._recorded = 0
+
+    @property
+    def active(self):
+        return self.writer is not None
+
+    def enable(self, enabled=True, rois=None, compress=True):
+        """Start or stop recording; a running recording is restarted if rois or compress changed"""
+        if self.active and (not enabled or rois != self.rois or compress != self.compress):
+            self.uninstall()
+        self.rois = rois
+        self.compress = compress
+        if enabled and not self.active:
+            self.install()
+
+    def install(self):
+        rois = list(self.rois()) if self.rois else [FULL_FRAME]
+        self.writer = ChunkWriter(unique_folder(self.folder, type(self.task).__name__), rois, self.chunk_bytes,
+                                  self.compress)
+        self._last_frame = None
+        self._boxes_shape = None
+        install_hook(self.task, "next_frame", self, self._wrap_next_frame)
+
+    def _wrap_next_frame(self, method):
+        def next_frame(*args, **kwargs):
+            result = method(*args, **kwargs)
+            self.record(self.task.frame)
+            return result
+
+        return next_frame
+
+    def uninstall(self):
+        uninstall_hooks(self.task, self)
+        writer, self.writer = self.writer, None
+        if writer is not None:
+            writer.close()
+            self.task.log_info(f"Frame recording: {writer.frames} frames, {writer.stored_bytes / 1024 / 1024:.1f} MB "
+                               f"in {len(writer.chunks)} chunks, {writer.dropped} dropped ({writer.folder})")
+
+    def record(self, frame):
+        writer = self.writer
+        if writer is None or frame is None or frame is self._last_frame:
+            return
+        start = time.perf_counter()
+        self._last_frame = frame
+        if self.rois is None:
+            crops = [frame]
+        else:
+            if self._boxes_shape != frame.shape:
+                boxes = self.rois()
+                self._boxes = [boxes[name] for name in writer.rois]
+                self._boxes_shape = frame.shape
+            crops = [box.crop_frame(frame) for box in self._boxes]
+        writer.add(time.time(), self.phase() if self.phase else "", crops)
+        self._record_time += time.perf_counter() - start
+        self._recorded += 1
+
+    def stats(self):
+        writer = self.writer
+        return {
+            "frames": writer.frames if writer else 0,
+            "dropped": writer.dropped if writer else 0,
+            "megabytes": writer.stored_bytes / 1024 / 1024 if writer else 0.0,
+            "record_us": self._record_time / self._recorded * 1e6 if self._recorded else 0.0,
+        }
+
+    def __str__(self):
+        stats = self.stats()
+        return (f"{stats['frames']} frames, {stats['dropped']} dropped, {stats['megabytes']:.1f} MB, "
+                f"{stats['record_us']:.0f} us/frame on the capture thread")
+
+
+def main(argv=None):
+    import argparse
+
+    import cv2
+
+    parser = argparse.ArgumentParser(description="Inspect a chunked frame recording")
+    parser.add_argument("folder")
+    parser.add_argument("--at", type=float, default=None, help="seconds from the start of the recording")
+    parser.add_argument("--out", default=None, help="write the frame (or each ROI) at --at as PNG")
+    args = parser.parse_args(argv)
+
+    reader = FrameReader(args.folder)
+    if not len(reader):
+        print("empty recording")
+        return
+    start, end = reader.times[0], reader.times[-1]
+    print(f"{len(reader)} frames over {end - start:.1f} s, rois {', '.join(reader.rois)}")
+    for phase, count in reader.phase_counts().items():
+        print(f"  {phase or '-'}: {count} frames")
+    if args.at is not None:
+        position = reader.position_at(start + args.at)
+        images = reader.read(position)
+        print(f"frame {position} at {reader.times[position] - start:.3f} s, phase {reader.phase(position) or '-'}")
+        if args.out:
+            out = Path(args.out)
+            for name, image in images.items():
+                path = out if len(images) == 1 else out.with_name(f"{out.stem}-{name}{out.suffix}")
+                cv2.imwrite(str(path), image)
+                print(f"wrote {path}")
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Layered method wrappers on a task instance, shared by the profiler and the recorders.
+
+Each owner (HotPathProfiler, SessionRecorder, FrameRecorder, ...) adds its wrapper as a
+layer with install_hook() and removes only its own layers with uninstall_hooks(); the
+instance attribute is rebuilt from the remaining layers, so owners can be enabled and
+disabled in any order without dropping or resurrecting each other's wrappers.
+"""
+
+_HOOKS = "_instance_hooks"
+
+
+def install_hook(obj, name, owner, wrap):
+    """Wrap obj.name with wrap(method) on top of the layers already installed"""
+    hooks = obj.__dict__.setdefault(_HOOKS, {})
+    # The first layer remembers what the instance held before (None: the class method)
+    base, layers = hooks.setdefault(name, (obj.__dict__.get(name), []))
+    layers.append((owner, wrap))
+    _rebuild(obj, name, base, layers)
+
+
+def uninstall_hooks(obj, owner):
+    """Remove every layer owner installed on obj"""
+    hooks = obj.__dict__.get(_HOOKS, {})
+    for name, (base, layers) in list(hooks.items()):
+        remaining = [layer for layer in layers if layer[0] is not owner]
+        if len(remaining) == len(layers):
+            continue
+        layers[:] = remaining
+        _rebuild(obj, name, base, layers)
+        if not layers:
+            del hooks[name]
+
+
+def _rebuild(obj, name, base, layers):
+    if base is None:
+        obj.__dict__.pop(name, None)
+    else:
+        setattr(obj, name, base)
+    for _, wrap in layers:
+        setattr(obj, name, wrap(getattr(obj, name)))
@@ -0,0 +1,66 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class OcrCache:
+    """Bounded LRU cache of OCR results.
+
+    Entries are keyed by a content hash of the (preprocessed) ROI image plus the
+    match pattern and OCR arguments, so re-reading unchanged on-screen text
+    returns the previous result without calling the recognizer.
+    """
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(roi_img, match=None, box=None, **kwargs):
+        digest = hashlib.blake2b(roi_img.tobytes(), digest_size=16)
+        digest.update(repr(roi_img.shape).encode())
+        pattern = getattr(match, "pattern", match)
+        flags = getattr(match, "flags", 0)
+        box_key = (box.x, box.y, box.width, box.height) if box is not None else None
+        return digest.hexdigest(), repr(pattern), flags, box_key, repr(sorted(kwargs.items()))
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, list(self._entries[key])
+            self.misses += 1
+            return False, None
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = list(result) if result else []
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": self.hit_rate,
+        }
+
+    def __str__(self):
+        return f"{self.hit_rate:.0%} ({self.hits}/{self.hits + self.misses})"
@@ -0,0 +1,74 @@
+import time
+from collections import deque
+
+from src.tasks.SampleStats import mean, percentile
+
+
+class PollGovernor:
+    """Adaptive interval for the mission main loops.
+
+    The interval drops to min_interval whenever the screen state or the activity key changes,
+    and while in a fast state (menus / settlement screens, where reacting quickly saves time).
+    Otherwise it backs off by `backoff` per quiet tick up to max_interval.
+    Reports process CPU use and the state change -> reaction latency (an upper bound: the
+    change happened at some point since the previous tick).
+    """
+
+    def __init__(self, min_interval=0.1, max_interval=0.5, backoff=1.25, fast_states=("interface",),
+                 report_interval=5.0):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError(f"Invalid poll interval bounds: {min_interval} - {max_interval}")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.fast_states = frozenset(fast_states)
+        self.report_interval = report_interval
+        self.interval = min_interval
+        self.state = None
+        self.activity = None
+        self.ticks = 0
+        self.reactions = deque(maxlen=200)
+        self._start_time = None
+        self._start_cpu = None
+        self._last_tick = None
+        self._next_report = 0.0
+
+    def tick(self, state, activity=None):
+        """Record the loop's current state and return the interval to sleep before the next poll"""
+        now = time.monotonic()
+        if self._last_tick is None:
+            self._start_time, self._start_cpu = now, time.process_time()
+            self._next_report = now + self.report_interval
+        elif state != self.state:
+            self.reactions.append(now - self._last_tick)
+        if state != self.state or activity != self.activity or state in self.fast_states:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        self.state, self.activity = state, activity
+        self.ticks += 1
+        self._last_tick = now
+        return self.interval
+
+    def report_due(self):
+        if self._last_tick is None or self._last_tick < self._next_report:
+            return False
+        self._next_report = self._last_tick + self.report_interval
+        return True
+
+    def stats(self):
+        elapsed = (self._last_tick - self._start_time) if self._last_tick is not None else 0.0
+        cpu = time.process_time() - self._start_cpu if self._start_cpu is not None else 0.0
+        return {
+            "ticks": self.ticks,
+            "interval": self.interval,
+            "poll_hz": (self.ticks - 1) / elapsed if elapsed > 0 else 0.0,
+            "cpu_percent": cpu / elapsed * 100 if elapsed > 0 else 0.0,
+            "reaction_ms": mean(self.reactions) * 1000,
+            "reaction_p95_ms": percentile(self.reactions, 0.95) * 1000,
+        }
+
+    def __str__(self):
+        stats = self.stats()
+        return (f"{stats['poll_hz']:.1f} Hz, CPU {stats['cpu_percent']:.0f}%, "
+                f"reaction {stats['reaction_ms']:.0f} ms (p95 {stats['reaction_p95_ms']:.0f})")
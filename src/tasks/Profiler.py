@@ -0,0 +1,165 @@
+import functools
+import json
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+from src.tasks.InstanceHooks import install_hook, uninstall_hooks
+from src.tasks.SampleStats import percentile
+
+DEFAULT_HOT_PATHS = ("find_one", "ocr", "match_map", "find_bar_and_fish_by_area", "wait_until", "sleep")
+
+
+class _SiteStats:
+    def __init__(self, max_samples):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": percentile(self.samples, 0.50) * 1000,
+            "p95_ms": percentile(self.samples, 0.95) * 1000,
+            "p99_ms": percentile(self.samples, 0.99) * 1000,
+        }
+
+
+class ProfileAggregator:
+    """Thread safe in-memory aggregate of profiled calls.
+
+    Per call site (method@caller:line): count, cumulative and percentile wall time.
+    Per call stack: exclusive wall time, dumped as folded stacks ("a;b;c <us>") which
+    flamegraph.pl and speedscope read directly.
+    """
+
+    def __init__(self, max_samples=2000):
+        self.max_samples = max_samples
+        self.sites = {}
+        self.stacks = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def record(self, site, seconds, stack, exclusive):
+        with self._lock:
+            stats = self.sites.get(site)
+            if stats is None:
+                stats = self.sites[site] = _SiteStats(self.max_samples)
+            stats.count += 1
+            stats.total += seconds
+            stats.samples.append(seconds)
+            self.stacks[stack] += exclusive
+
+    def clear(self):
+        with self._lock:
+            self.sites.clear()
+            self.stacks.clear()
+
+    def summary(self):
+        with self._lock:
+            sites = {site: stats.summary() for site, stats in self.sites.items()}
+        return dict(sorted(sites.items(), key=lambda item: item[1]["total_s"], reverse=True))
+
+    def folded(self):
+        with self._lock:
+            stacks = list(self.stacks.items())
+        return "\n".join(f"{';'.join(stack)} {int(seconds * 1_000_000)}" for stack, seconds in stacks
+                         if seconds > 0)
+
+    def dump(self, path: Path):
+        """Write <path>.folded and <path>.json"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.with_suffix(".folded").write_text(self.folded(), encoding="utf-8")
+        path.with_suffix(".json").write_text(json.dumps(self.summary(), indent=2), encoding="utf-8")
+
+
+class HotPathProfiler:
+    """Opt-in profiling of a task's hot paths.
+
+    install() wraps the named methods (plus every find_* helper) on the task instance as
+    InstanceHooks layers; uninstall() removes only those layers. Data is aggregated in memory and dumped every
+    dump_interval seconds by maybe_dump() to profiles/<Task>-<start time>.folded/.json.
+    """
+
+    def __init__(self, task, dump_interval=30.0, folder=None):
+        self.task = task
+        self.dump_interval = dump_interval
+        self.folder = Path(folder) if folder else Path.cwd() / "profiles"
+        self.aggregator = ProfileAggregator()
+        self.installed = []
+        self.path = None
+        self._local = threading.local()
+        self._next_dump = 0.0
+
+    @property
+    def active(self):
+        return bool(self.installed)
+
+    def hot_paths(self):
+        finders = sorted(name for name in dir(type(self.task)) if name.startswith("find_"))
+        return [name for name in dict.fromkeys(DEFAULT_HOT_PATHS + tuple(finders))
+                if callable(getattr(type(self.task), name, None))]
+
+    def enable(self, enabled=True):
+        if enabled and not self.active:
+            self.install()
+        elif not enabled and self.active:
+            self.dump()
+            self.uninstall()
+
+    def install(self, names=None):
+        for name in names or self.hot_paths():
+            if name not in self.installed:
+                install_hook(self.task, name, self, lambda method, name=name: self._wrap(name, method))
+                self.installed.append(name)
+        self.aggregator.clear()
+        self.path = self.folder / f"{type(self.task).__name__}-{time.strftime('%Y%m%d-%H%M%S')}"
+        self._next_dump = time.monotonic() + self.dump_interval
+
+    def uninstall(self):
+        uninstall_hooks(self.task, self)
+        self.installed = []
+
+    def _wrap(self, name, method):
+        local = self._local
+        record = self.aggregator.record
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            stack = getattr(local, "stack", None)
+            if stack is None:
+                stack = local.stack = []
+            caller = sys._getframe(1)
+            if stack:
+                path = stack[-1][0] + (name,)
+            else:
+                path = (caller.f_code.co_name, name)
+            frame = [path, 0.0]
+            stack.append(frame)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                stack.pop()
+                if stack:
+                    stack[-1][1] += elapsed
+                record(f"{name}@{caller.f_code.co_name}:{caller.f_lineno}", elapsed, path, elapsed - frame[1])
+
+        return wrapper
+
+    def maybe_dump(self):
+        if self.active and time.monotonic() >= self._next_dump:
+            self.dump()
+
+    def dump(self):
+        if self.path is None:
+            return
+        self._next_dump = time.monotonic() + self.dump_interval
+        try:
+            self.aggregator.dump(self.path)
+        except OSError as e:
+            self.task.log_error(f"Failed to write profile {self.path}: {e}")
@@ -0,0 +1,695 @@
+"""Deterministic record and replay of task sessions.
+
+Recording (live, "Record Session" option): SessionRecorder writes every frame the task
+sees (PNG, with capture time and task thread CPU spent on the previous frame), every
+input it emits and the results of the ok primitives (find_one, ocr, ...) and of the
+task's own decision methods (find_*, match_*, in_team) to sessions/<Task>-<time>/.
+
+Replay (headless, no win32): the task class runs with ReplayHost in front of it, which
+serves frames, time, input and the ok primitives from the recording, while the repo's
+own logic (decisions, state machine, schedulers, detectors) really runs. Its calls are
+logged in the same format, so two runs compare call by call:
+
+    python -m src.tasks.Replay run sessions/AutoDefence-20260101-120000 \\
+        --task src.tasks.AutoDefence:AutoDefence --out replays/after
+    python -m src.tasks.Replay compare sessions/AutoDefence-20260101-120000 replays/after
+"""
+import importlib
+import json
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from enum import Enum
+from pathlib import Path
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from src.tasks.InstanceHooks import install_hook, uninstall_hooks
+from src.tasks.SampleStats import mean, percentile
+
+INPUT_METHODS = ("click", "click_box", "click_relative", "send_key", "send_key_down", "send_key_up", "mouse_down",
+                 "mouse_up", "scroll", "move_mouse_relative", "move_mouse_to_safe_position",
+                 "move_back_from_safe_position", "try_bring_to_front", "soundBeep")
+PRIMITIVE_METHODS = ("find_one", "find_feature", "ocr", "calculate_color_percentage")
+
+
+def summarize(value):
+    """JSON friendly summary of an argument or result; boxes keep their geometry"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return {"array": list(value.shape)}
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, re.Pattern):
+        return {"pattern": value.pattern}
+    if isinstance(value, dict):
+        return {str(key): summarize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [summarize(item) for item in value]
+    if all(hasattr(value, attr) for attr in ("x", "y", "width", "height")):
+        return {"box": [int(value.x), int(value.y), int(value.width), int(value.height)],
+                "name": getattr(value, "name", None), "confidence": float(getattr(value, "confidence", 0) or 0)}
+    if callable(value):
+        return {"callable": getattr(value, "__name__", type(value).__name__)}
+    return {"type": type(value).__name__}
+
+
+def call_key(method, args, kwargs):
+    return json.dumps([method, summarize(list(args)), summarize(kwargs)], sort_keys=True)
+
+
+class ReplayBox:
+    """Box restored from a recording, with the parts of ok's Box the tasks use"""
+
+    def __init__(self, x, y, width, height, name=None, confidence=1.0):
+        self.x, self.y, self.width, self.height = x, y, width, height
+        self.name = name
+        self.confidence = confidence
+
+    def crop_frame(self, frame):
+        return frame[self.y:self.y + self.height, self.x:self.x + self.width]
+
+    def center(self):
+        return self.x + self.width / 2, self.y + self.height / 2
+
+    def area(self):
+        return self.width * self.height
+
+    def __repr__(self):
+        return f"ReplayBox({self.name}, {self.x}, {self.y}, {self.width}, {self.height}, {self.confidence:.2f})"
+
+
+def restore(value):
+    """Inverse of summarize for recorded results"""
+    if isinstance(value, list):
+        return [restore(item) for item in value]
+    if isinstance(value, dict):
+        if "box" in value:
+            return ReplayBox(*value["box"], name=value.get("name"), confidence=value.get("confidence", 1.0))
+        return {key: restore(item) for key, item in value.items()}
+    return value
+
+
+class SessionWriter:
+    """Session folder writer; frames are PNG encoded on a background thread.
+
+    When the queue is full the frame is dropped instead of stalling the task; dropped frame
+    indices are listed in meta.json on close, so comparisons can leave their calls out.
+    """
+
+    def __init__(self, folder: Path, queue_size=16, compression=1):
+        folder.mkdir(parents=True, exist_ok=True)
+        self.folder = folder
+        self.compression = compression
+        self.frames = 0
+        self.dropped = 0
+        self.dropped_frames = []
+        self.bytes = 0
+        self.meta = {}
+        self._frames_file = open(folder / "frames.bin", "wb")
+        self._index_file = open(folder / "frames.jsonl", "w", encoding="utf-8", buffering=1)
+        self._calls_file = open(folder / "calls.jsonl", "w", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(queue_size)
+        self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._thread.start()
+
+    def write_meta(self, meta):
+        self.meta = meta
+        (self.folder / "meta.json").write_text(json.dumps(meta, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    def add_frame(self, index, t, cpu_ms, frame):
+        try:
+            self._queue.put_nowait((index, t, cpu_ms, frame))
+        except queue.Full:
+            self._drop(index)
+
+    def _drop(self, index):
+        with self._lock:
+            self.dropped += 1
+            self.dropped_frames.append(index)
+
+    def add_call(self, record):
+        with self._lock:
+            self._calls_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _run(self):
+        while (item := self._queue.get()) is not None:
+            index, t, cpu_ms, frame = item
+            ok, data = cv2.imencode(".png", frame, [cv2.IMWRITE_PNG_COMPRESSION, self.compression])
+            if not ok:
+                self._drop(index)
+                continue
+            offset = self._frames_file.tell()
+            self._frames_file.write(data.tobytes())
+            self._frames_file.flush()
+            self._index_file.write(json.dumps({"index": index, "t": t, "cpu_ms": cpu_ms, "offset": offset,
+                                               "size": len(data)}) + "\n")
+            self.frames += 1
+            self.bytes += len(data)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        for f in (self._frames_file, self._index_file, self._calls_file):
+            f.close()
+        self.write_meta({**self.meta, "dropped_frames": sorted(self.dropped_frames)})
+
+
+class MemoryLog:
+    """Same interface as SessionWriter, kept in memory (replays)"""
+
+    def __init__(self):
+        self.frames = []
+        self.calls = []
+        self.dropped = 0
+        self.dropped_frames = []
+
+    def write_meta(self, meta):
+        self.meta = meta
+
+    def add_frame(self, index, t, cpu_ms, frame):
+        self.frames.append({"index": index, "t": t, "cpu_ms": cpu_ms})
+
+    def add_call(self, record):
+        self.calls.append(record)
+
+    def save(self, folder: Path):
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / "meta.json").write_text(json.dumps(getattr(self, "meta", {}), indent=2), encoding="utf-8")
+        with open(folder / "frames.jsonl", "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(frame) + "\n" for frame in self.frames)
+        with open(folder / "calls.jsonl", "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(call, ensure_ascii=False) + "\n" for call in self.calls)
+
+    def close(self):
+        pass
+
+
+class SessionRecorder:
+    """Records a task's frames, input, primitive and decision calls.
+
+    install() wraps next_frame and the recorded methods on the task instance as
+    InstanceHooks layers (like HotPathProfiler); uninstall() removes only those layers and
+    closes the session, so each task run records to its own folder.
+    """
+
+    def __init__(self, task, folder=None, frame_id=None, overhead=None):
+        self.task = task
+        self.folder = Path(folder) if folder else Path.cwd() / "sessions"
+        self.frame_id = frame_id
+        # Cumulative CPU seconds spent by a harness (frame decoding) that frame costs should not include
+        self.overhead = overhead
+        self.log = None
+        self.installed = []
+        self.frame_index = -1
+        self._last_frame = None
+        self._cpu = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.log is not None
+
+    def enable(self, enabled=True):
+        if enabled and not self.active:
+            self.install()
+        elif not enabled and self.active:
+            self.uninstall()
+
+    def decision_methods(self):
+        cls = type(self.task)
+        names = [name for name in dir(cls) if name.startswith(("find_", "match_")) or name == "in_team"]
+        return [name for name in names if name not in PRIMITIVE_METHODS and callable(getattr(cls, name, None))]
+
+    def install(self, log=None):
+        if log is None:
+            log = SessionWriter(unique_folder(self.folder, type(self.task).__name__))
+        config = getattr(self.task, "config", None) or {}
+        log.write_meta({"task": f"{type(self.task).__module__}:{type(self.task).__name__}",
+                        "start": time.time(), "config": summarize(dict(config))})
+        self.log = log
+        self.frame_index = -1
+        self._last_frame = None
+        self._cpu = self._cpu_time()
+        self._install("next_frame", self._wrap_next_frame)
+        kinds = [("input", INPUT_METHODS), ("primitive", PRIMITIVE_METHODS), ("decision", self.decision_methods())]
+        for kind, names in kinds:
+            for name in names:
+                if callable(getattr(self.task, name, None)) and name not in self.installed:
+                    self._install(name, lambda method, name=name, kind=kind: self._wrap(kind, name, method))
+
+    def _install(self, name, wrap):
+        install_hook(self.task, name, self, wrap)
+        self.installed.append(name)
+
+    def uninstall(self):
+        uninstall_hooks(self.task, self)
+        self.installed = []
+        log, self.log = self.log, None
+        if log is not None:
+            log.close()
+            if log.dropped:
+                self.task.log_info(f"Session recording dropped {log.dropped} frames, their calls are left out "
+                                   f"of comparisons")
+
+    def _observe_frame(self):
+        frame = self.task.frame
+        if frame is None or frame is self._last_frame:
+            return
+        with self._lock:
+            self._last_frame = frame
+            self.frame_index = self.frame_id() if self.frame_id else self.frame_index + 1
+            now = self._cpu_time()
+            cpu_ms, self._cpu = (now - self._cpu) * 1000, now
+            self.log.add_frame(self.frame_index, time.time(), cpu_ms, frame)
+
+    def _cpu_time(self):
+        return time.thread_time() - (self.overhead() if self.overhead else 0.0)
+
+    def _wrap_next_frame(self, method):
+        def next_frame(*args, **kwargs):
+            result = method(*args, **kwargs)
+            self._observe_frame()
+            return result
+
+        return next_frame
+
+    def _wrap(self, kind, name, method):
+        def wrapper(*args, **kwargs):
+            if kind == "input":
+                self._record(kind, name, args, kwargs, None)
+                return method(*args, **kwargs)
+            self._observe_frame()
+            result = method(*args, **kwargs)
+            self._record(kind, name, args, kwargs, result)
+            return result
+
+        return wrapper
+
+    def _record(self, kind, name, args, kwargs, result):
+        log = self.log
+        if log is not None:
+            log.add_call({"frame": self.frame_index, "t": time.time(), "kind": kind, "method": name,
+                          "key": call_key(name, args, kwargs), "result": summarize(result)})
+
+
+def unique_folder(parent: Path, name):
+    """parent/<name>-<time>, suffixed when a run in the same second already used it"""
+    base = parent / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}"
+    path, number = base, 1
+    while path.exists():
+        number += 1
+        path = base.with_name(f"{base.name}-{number}")
+    return path
+
+
+class SessionReader:
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.meta = json.loads((self.folder / "meta.json").read_text(encoding="utf-8"))
+        self.frames = _read_jsonl(self.folder / "frames.jsonl")
+        self.frames.sort(key=lambda frame: frame["index"])
+        self.calls = _read_jsonl(self.folder / "calls.jsonl")
+        self._data = None
+
+    def image(self, position):
+        """Decoded frame at position in self.frames"""
+        if self._data is None:
+            self._data = (self.folder / "frames.bin").read_bytes()
+        frame = self.frames[position]
+        data = np.frombuffer(self._data, np.uint8, frame["size"], frame["offset"])
+        return cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+
+    def primitives(self):
+        """call key -> [(frame index, result)] for the recorded primitive calls"""
+        answers = {}
+        for call in self.calls:
+            if call["kind"] == "primitive":
+                answers.setdefault(call["key"], []).append((call["frame"], call["result"]))
+        return answers
+
+
+def _read_jsonl(path):
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayFinished(Exception):
+    """Raised from next_frame once the recorded frames are used up."""
+
+
+class ReplayClock:
+    """Virtual time: follows the recorded capture times, sleeps only move it forward"""
+
+    def __init__(self, start):
+        self.now = start
+        self.origin = start
+
+    def advance(self, seconds):
+        self.now += max(0.0, seconds)
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now - self.origin + 1000.0
+
+
+@contextmanager
+def virtual_time(clock: ReplayClock):
+    """Route time.time / monotonic / perf_counter / sleep through clock (thread_time and process_time stay real)"""
+    saved = time.time, time.monotonic, time.perf_counter, time.sleep
+    time.time, time.monotonic, time.perf_counter, time.sleep = clock.time, clock.monotonic, clock.monotonic, \
+        clock.advance
+    try:
+        yield clock
+    finally:
+        time.time, time.monotonic, time.perf_counter, time.sleep = saved
+
+
+class InlineExecutor:
+    """thread_pool_executor stand-in: runs jobs at submit time, so replays stay deterministic"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class ReplayHost:
+    """Framework side of a task during replay; placed in front of the task class in the MRO.
+
+    Frames come from the session (next_frame skips to the first frame captured at or after
+    the virtual clock), sleep and waits advance the clock, input is swallowed, and the ok
+    primitives are answered with the recorded result for the same call on the same frame
+    (or the nearest frame within `slack`). Calls the recording cannot answer return None
+    and are counted in `unanswered`.
+    """
+
+    def replay_setup(self, session: SessionReader, clock: ReplayClock, config, slack=3):
+        self.session = session
+        self.clock = clock
+        self.slack = slack
+        self.replay_position = -1
+        self.replay_index = -1
+        self.unanswered = 0
+        self.decode_cpu = 0.0
+        self._replay_frame = None
+        self._answers = session.primitives()
+        self.config = config
+        self.info = {}
+        self.thread_pool_executor = InlineExecutor()
+        if hasattr(self, "scheduler"):
+            # Tickers were registered on the real clock during __init__
+            self.scheduler.clock = time.monotonic
+            for ticker in self.scheduler.tickers.values():
+                ticker.reset()
+
+    @property
+    def frame(self):
+        if self._replay_frame is None:
+            self.next_frame()
+        return self._replay_frame
+
+    @property
+    def width(self):
+        return self.frame.shape[1]
+
+    @property
+    def height(self):
+        return self.frame.shape[0]
+
+    def next_frame(self):
+        frames = self.session.frames
+        position = self.replay_position + 1
+        while position < len(frames) - 1 and frames[position]["t"] < self.clock.now:
+            position += 1
+        if position >= len(frames):
+            raise ReplayFinished()
+        self.replay_position = position
+        self.replay_index = frames[position]["index"]
+        self.clock.now = max(self.clock.now, frames[position]["t"])
+        cpu_start = time.thread_time()
+        self._replay_frame = self.session.image(position)
+        self.decode_cpu += time.thread_time() - cpu_start
+        return self._replay_frame
+
+    def sleep(self, timeout):
+        self.clock.advance(timeout)
+
+    def wait_until(self, condition, time_out=0, pre_action=None, post_action=None, raise_if_not_found=False,
+                   **kwargs):
+        start = self.clock.now
+        while True:
+            if pre_action is not None:
+                pre_action()
+            self.next_frame()
+            result = condition()
+            if result:
+                return result
+            if post_action is not None:
+                post_action()
+            if time_out and self.clock.now - start >= time_out:
+                if raise_if_not_found:
+                    raise Exception(f"wait_until timed out after {time_out}s")
+                return None
+
+    def answer(self, method, args, kwargs):
+        recorded = self._answers.get(call_key(method, args, kwargs))
+        if recorded:
+            frame, result = min(recorded, key=lambda item: abs(item[0] - self.replay_index))
+            if abs(frame - self.replay_index) <= self.slack:
+                return restore(result)
+        self.unanswered += 1
+        return None
+
+    def find_one(self, *args, **kwargs):
+        return self.answer("find_one", args, kwargs)
+
+    def find_feature(self, *args, **kwargs):
+        return self.answer("find_feature", args, kwargs)
+
+    def ocr(self, *args, **kwargs):
+        return self.answer("ocr", args, kwargs)
+
+    def calculate_color_percentage(self, *args, **kwargs):
+        return self.answer("calculate_color_percentage", args, kwargs)
+
+    def box_of_screen(self, x, y, to_x=1.0, to_y=1.0, hcenter=False, name=None, **kwargs):
+        return ReplayBox(int(x * self.width), int(y * self.height), int((to_x - x) * self.width),
+                         int((to_y - y) * self.height), name=name)
+
+    def box_of_screen_scaled(self, original_width, original_height, x1, y1, x2, y2, name=None, hcenter=False,
+                             **kwargs):
+        scale_x, scale_y = self.width / original_width, self.height / original_height
+        offset = 0
+        if hcenter and scale_x != scale_y:
+            # Wider or narrower than the reference: scale by height and center horizontally
+            scale_x = scale_y
+            offset = (self.width - original_width * scale_y) / 2
+        return ReplayBox(int(x1 * scale_x + offset), int(y1 * scale_y), int((x2 - x1) * scale_x),
+                         int((y2 - y1) * scale_y), name=name)
+
+    def width_of_screen(self, ratio):
+        return int(ratio * self.width)
+
+    def height_of_screen(self, ratio):
+        return int(ratio * self.height)
+
+    def is_mouse_in_window(self):
+        return True
+
+    def info_set(self, key, value):
+        self.info[key] = value
+
+    def info_get(self, key, default=None):
+        return self.info.get(key, default)
+
+    def log_info(self, message, *args, **kwargs):
+        pass
+
+    def log_debug(self, message, *args, **kwargs):
+        pass
+
+    def log_error(self, message, *args, **kwargs):
+        pass
+
+    def log_info_notify(self, message, *args, **kwargs):
+        pass
+
+
+def _input_stand_in(name):
+    def stand_in(self, *args, **kwargs):
+        return True
+
+    stand_in.__name__ = name
+    return stand_in
+
+
+for _name in INPUT_METHODS:
+    setattr(ReplayHost, _name, _input_stand_in(_name))
+
+
+class ReplayExecutor:
+    """Stand-in for the executor's capture and interaction, backed by the replay host"""
+
+    def __init__(self):
+        self.host = None
+        capture = SimpleNamespace(get_frame=lambda: self.host.next_frame(),
+                                  do_get_frame=lambda: self.host.next_frame())
+        self.interaction = SimpleNamespace(capture=capture)
+        self.device_manager = SimpleNamespace(hwnd_window=None)
+
+
+def replay_task(task_cls, session: SessionReader, clock: ReplayClock, overrides=None):
+    """Instantiate task_cls behind ReplayHost, configured like the recorded run"""
+    cls = type(f"Replay{task_cls.__name__}", (ReplayHost, task_cls), {})
+    executor = ReplayExecutor()
+    task = cls(executor=executor)
+    executor.host = task
+    config = dict(getattr(task, "default_config", {}))
+    config.update(session.meta.get("config", {}))
+    config.update({"Jitter Mode": "Disabled", "Record Session": False, "Profile Hot Paths": False})
+    config.update(overrides or {})
+    task.replay_setup(session, clock, config)
+    return task
+
+
+def run_replay(task_path, session_folder, out=None, overrides=None, entry="run"):
+    """Replay a recorded session through the task at task_path ("module:Class"); returns the call log"""
+    module, name = task_path.split(":")
+    task_cls = getattr(importlib.import_module(module), name)
+    session = SessionReader(session_folder)
+    clock = ReplayClock(session.frames[0]["t"] if session.frames else session.meta.get("start", 0.0))
+    log = MemoryLog()
+    with virtual_time(clock):
+        task = replay_task(task_cls, session, clock, overrides)
+        recorder = SessionRecorder(task, frame_id=lambda: task.replay_index, overhead=lambda: task.decode_cpu)
+        recorder.install(log)
+        error = None
+        try:
+            getattr(task, entry)()
+        except ReplayFinished:
+            pass
+        except Exception as e:
+            error = e
+        finally:
+            recorder.uninstall()
+    log.meta.update({"replay_of": str(session_folder), "unanswered": task.unanswered,
+                     "error": repr(error) if error else None})
+    if out:
+        log.save(Path(out))
+    return log
+
+
+def load_log(folder):
+    """(frames, calls, dropped frame indices) of a session or replay folder"""
+    folder = Path(folder)
+    meta_path = folder / "meta.json"
+    meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+    return _read_jsonl(folder / "frames.jsonl"), _read_jsonl(folder / "calls.jsonl"), meta.get("dropped_frames", [])
+
+
+def compare_logs(a, b, kinds=("decision", "input"), limit=20):
+    """Compare two load_log() logs frame by frame: decision / input mismatches and CPU per frame.
+
+    Frames either recording dropped are left out, and their calls are counted in
+    calls_excluded instead of being compared against nothing.
+    """
+
+    def by_frame(calls):
+        grouped = {}
+        for call in calls:
+            if call["kind"] in kinds:
+                grouped.setdefault(call["frame"], []).append((call["kind"], call["method"], call["key"],
+                                                               json.dumps(call["result"], sort_keys=True)))
+        return grouped
+
+    def cpu(frames, indices):
+        values = [frame["cpu_ms"] for frame in frames if frame["index"] in indices]
+        return {"mean_ms": mean(values), "p95_ms": percentile(values, 0.95)}
+
+    (frames_a, calls_a, dropped_a), (frames_b, calls_b, dropped_b) = a, b
+    calls_a, calls_b = by_frame(calls_a), by_frame(calls_b)
+    dropped = set(dropped_a) | set(dropped_b)
+    common = ({frame["index"] for frame in frames_a} & {frame["index"] for frame in frames_b}) - dropped
+    differences = []
+    for index in sorted(common):
+        if calls_a.get(index, []) != calls_b.get(index, []):
+            differences.append({"frame": index, "a": calls_a.get(index, []), "b": calls_b.get(index, [])})
+    return {
+        "frames_a": len(frames_a),
+        "frames_b": len(frames_b),
+        "common_frames": len(common),
+        "dropped_frames": len(dropped),
+        "calls_compared": sum(len(calls_a.get(index, [])) for index in common),
+        "calls_excluded": sum(len(calls.get(index, [])) for calls in (calls_a, calls_b) for index in dropped),
+        "mismatched_frames": len(differences),
+        "first_mismatches": differences[:limit],
+        "cpu_a": cpu(frames_a, common),
+        "cpu_b": cpu(frames_b, common),
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay recorded task sessions and compare decisions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="replay a session through a task class")
+    run.add_argument("session")
+    run.add_argument("--task", help="module:Class, defaults to the recorded task")
+    run.add_argument("--out", required=True)
+    run.add_argument("--entry", default="run")
+    run.add_argument("--config", nargs="*", default=[], metavar="KEY=VALUE", help="config overrides (JSON values)")
+    compare = commands.add_parser("compare", help="compare two sessions or replays")
+    compare.add_argument("a")
+    compare.add_argument("b")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        overrides = {}
+        for item in args.config:
+            key, _, value = item.partition("=")
+            try:
+                overrides[key] = json.loads(value)
+            except ValueError:
+                overrides[key] = value
+        task_path = args.task or SessionReader(args.session).meta["task"]
+        cpu_start = time.process_time()
+        log = run_replay(task_path, args.session, args.out, overrides, args.entry)
+        cpu = time.process_time() - cpu_start
+        print(f"{len(log.frames)} frames, {len(log.calls)} calls, {log.meta['unanswered']} unanswered primitives, "
+              f"{cpu / max(len(log.frames), 1) * 1000:.2f} ms CPU/frame")
+        if log.meta["error"]:
+            print(f"stopped by {log.meta['error']}")
+        args.a, args.b = args.session, args.out
+
+    result = compare_logs(load_log(args.a), load_log(args.b))
+    print(f"{result['common_frames']} common frames, {result['calls_compared']} calls, "
+          f"{result['mismatched_frames']} frames differ")
+    if result["dropped_frames"]:
+        print(f"{result['dropped_frames']} frames dropped while recording, {result['calls_excluded']} calls on them "
+              f"not compared")
+    print(f"CPU/frame a: {result['cpu_a']['mean_ms']:.2f} ms (p95 {result['cpu_a']['p95_ms']:.2f}), "
+          f"b: {result['cpu_b']['mean_ms']:.2f} ms (p95 {result['cpu_b']['p95_ms']:.2f})")
+    for diff in result["first_mismatches"]:
+        print(f"frame {diff['frame']}:\n  a: {diff['a']}\n  b: {diff['b']}")
+
+
+if __name__ == "__main__":
+    main()
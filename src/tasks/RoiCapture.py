@@ -0,0 +1,165 @@
+import hashlib
+import time
+
+import cv2
+import numpy as np
+
+
+def _copy_region(region, buffer):
+    """Copy a capture region into a BGR buffer, converting BGRA on the way; return the buffer."""
+    if buffer is None or buffer.shape[:2] != region.shape[:2]:
+        buffer = np.empty((*region.shape[:2], 3), dtype=np.uint8)
+    if region.ndim == 3 and region.shape[2] == 4:
+        cv2.cvtColor(region, cv2.COLOR_BGRA2BGR, dst=buffer)
+    else:
+        buffer[:] = region
+    return buffer
+
+
+class RoiCapture:
+    """Partial-window capture for tight ROI loops.
+
+    While a task has ROIs declared, next() takes frames from the capture method's
+    get_frame() (the framework's capture path, with its post-processing) and copies /
+    converts only those regions into preallocated buffers, skipping the task's full
+    next_frame() handling. It waits for a capture whose ROIs changed, so the same frame is
+    not detected twice. A full next_frame() is still taken every sync_interval seconds so
+    pause / stop and frame based checks keep working.
+    """
+
+    def __init__(self, task, sync_interval=0.25, new_frame_timeout=0.05):
+        self.task = task
+        self.sync_interval = sync_interval
+        # A static ROI never changes; after this long the unchanged capture is used (and counted)
+        self.new_frame_timeout = new_frame_timeout
+        self.boxes = {}
+        self.buffers = {}
+        self.frames = 0
+        self.full_frames = 0
+        self.repeats = 0
+        self.bytes_copied = 0
+        self.start_time = None
+        self.last_sync = 0.0
+        self.capture_time = 0.0  # monotonic time the current frame was taken from the capture
+        self._signature = None
+
+    @property
+    def active(self):
+        return bool(self.boxes)
+
+    def declare(self, *boxes):
+        """Switch to ROI mode for the given boxes (keyed by box.name)."""
+        self.boxes = {box.name: box for box in boxes}
+        self.buffers = {name: None for name in self.boxes}
+        self.frames = self.full_frames = self.repeats = self.bytes_copied = 0
+        self._signature = None
+        self.start_time = time.perf_counter()
+        if self.task.frame is not None:
+            self.copy_rois(self.task.frame)
+        self.last_sync = time.monotonic()
+
+    def clear(self):
+        self.boxes = {}
+        self.buffers = {}
+
+    def grab(self):
+        """Latest frame from the capture method, through its get_frame() post-processing."""
+        return self.task.executor.interaction.capture.get_frame()
+
+    def signature(self, frame):
+        digest = hashlib.blake2b(digest_size=16)
+        for box in self.boxes.values():
+            digest.update(np.ascontiguousarray(frame[box.y:box.y + box.height, box.x:box.x + box.width]).data)
+        return digest.digest()
+
+    def grab_new(self):
+        """Next capture whose ROIs differ from the last copied ones; None if the capture had no frame"""
+        deadline = time.monotonic() + self.new_frame_timeout
+        while True:
+            grab_time = time.monotonic()
+            frame = self.grab()
+            if frame is not None:
+                signature = self.signature(frame)
+                if signature != self._signature:
+                    self._signature = signature
+                    self.capture_time = grab_time
+                    return frame
+            if time.monotonic() >= deadline:
+                if frame is not None:
+                    self.repeats += 1
+                    self.capture_time = grab_time
+                return frame
+            time.sleep(0.002)
+
+    def copy_rois(self, frame):
+        for name, box in self.boxes.items():
+            region = frame[box.y:box.y + box.height, box.x:box.x + box.width]
+            buffer = self.buffers[name] = _copy_region(region, self.buffers[name])
+            self.bytes_copied += buffer.nbytes
+        self.frames += 1
+
+    def next(self):
+        """Advance to the next new frame; only the declared ROIs are refreshed between syncs."""
+        now = time.monotonic()
+        frame = None
+        if now - self.last_sync < self.sync_interval:
+            frame = self.grab_new()
+        if frame is None:
+            self.capture_time = time.monotonic()
+            self.task.next_frame()
+            frame = self.task.frame
+            self._signature = self.signature(frame)
+            self.full_frames += 1
+            self.last_sync = now
+        self.copy_rois(frame)
+
+    def roi(self, name):
+        return self.buffers[name]
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.start_time if self.start_time else 0.0
+        return {
+            "frames": self.frames,
+            "full_frames": self.full_frames,
+            "repeats": self.repeats,
+            "fps": (self.frames - self.repeats) / elapsed if elapsed > 0 else 0.0,
+            "bytes_per_frame": self.bytes_copied / self.frames if self.frames else 0.0,
+        }
+
+
+def benchmark_capture(grab, boxes, seconds=3.0):
+    """Compare full-frame handling against ROI-only copies for a grab() callable.
+
+    Full-frame mode converts / copies the whole capture each frame (as the framework does);
+    ROI mode converts only the given boxes.
+    Return: {"Full": {"fps", "bytes_per_frame"}, "ROI": {...}}
+    """
+    report = {}
+    for mode in ("Full", "ROI"):
+        frames = copied = 0
+        buffers = {}
+        end = time.perf_counter() + seconds
+        start = time.perf_counter()
+        while time.perf_counter() < end:
+            frame = grab()
+            if mode == "Full":
+                regions = [frame]
+            else:
+                regions = [frame[box.y:box.y + box.height, box.x:box.x + box.width] for box in boxes]
+            for i, region in enumerate(regions):
+                buffer = buffers[i] = _copy_region(region, buffers.get(i))
+                copied += buffer.nbytes
+            frames += 1
+        elapsed = time.perf_counter() - start
+        report[mode] = {"fps": frames / elapsed, "bytes_per_frame": copied / max(frames, 1)}
+    return report
+
+
+if __name__ == "__main__":
+    import json
+    from types import SimpleNamespace
+
+    # Synthetic 1080p BGRA capture and the fish_roi strip
+    screen = np.random.default_rng(0).integers(0, 256, (1080, 1920, 4), dtype=np.uint8)
+    fish_roi = SimpleNamespace(x=1620, y=325, width=25, height=400, name="fish_roi")
+    print(json.dumps(benchmark_capture(lambda: screen, [fish_roi]), indent=2))
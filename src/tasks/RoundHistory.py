@@ -0,0 +1,200 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from src.tasks.SampleStats import percentile
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,          -- 'round' or 'wave': what the task's Timeout applies to
+    task TEXT NOT NULL,
+    dungeon TEXT NOT NULL,
+    mod TEXT NOT NULL,
+    start REAL NOT NULL,
+    seconds REAL NOT NULL,
+    outcome TEXT NOT NULL,       -- 'cleared', 'timeout', 'stall' or 'abandoned' (given up or retried)
+    timeout REAL NOT NULL,       -- timeout in effect for this run
+    static_timeout REAL NOT NULL, -- the Timeout setting at the time
+    skill_mode TEXT NOT NULL DEFAULT '',
+    casts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_key ON runs (kind, task, dungeon, mod, id);
+"""
+
+# Columns added after the first schema, for databases created before them
+MIGRATIONS = {
+    "skill_mode": "ALTER TABLE runs ADD COLUMN skill_mode TEXT NOT NULL DEFAULT ''",
+    "casts": "ALTER TABLE runs ADD COLUMN casts INTEGER NOT NULL DEFAULT 0",
+}
+
+
+class RoundHistory:
+    """SQLite store of round and wave durations per (task, dungeon type, mod folder).
+
+    timeout() turns the history into an adaptive timeout: a percentile of the recent runs
+    times a factor, clamped to [floor, ceiling]; with fewer than min_samples runs the
+    static timeout is used. Timed out runs count as censored samples at the timeout that
+    cut them (they would have taken at least that long), so cutting runs raises the
+    percentile instead of trimming the tail and letting the timeout shrink further.
+    """
+
+    def __init__(self, path=None, window=200, min_samples=20, quantile=0.99, factor=1.2):
+        self.path = Path(path) if path else Path.cwd() / "stats" / "rounds.sqlite"
+        self.window = window
+        self.min_samples = min_samples
+        self.quantile = quantile
+        self.factor = factor
+        self._lock = threading.Lock()
+        self._db = None
+        self._percentiles = {}
+
+    def _connect(self):
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Shared by every task instance in the process; access is serialized by _lock
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript(SCHEMA)
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(runs)")}
+            for column, statement in MIGRATIONS.items():
+                if column not in columns:
+                    self._db.execute(statement)
+            self._db.commit()
+        return self._db
+
+    def record(self, kind, key, seconds, outcome, timeout, static_timeout, start=None, skill_mode="", casts=0):
+        task, dungeon, mod = key
+        with self._lock:
+            db = self._connect()
+            db.execute("INSERT INTO runs (kind, task, dungeon, mod, start, seconds, outcome, timeout, static_timeout, "
+                       "skill_mode, casts) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       (kind, task, dungeon, mod, start or time.time() - seconds, seconds, outcome, timeout,
+                        static_timeout, skill_mode, casts))
+            db.commit()
+            self._percentiles.pop((kind, key), None)
+
+    def durations(self, kind, key):
+        """Durations of the most recent `window` cleared or timed out runs, oldest first.
+
+        A timed out run counts at its timeout (censored: the run needed at least that long).
+        """
+        task, dungeon, mod = key
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT seconds, outcome, timeout FROM runs WHERE kind = ? AND task = ? AND dungeon = ? AND mod = ? "
+                "AND outcome IN ('cleared', 'timeout') ORDER BY id DESC LIMIT ?",
+                (kind, task, dungeon, mod, self.window)).fetchall()
+        return [seconds if outcome == "cleared" else max(seconds, timeout)
+                for seconds, outcome, timeout in reversed(rows)]
+
+    def percentile(self, kind, key):
+        """(quantile of the recent durations, censored included, sample count); cached until the next record"""
+        cache_key = (kind, key)
+        if cache_key not in self._percentiles:
+            durations = self.durations(kind, key)
+            value = percentile(durations, self.quantile) if durations else None
+            self._percentiles[cache_key] = (value, len(durations))
+        return self._percentiles[cache_key]
+
+    def timeout(self, kind, key, static_timeout, floor, ceiling):
+        value, samples = self.percentile(kind, key)
+        if value is None or samples < self.min_samples:
+            return static_timeout
+        return min(max(value * self.factor, floor), ceiling)
+
+    def keys(self):
+        with self._lock:
+            return self._connect().execute("SELECT DISTINCT kind, task, dungeon, mod FROM runs").fetchall()
+
+    def report(self, floor, ceiling):
+        """Per kind and key: samples, percentiles, the adaptive timeout and the time it recovers.
+
+        recovered_s: time adaptive timeouts saved on runs that timed out (static minus the
+        timeout used); recoverable_s: what the current adaptive timeout would have saved on
+        runs that timed out under the static one; would_cut: cleared runs slower than it.
+        """
+        rows = []
+        for kind, task, dungeon, mod in self.keys():
+            key = (task, dungeon, mod)
+            with self._lock:
+                runs = self._connect().execute(
+                    "SELECT seconds, outcome, timeout, static_timeout FROM runs "
+                    "WHERE kind = ? AND task = ? AND dungeon = ? AND mod = ?", (kind, task, dungeon, mod)).fetchall()
+            cleared = [seconds for seconds, outcome, _, _ in runs if outcome == "cleared"]
+            timeouts = [(used, static) for _, outcome, used, static in runs if outcome == "timeout"]
+            static = runs[-1][3]
+            adaptive = self.timeout(kind, key, static, floor, ceiling)
+            rows.append({
+                "kind": kind, "task": task, "dungeon": dungeon, "mod": mod,
+                "runs": len(runs),
+                "timeouts": len(timeouts),
+                "p50_s": percentile(cleared, 0.50) if cleared else None,
+                "p99_s": percentile(cleared, 0.99) if cleared else None,
+                "static_timeout_s": static,
+                "adaptive_timeout_s": adaptive,
+                "recovered_s": sum(max(static - used, 0.0) for used, static in timeouts),
+                "recoverable_s": sum(max(static - adaptive, 0.0) for used, static in timeouts if used >= static),
+                "would_cut": sum(1 for seconds in cleared if seconds > adaptive),
+            })
+        return rows
+
+    def skill_report(self):
+        """Per kind, key and Skill Cast Mode: cleared runs, mean duration and mean casts per run"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT kind, task, dungeon, mod, skill_mode, COUNT(*), AVG(seconds), AVG(casts) FROM runs "
+                "WHERE outcome = 'cleared' AND skill_mode != '' "
+                "GROUP BY kind, task, dungeon, mod, skill_mode").fetchall()
+        return [{"kind": kind, "task": task, "dungeon": dungeon, "mod": mod, "skill_mode": skill_mode,
+                 "runs": runs, "mean_s": mean_s, "casts": casts}
+                for kind, task, dungeon, mod, skill_mode, runs, mean_s, casts in rows]
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+round_history = RoundHistory()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Report round history and adaptive timeouts")
+    parser.add_argument("db", nargs="?", default=None, help="defaults to stats/rounds.sqlite")
+    parser.add_argument("--floor", type=float, default=30)
+    parser.add_argument("--ceiling", type=float, default=300)
+    args = parser.parse_args(argv)
+
+    history = RoundHistory(args.db)
+    total_recovered = total_recoverable = 0.0
+    for row in history.report(args.floor, args.ceiling):
+        name = "/".join(part for part in (row["task"], row["dungeon"], row["mod"]) if part)
+        p99 = f"{row['p99_s']:.0f}s" if row["p99_s"] is not None else "-"
+        print(f"{name} {row['kind']}: {row['runs']} runs, {row['timeouts']} timeouts, p99 {p99}, "
+              f"timeout {row['static_timeout_s']:.0f}s -> {row['adaptive_timeout_s']:.0f}s, "
+              f"recovered {row['recovered_s']:.0f}s, recoverable {row['recoverable_s']:.0f}s, "
+              f"would cut {row['would_cut']} cleared runs")
+        total_recovered += row["recovered_s"]
+        total_recoverable += row["recoverable_s"]
+    print(f"total recovered {total_recovered / 60:.1f} min, recoverable {total_recoverable / 60:.1f} min")
+
+    modes = {}
+    for row in history.skill_report():
+        name = "/".join(part for part in (row["task"], row["dungeon"], row["mod"]) if part)
+        modes.setdefault((name, row["kind"]), {})[row["skill_mode"]] = row
+    for (name, kind), by_mode in modes.items():
+        parts = [f"{mode}: {row['runs']} runs, {row['mean_s']:.1f}s, {row['casts']:.1f} casts/{kind}"
+                 for mode, row in sorted(by_mode.items())]
+        fixed, aware = by_mode.get("Fixed Frequency"), by_mode.get("Cooldown Aware")
+        if fixed and aware:
+            parts.append(f"clear time {aware['mean_s'] - fixed['mean_s']:+.1f}s "
+                         f"({(aware['mean_s'] / fixed['mean_s'] - 1) * 100:+.0f}%) with Cooldown Aware")
+        print(f"{name} {kind} skills: " + "; ".join(parts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import json
+import time
+from collections import deque
+from pathlib import Path
+
+PHASES = ("menu", "route", "combat", "settlement", "letter", "drop_rate", "loading")
+
+
+class RoundTimeline:
+    """Per-phase round timing.
+
+    mark(phase) timestamps phase changes; end_round() closes the round, appends it to
+    stats/<name>-rounds.jsonl and feeds the live rounds/hour and phase breakdown.
+    """
+
+    def __init__(self, name, folder=None, window=20):
+        self.name = name
+        self.path = (Path(folder) if folder else Path.cwd() / "stats") / f"{name}-rounds.jsonl"
+        self.rounds = deque(maxlen=window)
+        self.count = 0
+        self.phase = None
+        self.round_start = None
+        self._phase_start = None
+        self._phases = {}
+
+    def mark(self, phase):
+        if phase == self.phase:
+            return
+        now = time.time()
+        if self.round_start is None:
+            self.round_start = now
+        self._close(now)
+        self.phase, self._phase_start = phase, now
+
+    def _close(self, now):
+        if self.phase is not None:
+            self._phases[self.phase] = self._phases.get(self.phase, 0.0) + now - self._phase_start
+            self._phase_start = now
+
+    def end_round(self, **extra):
+        """Close the current round and return its record, or None if no round was running"""
+        now = time.time()
+        if self.round_start is None:
+            self.round_start = now
+            return None
+        self._close(now)
+        self.count += 1
+        record = {
+            "task": self.name,
+            "round": self.count,
+            "start": self.round_start,
+            "end": now,
+            "seconds": now - self.round_start,
+            "phases": {phase: round(seconds, 3) for phase, seconds in self._phases.items()},
+            **extra,
+        }
+        self.rounds.append(record)
+        self.round_start = now
+        self._phases = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return record
+
+    @property
+    def rounds_per_hour(self):
+        if not self.rounds:
+            return 0.0
+        mean = sum(r["seconds"] for r in self.rounds) / len(self.rounds)
+        return 3600 / mean if mean > 0 else 0.0
+
+    def breakdown(self):
+        """Mean seconds per phase over the recent rounds, slowest first"""
+        totals = {}
+        for record in self.rounds:
+            for phase, seconds in record["phases"].items():
+                totals[phase] = totals.get(phase, 0.0) + seconds
+        n = max(len(self.rounds), 1)
+        return dict(sorted(((phase, seconds / n) for phase, seconds in totals.items()),
+                           key=lambda item: item[1], reverse=True))
+
+    def __str__(self):
+        return ", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in self.breakdown().items())
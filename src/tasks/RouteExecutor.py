@@ -0,0 +1,160 @@
+import time
+from collections import Counter, namedtuple
+
+# Placeholders resolved through the task when the route runs, since the bindings are user settings
+DODGE = "<dodge>"
+INTERACT = "<interact>"
+
+Step = namedtuple("Step", "kind args")
+
+
+def down(key):
+    return Step("down", (key,))
+
+
+def up(key):
+    return Step("up", (key,))
+
+
+def press(key, down_time=0.1, after=0.0):
+    return Step("press", (key, down_time, after))
+
+
+def wait(seconds):
+    return Step("wait", (seconds,))
+
+
+def call(fn, stop_if_false=False):
+    """Run fn; with stop_if_false a False result ends the route early (as completed)"""
+    return Step("call", (fn, stop_if_false))
+
+
+def expect(name, check, during):
+    """Wait exactly `during` seconds; the route diverged unless check() passes on some frame meanwhile"""
+    return Step("expect", (name, check, during))
+
+
+def wait_for(name, check, time_out):
+    """Continue as soon as check() passes; the route diverged if it does not within time_out"""
+    return Step("wait_for", (name, check, time_out))
+
+
+class RouteDiverged(Exception):
+    def __init__(self, route, checkpoint):
+        super().__init__(f"Route {route} diverged at checkpoint {checkpoint}")
+        self.route = route
+        self.checkpoint = checkpoint
+
+
+class Route:
+    """A recorded movement route: key steps with the original timings plus visual checkpoints.
+
+    retries: how often to run the route again after a divergence; only useful when the
+    route starts from a known position (e.g. with reset_and_transport).
+    """
+
+    def __init__(self, name, steps, retries=0):
+        self.name = name
+        self.steps = steps
+        self.retries = retries
+
+
+class RouteExecutor:
+    """Plays Routes on a task and verifies their checkpoints in flight.
+
+    Checkpoints poll frames only inside waits the route already has, so a route that
+    stays on track keeps its timing. On divergence all held keys are released and the
+    route is retried or run() returns False right away, so the caller can recover
+    instead of waiting for the mission timeout.
+    """
+
+    def __init__(self, task, poll_interval=0.05):
+        self.task = task
+        self.poll_interval = poll_interval
+        self.held = set()
+        self.runs = Counter()
+        self.divergences = Counter()
+
+    def run(self, route: Route) -> bool:
+        for attempt in range(route.retries + 1):
+            self.runs[route.name] += 1
+            try:
+                self._execute(route)
+                return True
+            except RouteDiverged as e:
+                self.divergences[(route.name, e.checkpoint)] += 1
+                action = "retrying" if attempt < route.retries else "giving up"
+                self.task.log_info(f"Route {route.name} diverged at {e.checkpoint}, {action}")
+            finally:
+                self.release_all()
+            self.task.info_set("Route Divergences", sum(self.divergences.values()))
+        return False
+
+    def _execute(self, route):
+        for step in route.steps:
+            kind, args = step
+            if kind == "down":
+                key = self._key(args[0])
+                self.task.send_key_down(key)
+                self.held.add(key)
+            elif kind == "up":
+                key = self._key(args[0])
+                self.task.send_key_up(key)
+                self.held.discard(key)
+            elif kind == "press":
+                key, down_time, after = args
+                self.task.send_key(self._key(key), down_time=down_time, after_sleep=after)
+            elif kind == "wait":
+                self.task.sleep(args[0])
+            elif kind == "call":
+                fn, stop_if_false = args
+                if fn() is False and stop_if_false:
+                    return
+            elif kind == "expect":
+                name, check, during = args
+                if not self._poll(check, during, stop_when_passed=False):
+                    raise RouteDiverged(route.name, name)
+            elif kind == "wait_for":
+                name, check, time_out = args
+                if not self._poll(check, time_out, stop_when_passed=True):
+                    raise RouteDiverged(route.name, name)
+            else:
+                raise Exception(f"Unknown route step: {kind}")
+
+    def _poll(self, check, duration, stop_when_passed):
+        deadline = time.monotonic() + duration
+        passed = False
+        while True:
+            if not passed:
+                self.task.next_frame()
+                passed = bool(check())
+                if passed and stop_when_passed:
+                    return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return passed
+            # Once passed, sleep out the rest of the window without probing
+            self.task.sleep(remaining if passed else min(self.poll_interval, remaining))
+
+    def _key(self, key):
+        if key == DODGE:
+            return self.task.get_dodge_key()
+        if key == INTERACT:
+            return self.task.get_interact_key()
+        return key
+
+    def release_all(self):
+        for key in list(self.held):
+            self.task.send_key_up(key)
+        self.held.clear()
+
+    def stats(self):
+        return {
+            "runs": dict(self.runs),
+            "divergences": {f"{route}@{checkpoint}": count for (route, checkpoint), count in self.divergences.items()},
+        }
+
+    def __str__(self):
+        runs = sum(self.runs.values())
+        diverged = sum(self.divergences.values())
+        return f"{runs} route runs, {diverged} diverged"
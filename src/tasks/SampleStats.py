@@ -0,0 +1,22 @@
+"""Mean and percentile of timing samples, shared by the metrics, profiler and reports.
+
+Plain Python (no ok import) so the offline tools (FishSimulator, Replay, Benchmarks) can use it.
+"""
+import math
+
+
+def mean(samples):
+    """Arithmetic mean; 0.0 for no samples"""
+    samples = list(samples)
+    return sum(samples) / len(samples) if samples else 0.0
+
+
+def percentile(samples, q):
+    """Nearest-rank q quantile (0 < q <= 1): the smallest sample with at least q of the samples at or below it.
+
+    0.0 for no samples.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
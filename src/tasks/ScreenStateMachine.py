@@ -0,0 +1,116 @@
+import time
+from enum import Enum
+
+
+class ScreenState(Enum):
+    IN_TEAM = 1
+    LETTER_SELECT = 2
+    LETTER_REWARD = 3
+    DROP_RATE = 4
+    START = 5
+    CONTINUE = 6
+    ESC_MENU = 7
+    LOADING = 8
+
+
+# Screens reachable from each state (besides staying); LOADING probes the successors of the last known screen
+TRANSITIONS = {
+    ScreenState.IN_TEAM: (ScreenState.LETTER_REWARD, ScreenState.START, ScreenState.CONTINUE, ScreenState.ESC_MENU),
+    ScreenState.START: (ScreenState.LETTER_SELECT, ScreenState.DROP_RATE, ScreenState.IN_TEAM),
+    ScreenState.CONTINUE: (ScreenState.LETTER_REWARD, ScreenState.LETTER_SELECT, ScreenState.DROP_RATE,
+                           ScreenState.START, ScreenState.IN_TEAM),
+    ScreenState.LETTER_SELECT: (ScreenState.DROP_RATE, ScreenState.IN_TEAM),
+    ScreenState.LETTER_REWARD: (ScreenState.CONTINUE, ScreenState.START),
+    ScreenState.DROP_RATE: (ScreenState.LETTER_SELECT, ScreenState.IN_TEAM),
+    ScreenState.ESC_MENU: (ScreenState.IN_TEAM, ScreenState.START),
+}
+
+# Full scan order, same priority as CommissionsTask.handle_mission_interface
+SCAN_ORDER = (ScreenState.IN_TEAM, ScreenState.LETTER_REWARD, ScreenState.LETTER_SELECT, ScreenState.DROP_RATE,
+              ScreenState.START, ScreenState.CONTINUE, ScreenState.ESC_MENU)
+
+# Probe order per anchor: the anchor and its successors in SCAN_ORDER priority, so when several
+# screens match (e.g. retry and continue both shown) the same one wins as in a full scan
+PROBE_ORDER = {state: tuple(candidate for candidate in SCAN_ORDER if candidate is state or candidate in successors)
+               for state, successors in TRANSITIONS.items()}
+
+
+class ScreenStateMachine:
+    """Tracks the current mission screen, probing only plausible detectors.
+
+    Each update probes the current state and its successors in TRANSITIONS, in SCAN_ORDER
+    priority. When none of them match for full_scan_timeout seconds, every detector is
+    probed (full scan). Call reset() when a task starts so a stale anchor is not reused.
+    Results are cached per frame, so repeated updates on the same frame are free.
+    """
+
+    def __init__(self, task, full_scan_timeout=3.0):
+        self.task = task
+        self.full_scan_timeout = full_scan_timeout
+        self.detectors = {
+            ScreenState.IN_TEAM: task.in_team,
+            ScreenState.LETTER_REWARD: task.find_letter_reward_btn,
+            ScreenState.LETTER_SELECT: task.find_letter_interface,
+            ScreenState.DROP_RATE: lambda: task.find_drop_item() or task.find_drop_item(800),
+            ScreenState.START: lambda: (task.find_retry_btn() or task.find_bottom_start_btn()
+                                        or task.find_big_bottom_start_btn()),
+            ScreenState.CONTINUE: task.find_continue_btn,
+            ScreenState.ESC_MENU: task.find_esc_menu,
+        }
+        self.reset()
+
+    def reset(self):
+        self.state = ScreenState.LOADING
+        self.anchor = None
+        self.unmatched_since = None
+        self._frame = None
+        self.probes = 0
+        self.full_scans = 0
+        self.transitions = 0
+        self._start_time = time.monotonic()
+
+    def candidates(self, now):
+        if self.anchor is None or (self.unmatched_since is not None
+                                   and now - self.unmatched_since >= self.full_scan_timeout):
+            self.full_scans += 1
+            self.unmatched_since = now
+            return SCAN_ORDER
+        return PROBE_ORDER[self.anchor]
+
+    def update(self):
+        """Probe the screen on the current frame and return the ScreenState"""
+        frame = self.task.frame
+        if frame is not None and frame is self._frame:
+            return self.state
+        self._frame = frame
+        now = time.monotonic()
+        state = ScreenState.LOADING
+        for candidate in self.candidates(now):
+            self.probes += 1
+            if self.detectors[candidate]():
+                state = candidate
+                break
+        if state is ScreenState.LOADING:
+            if self.unmatched_since is None:
+                self.unmatched_since = now
+        else:
+            self.anchor = state
+            self.unmatched_since = None
+        if state is not self.state:
+            self.transitions += 1
+            self.state = state
+        return state
+
+    def stats(self):
+        elapsed = time.monotonic() - self._start_time
+        return {
+            "state": self.state.name,
+            "probes": self.probes,
+            "probes_per_second": self.probes / elapsed if elapsed > 0 else 0.0,
+            "full_scans": self.full_scans,
+            "transitions": self.transitions,
+        }
+
+    def __str__(self):
+        stats = self.stats()
+        return f"{stats['state']}, {stats['probes_per_second']:.1f} probes/s, {stats['full_scans']} full scans"
@@ -0,0 +1,59 @@
+import cv2
+import numpy as np
+
+
+class SettleDetector:
+    """Decides when a screen region stopped changing.
+
+    Each frame's region is reduced to a small grayscale thumbnail; the region counts as
+    settled once consecutive thumbnails differ by less than `threshold` (mean absolute
+    gray level) for `stable_time` seconds. Also accumulates the time saved against the
+    fixed sleeps it replaces, per round and in total.
+    """
+
+    def __init__(self, size=(32, 18), threshold=2.0):
+        self.size = size
+        self.threshold = threshold
+        self.round_saved = 0.0
+        self.total_saved = 0.0
+        self.waits = 0
+        self.early = 0
+        self._signature = None
+        self._stable_since = None
+
+    def signature(self, image):
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(image, self.size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def start(self):
+        self._signature = None
+        self._stable_since = None
+
+    def update(self, image, now, stable_time):
+        """Feed the region of a new frame; True once it has been stable for stable_time"""
+        signature = self.signature(image)
+        previous, self._signature = self._signature, signature
+        if previous is None or np.abs(signature - previous).mean() >= self.threshold:
+            self._stable_since = None
+            return False
+        if self._stable_since is None:
+            self._stable_since = now
+        return now - self._stable_since >= stable_time
+
+    def record(self, ceiling, elapsed):
+        saved = max(0.0, ceiling - elapsed)
+        self.waits += 1
+        if saved > 0:
+            self.early += 1
+        self.round_saved += saved
+        self.total_saved += saved
+        return saved
+
+    def end_round(self):
+        """Return and reset the time saved in the current round"""
+        saved, self.round_saved = self.round_saved, 0.0
+        return saved
+
+    def __str__(self):
+        return f"{self.total_saved:.1f}s saved, {self.early}/{self.waits} waits ended early"
@@ -0,0 +1,100 @@
+import os
+import threading
+
+import numpy as np
+
+
+def _freeze(value):
+    """Mark numpy arrays read-only so one task cannot modify templates another task shares"""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _freeze(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _freeze(item)
+    return value
+
+
+def folder_key(kind, folder):
+    """Cache key for a resource folder: (kind, path, version).
+
+    The version lists every file with its mtime and size, so adding, removing, renaming or
+    editing a file in place all change the key and the folder is loaded again.
+    """
+    try:
+        with os.scandir(folder) as entries:
+            version = tuple(sorted((entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                                   for entry in entries if entry.is_file()))
+    except OSError:
+        version = None
+    return kind, os.path.abspath(folder), version
+
+
+class SharedResources:
+    """Process wide cache of read-only resources (map templates, macro scripts).
+
+    get(key, loader) runs loader once per key, even when several tasks ask at the same
+    time; the others wait for that load and get the same object. Numpy arrays in the
+    result are made read-only. Keys are folder_key() tuples; loading a new version of a
+    folder drops the entry of its previous version.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._loading = {}
+        self.loads = 0
+        self.hits = 0
+
+    def get(self, key, loader):
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                return self._entries[key]
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    return self._entries[key]
+            value = _freeze(loader())
+            with self._lock:
+                for stale in [k for k in self._entries if k[:2] == key[:2]]:
+                    del self._entries[stale]
+                self._entries[key] = value
+                self._loading.pop(key, None)
+                self.loads += 1
+            return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def nbytes(self):
+        def size(value):
+            if isinstance(value, np.ndarray):
+                return value.nbytes
+            if isinstance(value, dict):
+                return sum(size(item) for item in value.values())
+            if isinstance(value, (list, tuple)):
+                return sum(size(item) for item in value)
+            return 0
+
+        with self._lock:
+            return sum(size(value) for value in self._entries.values())
+
+    def stats(self):
+        return {"entries": len(self._entries), "loads": self.loads, "hits": self.hits, "bytes": self.nbytes()}
+
+    def __str__(self):
+        stats = self.stats()
+        return (f"{stats['entries']} shared, {stats['loads']} loads, {stats['hits']} hits, "
+                f"{stats['bytes'] / 1024 / 1024:.1f} MB")
+
+
+shared_resources = SharedResources()
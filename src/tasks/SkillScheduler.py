@@ -0,0 +1,171 @@
+import time
+
+import cv2
+import numpy as np
+
+FIXED = "Fixed Frequency"
+COOLDOWN = "Cooldown Aware"
+
+# Skill icon boxes on the default HUD layout at 2560x1440 (x1, y1, x2, y2), estimated and not yet
+# checked at other resolutions, which is why Cooldown Aware is opt-in; readings are calibrated per
+# session, so a slightly off box only delays calibration
+SKILL_ICON_BOXES = {
+    "Combat Skill": (2226, 1236, 2310, 1320),
+    "Ultimate Skill": (2352, 1196, 2460, 1304),
+    "Geniemon Support": (2122, 1268, 2190, 1336),
+}
+
+
+class CooldownReader:
+    """Reads whether a skill icon shows ready or cooling down.
+
+    A cooling down icon is dimmed, so its share of bright pixels drops. The ready and
+    cooldown levels are learned from the frames just before and shortly after casts that
+    visibly started a cooldown; until they are min_gap apart the state is unknown (None).
+    """
+
+    def __init__(self, bright=170, min_gap=0.08, alpha=0.3, min_samples=2):
+        self.bright = bright
+        self.min_gap = min_gap
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.ready_level = None
+        self.cooldown_level = None
+        self.samples = 0
+
+    def level(self, image):
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return float(np.count_nonzero(image >= self.bright)) / max(image.size, 1)
+
+    def observe_cast(self, before, after):
+        """Levels right before a cast and once its cooldown should show"""
+        if before - after < self.min_gap:
+            return  # cast during cooldown, or the box does not show the icon
+        if self.samples == 0:
+            self.ready_level, self.cooldown_level = before, after
+        else:
+            self.ready_level += self.alpha * (before - self.ready_level)
+            self.cooldown_level += self.alpha * (after - self.cooldown_level)
+        self.samples += 1
+
+    @property
+    def calibrated(self):
+        return self.samples >= self.min_samples and self.ready_level - self.cooldown_level >= self.min_gap
+
+    def ready(self, level):
+        if not self.calibrated:
+            return None
+        return bool(level >= (self.ready_level + self.cooldown_level) / 2)
+
+
+class SkillScheduler:
+    """Casts the Use Skill skill as soon as its HUD icon reads ready.
+
+    Registered as the task scheduler's "skill" ticker. In Cooldown Aware mode it polls the
+    icon every poll_interval and casts when the icon reads ready. While the reader is
+    uncalibrated, or when the icon has read not ready for stale_factor cast intervals, it
+    falls back to casting every Skill Cast Frequency seconds, which is also all Fixed
+    Frequency mode does.
+    """
+
+    def __init__(self, task, poll_interval=0.2, cooldown_probe=0.5, min_recast=1.0, stale_factor=3):
+        self.task = task
+        self.poll_interval = poll_interval
+        self.cooldown_probe = cooldown_probe
+        self.min_recast = min_recast
+        self.stale_factor = stale_factor
+        self.readers = {skill: CooldownReader() for skill in SKILL_ICON_BOXES}
+        self.last_cast = 0.0
+        self.casts = 0
+        self.run_casts = 0
+        self.ready_casts = 0
+        self.fallback_casts = 0
+        self._probe = None  # (skill, level before the cast, time to sample the cooldown level)
+        self._boxes = None
+        self._boxes_shape = None
+
+    @property
+    def mode(self):
+        return self.task.settings.skill_cast_mode
+
+    def create_ticker(self):
+        return self.task.scheduler.register("skill", self.tick, interval=self.interval)
+
+    def interval(self):
+        if self.mode == COOLDOWN and self.task.settings.use_skill != "Disabled":
+            return self.poll_interval
+        return self.task.settings.skill_cast_frequency
+
+    def icon(self, skill):
+        frame = self.task.frame
+        if self._boxes_shape != frame.shape:
+            self._boxes = {name: self.task.box_of_screen_scaled(2560, 1440, *box, name=f"skill_{name}", hcenter=True)
+                           for name, box in SKILL_ICON_BOXES.items()}
+            self._boxes_shape = frame.shape
+        return self._boxes[skill].crop_frame(frame)
+
+    def tick(self):
+        skill = self.task.settings.use_skill
+        if skill == "Disabled":
+            return
+        if self.mode != COOLDOWN or skill not in self.readers or self.task.frame is None:
+            self.cast(skill)
+            return
+        reader = self.readers[skill]
+        level = reader.level(self.icon(skill))
+        now = time.monotonic()
+        if self._probe is not None and now >= self._probe[2]:
+            probe_skill, before, _ = self._probe
+            if probe_skill == skill:
+                reader.observe_cast(before, level)
+            self._probe = None
+        since = now - self.last_cast
+        if since < self.min_recast:
+            return
+        ready = reader.ready(level)
+        frequency = self.task.settings.skill_cast_frequency
+        if ready is True or (ready is None and since >= frequency) or since >= frequency * self.stale_factor:
+            if ready is True:
+                self.ready_casts += 1
+            else:
+                self.fallback_casts += 1
+            if self._probe is None:
+                self._probe = (skill, level, now + self.cooldown_probe)
+            self.cast(skill)
+
+    def cast(self, skill):
+        char = self.task.get_current_char()
+        if skill == "Combat Skill":
+            char.send_combat_key()
+        elif skill == "Ultimate Skill":
+            char.send_ultimate_key()
+        elif skill == "Geniemon Support":
+            char.send_geniemon_key()
+        self.last_cast = time.monotonic()
+        self.casts += 1
+        self.run_casts += 1
+
+    def end_run(self):
+        """Return and reset the casts since the last call (one round or wave)"""
+        casts, self.run_casts = self.run_casts, 0
+        return casts
+
+    def stats(self):
+        skill = self.task.settings.use_skill
+        reader = self.readers.get(skill)
+        return {
+            "mode": self.mode,
+            "casts": self.casts,
+            "ready_casts": self.ready_casts,
+            "fallback_casts": self.fallback_casts,
+            "calibrated": bool(reader and reader.calibrated),
+        }
+
+    def __str__(self):
+        stats = self.stats()
+        if stats["mode"] != COOLDOWN:
+            return f"{stats['mode']}, {stats['casts']} casts"
+        state = "calibrated" if stats["calibrated"] else "calibrating"
+        return (f"{stats['mode']} ({state}), {stats['ready_casts']} on ready, "
+                f"{stats['fallback_casts']} on fallback")
@@ -0,0 +1,92 @@
+from collections import Counter, namedtuple
+
+import cv2
+import numpy as np
+
+WORLD = "world"
+
+# kind: frozen / idle / stuck_screen; seconds: how long the signature had held when it fired
+StallEvent = namedtuple("StallEvent", "kind seconds")
+
+
+class StallWatchdog:
+    """Detects stalls from frame-change energy in ROIs and the time since the last screen state change.
+
+    observe() reduces each ROI to a small grayscale thumbnail every sample_interval and
+    takes the mean absolute difference to the previous one as its change energy; an ROI
+    is quiet while that stays below threshold. Stall signatures (0 disables one):
+
+    frozen: every ROI quiet for frozen_time (game frozen, or a static dialog over everything)
+    idle: the world ROI quiet for idle_time while in team (character stuck in a corner)
+    stuck_screen: no screen state transition for screen_time outside the team view
+    """
+
+    def __init__(self, frozen_time=20.0, idle_time=30.0, screen_time=60.0, threshold=1.5, sample_interval=0.25,
+                 size=(32, 18)):
+        self.frozen_time = frozen_time
+        self.idle_time = idle_time
+        self.screen_time = screen_time
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.size = size
+        self.events = Counter()
+        self.saved = 0.0
+        self.reset()
+
+    def reset(self, now=None):
+        self._signatures = {}
+        self._quiet_since = {}
+        self._last_sample = None
+        self.state = None
+        self.state_since = now
+
+    def signature(self, image):
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(image, self.size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def observe(self, crops, state, in_team, now):
+        """Feed the ROI crops of the current frame; returns a StallEvent when a signature holds"""
+        if state != self.state:
+            self.state, self.state_since = state, now
+        if self.state_since is None:
+            self.state_since = now
+        if self._last_sample is not None and now - self._last_sample < self.sample_interval:
+            return None
+        self._last_sample = now
+        for name, crop in crops.items():
+            signature = self.signature(crop)
+            previous, self._signatures[name] = self._signatures.get(name), signature
+            if previous is not None and previous.shape == signature.shape \
+                    and np.abs(signature - previous).mean() < self.threshold:
+                self._quiet_since.setdefault(name, now)
+            else:
+                self._quiet_since.pop(name, None)
+        event = self._match(crops, in_team, now)
+        if event is not None:
+            self.events[event.kind] += 1
+            self.reset(now)
+        return event
+
+    def _match(self, crops, in_team, now):
+        if self.frozen_time and crops and all(name in self._quiet_since for name in crops):
+            quiet = now - max(self._quiet_since[name] for name in crops)
+            if quiet >= self.frozen_time:
+                return StallEvent("frozen", quiet)
+        if self.idle_time and in_team and WORLD in self._quiet_since:
+            quiet = now - self._quiet_since[WORLD]
+            if quiet >= self.idle_time:
+                return StallEvent("idle", quiet)
+        if self.screen_time and not in_team and now - self.state_since >= self.screen_time:
+            return StallEvent("stuck_screen", now - self.state_since)
+        return None
+
+    def record_saved(self, seconds):
+        self.saved += seconds
+
+    def stats(self):
+        return {"events": dict(self.events), "saved_s": self.saved}
+
+    def __str__(self):
+        events = ", ".join(f"{kind} {count}" for kind, count in self.events.items()) or "no stalls"
+        return f"{events}, {self.saved:.0f}s saved against Timeout"
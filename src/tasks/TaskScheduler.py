@@ -0,0 +1,109 @@
+import heapq
+import itertools
+import time
+
+
+class ScheduledTicker:
+    """Handle returned by TaskScheduler.register.
+
+    Drop-in for the framework's tickers: calling it fires the action if due, reset() makes
+    it due again immediately. The interval (number or callable) is evaluated once per fire.
+    """
+
+    def __init__(self, scheduler, name, action, interval):
+        self.scheduler = scheduler
+        self.name = name
+        self.action = action
+        self.interval = interval
+        self.due = 0.0
+        self.generation = 0
+        self.period = 0.0
+        self.fires = 0
+        self.missed = 0
+        self.drift_total = 0.0
+        self.drift_max = 0.0
+
+    def next_interval(self):
+        return float(self.interval() if callable(self.interval) else self.interval)
+
+    def __call__(self):
+        if self.scheduler.clock() >= self.due:
+            self.scheduler.fire(self)
+
+    def reset(self):
+        self.period = 0.0
+        self.scheduler.schedule(self, self.scheduler.clock())
+
+    def stats(self):
+        return {
+            "fires": self.fires,
+            "missed": self.missed,
+            "drift_ms": self.drift_total / self.fires * 1000 if self.fires else 0.0,
+            "drift_max_ms": self.drift_max * 1000,
+        }
+
+
+class TaskScheduler:
+    """Heap based scheduler for a task's periodic actions.
+
+    Actions register with their interval policy; the main loop calls tick() once per
+    iteration, which fires whatever is due. Tickers can also be called directly (as the
+    framework's tickers were); rescheduling then leaves a superseded heap entry behind,
+    which schedule() compacts away so the heap stays bounded by the number of tickers.
+    Fire-time drift (fire time - due time) and missed deadlines (drift longer than a
+    whole period) are tracked per ticker.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.tickers = {}
+        self._heap = []
+        self._seq = itertools.count()
+
+    def register(self, name, action, interval) -> ScheduledTicker:
+        ticker = ScheduledTicker(self, name, action, interval)
+        self.tickers[name] = ticker
+        self.schedule(ticker, self.clock())
+        return ticker
+
+    def schedule(self, ticker, due):
+        ticker.due = due
+        ticker.generation += 1
+        heapq.heappush(self._heap, (due, next(self._seq), ticker.generation, ticker))
+        if len(self._heap) > 2 * len(self.tickers) + 8:
+            self._heap = [entry for entry in self._heap if entry[2] == entry[3].generation]
+            heapq.heapify(self._heap)
+
+    def fire(self, ticker):
+        now = self.clock()
+        if ticker.period > 0:
+            drift = max(0.0, now - ticker.due)
+            ticker.drift_total += drift
+            ticker.drift_max = max(ticker.drift_max, drift)
+            if drift >= ticker.period:
+                ticker.missed += int(drift // ticker.period)
+        ticker.fires += 1
+        ticker.period = ticker.next_interval()
+        self.schedule(ticker, now + ticker.period)
+        ticker.action()
+
+    def tick(self):
+        """Fire every registered action that is due; cheap when nothing is.
+
+        This runs all of the task's tickers, so call it only where every one of them may
+        fire (the in-team loops that used to call each ticker in turn); elsewhere call the
+        ticker handles directly.
+        """
+        heap = self._heap
+        now = self.clock()
+        while heap and heap[0][0] <= now:
+            _, _, generation, ticker = heapq.heappop(heap)
+            if generation == ticker.generation:
+                self.fire(ticker)
+
+    def stats(self):
+        return {name: ticker.stats() for name, ticker in self.tickers.items()}
+
+    def __str__(self):
+        return ", ".join(f"{name} {t.fires}x drift {t.stats()['drift_ms']:.0f} ms missed {t.missed}"
+                         for name, t in self.tickers.items())
@@ -1,10 +1,13 @@
 import time
+from collections import namedtuple
+
 from ok import Logger, TaskDisabledException
 from qfluentwidgets import FluentIcon
 
 from src.tasks.AutoExploration import AutoExploration
 from src.tasks.CommissionsTask import CommissionsTask, QuickMoveTask
 from src.tasks.DNAOneTimeTask import DNAOneTimeTask
+from src.tasks.RouteExecutor import Route, DODGE, INTERACT, down, up, press, wait, call, expect, wait_for
 from src.tasks.trigger.AutoMazeTask import AutoMazeTask
 from src.tasks.trigger.AutoRouletteTask import AutoRouletteTask
 from src.tasks.BaseCombatTask import BaseCombatTask
@@ -18,6 +21,46 @@ class MapDetectionError(Exception):
     pass
 
 
+# detected lists every map whose track point was found, in map_configs order; name is the first or None
+MapScore = namedtuple("MapScore", "name detected")
+
+
+class TrackPointClassifier:
+    """Checks the track point box of every map, one find_track_point call per box.
+
+    The boxes are resolved once per resolution instead of on every call; each box still
+    goes through the task's BaseDNATask.find_track_point, so the result is the same
+    found/not-found answer (template, processing and threshold) the per-map checks gave.
+    """
+
+    def __init__(self, task, track_points, threshold=0.7):
+        self.task = task
+        self.track_points = track_points  # map name -> (x1, y1, x2, y2) as screen fractions
+        self.threshold = threshold
+        self._resolution = None
+        self._boxes = None
+
+    def boxes(self, frame):
+        resolution = frame.shape[:2]
+        if resolution != self._resolution:
+            self._boxes = {
+                name: self.task.box_of_screen_scaled(2560, 1440, 2560 * x1, 1440 * y1, 2560 * x2, 1440 * y2,
+                                                     name="find_track_point", hcenter=True)
+                for name, (x1, y1, x2, y2) in self.track_points.items()
+            }
+            self._resolution = resolution
+        return self._boxes
+
+    def classify(self, frame):
+        detected = [name for name, box in self.boxes(frame).items()
+                    if self.task.find_track_point_in(box, self.threshold)]
+        return MapScore(detected[0] if detected else None, detected)
+
+    def found(self, frame, name):
+        """Whether one map's track point is found, without checking the other boxes"""
+        return bool(self.task.find_track_point_in(self.boxes(frame)[name], self.threshold))
+
+
 class AutoExploration_Fast(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
     """Auto Exploration/Endless, thanks to community logic"""
     def __init__(self, *args, **kwargs):
@@ -81,9 +124,12 @@ class AutoExploration_Fast(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
                 "execute_func": self.execute_ground_map
             }
         }
+        self.map_classifier = TrackPointClassifier(
+            self, {name: config["track_point"] for name, config in self.map_configs.items()})
 
     def run(self):
         DNAOneTimeTask.run(self)
+        self.refresh_settings()
         self.move_mouse_to_safe_position(save_current_pos=False)
         self.set_check_monthly_card()
         self.ensure_game_focused()
@@ -101,6 +147,8 @@ class AutoExploration_Fast(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
         except Exception as e:
             logger.error('AutoExploration error', e)
             raise
+        finally:
+            self.stop_recording(self.get_task_by_class(AutoExploration))
 
     def walk_to_aim(self):
         map_selection = self.config.get("Map Selection", "All Maps")
@@ -125,142 +173,138 @@ class AutoExploration_Fast(DNAOneTimeTask, CommissionsTask, BaseCombatTask):
             raise MapDetectionError(f"Map config inconsistency: Detected map ({current_map}) but no execution function found")
     
     def detect_current_map(self):
-        """Detect current map type"""
-        detected_maps = []
-        
-        for map_name, config in self.map_configs.items():
-            x1, y1, x2, y2 = config["track_point"]
-            if self.find_track_point(x1, y1, x2, y2):
-                detected_maps.append(map_name)
-                self.log_info(f"Map marker detected: {map_name} at ({x1}, {y1}, {x2}, {y2})")
-        
-        if len(detected_maps) == 0:
+        """Detect current map type, checking the cached track point box of every map"""
+        result = self.map_classifier.classify(self.frame)
+        if result.name is None:
             logger.warning("Map detection failed: No known map markers detected")
             return "Unknown Map"
-        elif len(detected_maps) == 1:
-            return detected_maps[0]
-        else:
-            # Multiple markers detected, log warning and return first
-            logger.warning(f"Map detection conflict: Multiple markers detected {detected_maps}, using first one")
-            return detected_maps[0]
-    
+        if len(result.detected) > 1:
+            logger.warning(f"Map detection conflict: Multiple markers detected {result.detected}, using first one")
+        self.log_info(f"Map marker detected: {result.name}")
+        return result.name
+
     def execute_elevator_map(self):
         """Execute Exploration Elevator map movement logic"""
         self.log_info("Executing Exploration Elevator map movement")
-        self.reset_and_transport()
-        self.send_key_down("lalt")
-        self.sleep(0.05)
-        self.send_key_down("a")
-        self.sleep(0.1)
-        self.send_key_down(self.get_dodge_key())
-        self.sleep(0.8)
-        self.send_key(self.get_dodge_key(), down_time=0.2,after_sleep=0.8)
-        self.send_key(self.get_dodge_key(), down_time=0.2,after_sleep=1.6)
-        
-        if self.config.get("Jitter Mode") == "Always":
-            self.external_movement_tick()
-            
-        self.send_key_down("s")
-        self.send_key_up("a")
-        self.sleep(0.3)
-        self.send_key("space", down_time=0.1,after_sleep=0.4)
-        self.send_key("space", down_time=0.1,after_sleep=0.4)
-        self.send_key("space", down_time=0.1,after_sleep=0.7)
-        self.send_key_up(self.get_dodge_key())
-        self.send_key_up("s")
-        self.sleep(0.6)
-        self.send_key(self.get_interact_key(), down_time=0.1,after_sleep=0.8)
-        if not self.try_solving_puzzle():
-            return True
-        self.send_key_down("a")
-        self.sleep(0.1)
-        self.send_key(self.get_dodge_key(), down_time=0.2,after_sleep=0.6)
-        self.send_key_down(self.get_dodge_key())
-        self.sleep(0.9)
-        self.send_key_down("w")
-        self.sleep(0.2)
-        self.send_key_up("a")
-        self.sleep(0.1)
-        self.send_key_up(self.get_dodge_key())
-        self.send_key_up("w")
-        self.sleep(0.2)
-        self.send_key_up("lalt")
-        return True
-    
+        return self.route_executor.run(Route("Exploration Elevator", [
+            call(self.reset_and_transport),
+            wait_for("in_team", self.in_team, 5),
+            down("lalt"),
+            wait(0.05),
+            down("a"),
+            wait(0.1),
+            down(DODGE),
+            wait(0.8),
+            press(DODGE, down_time=0.2, after=0.8),
+            press(DODGE, down_time=0.2, after=1.6),
+            call(self.route_jitter),
+            down("s"),
+            up("a"),
+            wait(0.3),
+            press("space", down_time=0.1, after=0.4),
+            press("space", down_time=0.1, after=0.4),
+            press("space", down_time=0.1, after=0.7),
+            up(DODGE),
+            up("s"),
+            expect("left_start", lambda: self.left_route_start("Exploration Elevator"), 0.6),
+            press(INTERACT, down_time=0.1, after=0.8),
+            call(self.try_solving_puzzle, stop_if_false=True),
+            down("a"),
+            wait(0.1),
+            press(DODGE, down_time=0.2, after=0.6),
+            down(DODGE),
+            wait(0.9),
+            down("w"),
+            wait(0.2),
+            up("a"),
+            wait(0.1),
+            up(DODGE),
+            up("w"),
+            wait(0.2),
+            up("lalt"),
+        ], retries=1))
+
     def execute_platform_map(self):
         """Execute Exploration Platform map movement logic"""
         self.log_info("Executing Exploration Platform map movement")
-        self.send_key_down("lalt")
-        self.sleep(0.05)
-        self.send_key_down("w")
-        self.sleep(0.1)
-        self.send_key_down(self.get_dodge_key())
-        self.sleep(1.2)
-        
-        if self.config.get("Jitter Mode") == "Always":
-            self.external_movement_tick()
-            
-        self.send_key(self.get_dodge_key(),  down_time=0.2,after_sleep=0.3)
-        self.send_key_down(self.get_dodge_key())
-        self.sleep(0.1)
-        self.send_key_down("a")
-        self.sleep(0.1)
-        self.send_key("space", down_time=0.1,after_sleep=0.1)
-        self.send_key(self.get_dodge_key(),  down_time=0.2,after_sleep=0.3)
-        self.send_key("space", down_time=0.1,after_sleep=0.7)
-        self.send_key_up(self.get_dodge_key())
-        self.send_key_up("w")
-        self.sleep(0.1)
-        self.send_key_up("a")
-        self.sleep(0.6)
-        self.send_key(self.get_interact_key(), down_time=0.1,after_sleep=0.8)
-        if not self.try_solving_puzzle():
-            return True
-        self.send_key_down("d")
-        self.sleep(0.1)
-        self.send_key(self.get_dodge_key(),  down_time=0.2)
-        self.sleep(0.1)
-        self.send_key_up("d")
-        self.sleep(0.1)
-        self.send_key_down("s")
-        self.sleep(0.1)
-        self.send_key_up(self.get_dodge_key())
-        self.send_key_up("s")
-        self.sleep(0.2)
-        self.middle_click()
-        self.send_key_up("lalt")
-        return True
-    
+        # No reset at the start of this route, so a divergence cannot be retried from a known position
+        return self.route_executor.run(Route("Exploration Platform", [
+            down("lalt"),
+            wait(0.05),
+            down("w"),
+            wait(0.1),
+            down(DODGE),
+            wait(1.2),
+            call(self.route_jitter),
+            press(DODGE, down_time=0.2, after=0.3),
+            down(DODGE),
+            wait(0.1),
+            down("a"),
+            wait(0.1),
+            press("space", down_time=0.1, after=0.1),
+            press(DODGE, down_time=0.2, after=0.3),
+            press("space", down_time=0.1, after=0.7),
+            up(DODGE),
+            up("w"),
+            wait(0.1),
+            up("a"),
+            expect("left_start", lambda: self.left_route_start("Exploration Platform"), 0.6),
+            press(INTERACT, down_time=0.1, after=0.8),
+            call(self.try_solving_puzzle, stop_if_false=True),
+            down("d"),
+            wait(0.1),
+            press(DODGE, down_time=0.2),
+            wait(0.1),
+            up("d"),
+            wait(0.1),
+            down("s"),
+            wait(0.1),
+            up(DODGE),
+            up("s"),
+            wait(0.2),
+            call(self.middle_click),
+            up("lalt"),
+        ]))
+
     def execute_ground_map(self):
         """Execute Exploration Ground map movement logic"""
         self.log_info("Executing Exploration Ground map movement")
-        self.reset_and_transport()
-        self.send_key_down("lalt")
-        self.sleep(0.05)
-        self.send_key_down("a")
-        self.sleep(0.1)
-        self.send_key(self.get_dodge_key(), down_time=1.1)
-        
+        return self.route_executor.run(Route("Exploration Ground", [
+            call(self.reset_and_transport),
+            wait_for("in_team", self.in_team, 5),
+            down("lalt"),
+            wait(0.05),
+            down("a"),
+            wait(0.1),
+            press(DODGE, down_time=1.1),
+            call(self.route_jitter),
+            up("a"),
+            expect("left_start", lambda: self.left_route_start("Exploration Ground"), 0.6),
+            press(INTERACT, down_time=0.1, after=0.8),
+            call(self.try_solving_puzzle, stop_if_false=True),
+            press("d", down_time=0.8, after=0.1),
+            call(self.middle_click),
+            up("lalt"),
+        ], retries=1))
+
+    def route_jitter(self):
         if self.config.get("Jitter Mode") == "Always":
             self.external_movement_tick()
-            
-        self.send_key_up("a")
-        self.sleep(0.6)
-        self.send_key(self.get_interact_key(), down_time=0.1,after_sleep=0.8)
-        if not self.try_solving_puzzle():
-            return True
-        self.send_key('d',down_time=0.8,after_sleep=0.1)
-        self.middle_click()
-        self.send_key_up("lalt")
-        return True
-            
-            
+
+    def left_route_start(self, map_name):
+        """Route checkpoint: the map's track point is no longer where it was at the start of the route"""
+        return not self.map_classifier.found(self.frame, map_name)
+
     def find_track_point(self, x1, y1, x2, y2) -> bool:
         box = self.box_of_screen_scaled(2560, 1440, 2560*x1, 1440*y1, 2560*x2, 1440*y2, name="find_track_point", hcenter=True)
         result = super().find_track_point(threshold=0.7, box=box)
         # Debug info: record detection result
         logger.debug(f"Map detection point ({x1}, {y1}, {x2}, {y2}) result: {result}")
         return result
+
+    def find_track_point_in(self, box, threshold):
+        """BaseDNATask.find_track_point on an already resolved box"""
+        return super().find_track_point(threshold=threshold, box=box)
         
     def try_solving_puzzle(self):
         maze_task = self.get_task_by_class(AutoMazeTask)
@@ -0,0 +1,180 @@
+from src.tasks.SampleStats import mean, percentile
+
+
+class AlphaBetaFilter:
+    """Alpha-beta filter tracking a 1D position and its velocity (px/s)."""
+
+    def __init__(self, alpha=0.6, beta=0.15):
+        self.alpha = alpha
+        self.beta = beta
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.v = 0.0
+        self.t = None
+
+    @property
+    def ready(self):
+        return self.x is not None
+
+    def update(self, measurement, t):
+        if self.x is None:
+            self.x, self.v, self.t = float(measurement), 0.0, t
+            return
+        dt = t - self.t
+        if dt <= 0:
+            return
+        predicted = self.x + self.v * dt
+        residual = measurement - predicted
+        self.x = predicted + self.alpha * residual
+        self.v += self.beta * residual / dt
+        self.t = t
+
+    def predict(self, t):
+        if self.x is None:
+            return None
+        return self.x + self.v * (t - self.t)
+
+
+class LatencyTracker:
+    """Exponential moving averages of the fight loop latencies (seconds)."""
+
+    def __init__(self, smoothing=0.2):
+        self.smoothing = smoothing
+        self.capture_to_decision = 0.0
+        self.decision_to_input = 0.0
+
+    def reset(self):
+        self.capture_to_decision = 0.0
+        self.decision_to_input = 0.0
+
+    def _ema(self, current, sample):
+        return sample if current == 0.0 else current + self.smoothing * (sample - current)
+
+    def record_decision(self, seconds):
+        self.capture_to_decision = self._ema(self.capture_to_decision, seconds)
+
+    def record_input(self, seconds):
+        self.decision_to_input = self._ema(self.decision_to_input, seconds)
+
+    @property
+    def lead(self):
+        """Time from frame capture until an input sent for it takes effect."""
+        return self.capture_to_decision + self.decision_to_input
+
+
+class PredictiveFishController:
+    """Latency compensating fishing controller.
+
+    Icon and bar edges are tracked with alpha-beta filters across frames; decisions use
+    their positions extrapolated to the moment the input takes effect, where the lead time
+    comes from the measured loop latency.
+    """
+
+    def __init__(self, alpha=0.6, beta=0.15, max_lead=0.25):
+        self.icon = AlphaBetaFilter(alpha, beta)
+        self.bar_top = AlphaBetaFilter(alpha, beta)
+        self.bar_bottom = AlphaBetaFilter(alpha, beta)
+        self.latency = LatencyTracker()
+        self.max_lead = max_lead
+
+    def reset(self):
+        """Start a new round: filters and latency averages are per round"""
+        self.icon.reset()
+        self.bar_top.reset()
+        self.bar_bottom.reset()
+        self.latency.reset()
+
+    @property
+    def ready(self):
+        return self.icon.ready and self.bar_top.ready
+
+    def update(self, capture_time, bar_rect=None, icon_center=None):
+        if bar_rect:
+            self.bar_top.update(bar_rect[1], capture_time)
+            self.bar_bottom.update(bar_rect[3], capture_time)
+        if icon_center:
+            self.icon.update(icon_center[1], capture_time)
+
+    def predict(self, capture_time):
+        """Return (icon_y, bar_top, bar_bottom) expected when an input decided now takes effect"""
+        t = capture_time + min(self.latency.lead, self.max_lead)
+        return self.icon.predict(t), self.bar_top.predict(t), self.bar_bottom.predict(t)
+
+
+class FightRoundMetrics:
+    """Per-round fight loop instrumentation.
+
+    Tracks loop rate, capture->decision and decision->input latency, detection time,
+    how often bar / icon were found, and how long the icon stayed inside the bar.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.bar_frames = 0
+        self.icon_frames = 0
+        self.tracked_time = 0.0
+        self.in_zone_time = 0.0
+        self.hold_switches = 0
+        self.detect_times = []
+        self.decision_latencies = []
+        self.input_latencies = []
+        self._first_time = None
+        self._last_time = None
+
+    def record(self, now, has_bar, bar_rect, has_icon, icon_center, detect_seconds=None, decision_seconds=None):
+        self.frames += 1
+        self.bar_frames += bool(has_bar)
+        self.icon_frames += bool(has_icon)
+        if detect_seconds is not None:
+            self.detect_times.append(detect_seconds)
+        if decision_seconds is not None:
+            self.decision_latencies.append(decision_seconds)
+        if self._last_time is not None and has_bar and has_icon:
+            dt = now - self._last_time
+            self.tracked_time += dt
+            if bar_rect[1] <= icon_center[1] <= bar_rect[3]:
+                self.in_zone_time += dt
+        if self._first_time is None:
+            self._first_time = now
+        self._last_time = now
+
+    def record_input(self, seconds):
+        self.hold_switches += 1
+        self.input_latencies.append(seconds)
+
+    @property
+    def in_zone_ratio(self):
+        return self.in_zone_time / self.tracked_time if self.tracked_time > 0 else 0.0
+
+    @property
+    def loop_hz(self):
+        if self.frames < 2 or self._last_time <= self._first_time:
+            return 0.0
+        return (self.frames - 1) / (self._last_time - self._first_time)
+
+    def summary(self):
+        return {
+            "frames": self.frames,
+            "loop_hz": self.loop_hz,
+            "bar_found_ratio": self.bar_frames / self.frames if self.frames else 0.0,
+            "icon_found_ratio": self.icon_frames / self.frames if self.frames else 0.0,
+            "detect_ms": mean(self.detect_times) * 1000,
+            "detect_p95_ms": percentile(self.detect_times, 0.95) * 1000,
+            "capture_to_decision_ms": mean(self.decision_latencies) * 1000,
+            "capture_to_decision_p95_ms": percentile(self.decision_latencies, 0.95) * 1000,
+            "decision_to_input_ms": mean(self.input_latencies) * 1000,
+            "decision_to_input_p95_ms": percentile(self.input_latencies, 0.95) * 1000,
+            "in_zone_ratio": self.in_zone_ratio,
+            "tracked_time": self.tracked_time,
+            "hold_switches": self.hold_switches,
+        }
+
+    def __str__(self):
+        return (f"{self.loop_hz:.0f} Hz, detect {mean(self.detect_times) * 1000:.2f} ms, "
+                f"bar {self.bar_frames / max(self.frames, 1):.0%} / icon {self.icon_frames / max(self.frames, 1):.0%}, "
+                f"in zone {self.in_zone_ratio:.0%}")
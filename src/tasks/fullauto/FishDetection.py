@@ -0,0 +1,124 @@
+import time
+
+import cv2
+
+from src.tasks.SampleStats import mean, percentile
+
+BRIGHT_THRESHOLD = 200
+BAR_SPAN_RATIO = 0.6
+
+NOT_FOUND = (False, None, None)
+
+
+def detect_by_contour(roi_img, res_ratio, bar_min_area, icon_min_area, icon_max_area):
+    """Contour based fish bar / icon detection.
+
+    Return: ((has_bar, bar_center, bar_rect), (has_icon, icon_center, icon_rect), bar_area, icon_area)
+    Note: centers and rects are relative to ROI
+    """
+    gray = roi_img if roi_img.ndim == 2 else cv2.cvtColor(roi_img, cv2.COLOR_BGR2GRAY)
+
+    # Binarize: Extract bright areas (bar and icon are white/bright)
+    _, scene_bin = cv2.threshold(gray, BRIGHT_THRESHOLD, 255, cv2.THRESH_BINARY)
+
+    contours, _ = cv2.findContours(scene_bin, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+
+    # Collect all contours meeting minimum area
+    blobs = []
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area > icon_min_area * res_ratio ** 2:
+            blobs.append({"contour": contour, "area": area})
+
+    # Sort by area descending
+    blobs.sort(key=lambda b: b["area"], reverse=True)
+
+    bar = icon = NOT_FOUND
+    bar_area = icon_area = 0.0
+
+    # Find fish bar (largest valid contour)
+    for blob in blobs:
+        if blob["area"] > bar_min_area * res_ratio ** 2:
+            contour = blob["contour"]
+            moments = cv2.moments(contour)
+            if moments["m00"] > 0:
+                bar_area = blob["area"]
+                x, y, w, h = cv2.boundingRect(contour)
+                bar = (True,
+                       (int(moments["m10"] / moments["m00"]), int(moments["m01"] / moments["m00"])),
+                       (x, y, x + w, y + h))
+            break
+
+    # Find fish icon (second largest valid contour, excluding bar)
+    for blob in blobs:
+        if blob["area"] == bar_area:
+            continue
+        if icon_min_area * res_ratio ** 2 < blob["area"] < icon_max_area * res_ratio ** 2:
+            contour = blob["contour"]
+            moments = cv2.moments(contour)
+            if moments["m00"] > 0:
+                icon_area = blob["area"]
+                x, y, w, h = cv2.boundingRect(contour)
+                icon = (True,
+                        (int(moments["m10"] / moments["m00"]), int(moments["m01"] / moments["m00"])),
+                        (x, y, x + w, y + h))
+            break
+
+    return bar, icon, bar_area, icon_area
+
+
+# Detectors compared by benchmark_detectors and FishSimulator; a candidate needs to beat Contour there
+DETECTORS = {
+    "Contour": detect_by_contour,
+}
+
+
+def benchmark_detectors(rois, res_ratio, bar_min_area, icon_min_area, icon_max_area, repeat=50, detectors=None):
+    """Time each detector over the given ROI images.
+
+    Return: {name: {"mean_ms", "p95_ms", "hz", "bar_rate", "icon_rate", "agreement"}}, where agreement is
+    the share of frames whose bar/icon presence matches the contour detector and whose icon y differs
+    by at most 2 px.
+    """
+    detectors = detectors or DETECTORS
+    reference = [detect_by_contour(roi, res_ratio, bar_min_area, icon_min_area, icon_max_area) for roi in rois]
+    report = {}
+    for name, detect in detectors.items():
+        timings = []
+        for _ in range(repeat):
+            for roi in rois:
+                start = time.perf_counter()
+                detect(roi, res_ratio, bar_min_area, icon_min_area, icon_max_area)
+                timings.append(time.perf_counter() - start)
+        results = [detect(roi, res_ratio, bar_min_area, icon_min_area, icon_max_area) for roi in rois]
+        agree = 0
+        for (bar, icon, _, _), (ref_bar, ref_icon, _, _) in zip(results, reference):
+            if bar[0] == ref_bar[0] and icon[0] == ref_icon[0] and (
+                    not icon[0] or abs(icon[1][1] - ref_icon[1][1]) <= 2):
+                agree += 1
+        mean_s = mean(timings)
+        report[name] = {
+            "mean_ms": mean_s * 1000,
+            "p95_ms": percentile(timings, 0.95) * 1000,
+            "hz": 1 / mean_s if mean_s > 0 else float("inf"),
+            "bar_rate": sum(r[0][0] for r in results) / len(results),
+            "icon_rate": sum(r[1][0] for r in results) / len(results),
+            "agreement": agree / len(results),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Benchmark fish bar detectors on saved fish_roi strips")
+    parser.add_argument("folder", help="Folder of fish_roi strip images (png)")
+    parser.add_argument("--height", type=int, default=1080, help="Capture height the strips were taken at")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    images = [cv2.imread(str(p)) for p in sorted(Path(args.folder).glob("*.png"))]
+    print(json.dumps(benchmark_detectors([img for img in images if img is not None], args.height / 1080,
+                                         1200, 70, 400, repeat=args.repeat), indent=2))
@@ -0,0 +1,253 @@
+"""Fishing fight logic shared by AutoFishTask and the offline FishSimulator.
+
+Kept free of qfluentwidgets, and of ok apart from TaskDisabledException: the host class provides config, stats,
+frame, box_of_screen_scaled, next_frame, send_key_down / send_key_up, external_movement_tick, info_set and
+log_info / log_error, plus fish_controller, fight_metrics and roi_capture.
+"""
+import time
+
+try:
+    from ok import TaskDisabledException
+except ImportError:  # FishSimulator runs without ok, where nothing disables the task
+    class TaskDisabledException(Exception):
+        pass
+
+from src.tasks.fullauto.FishDetection import DETECTORS
+
+
+class FishFight:
+    """Fish bar / icon tracking and the fighting phase (hold / release space)"""
+    BAR_MIN_AREA = 1200
+    ICON_MIN_AREA = 70
+    ICON_MAX_AREA = 400
+    CONTROL_ZONE_RATIO = 0.25
+    METRICS_DISPLAY_INTERVAL = 1.0
+
+    def find_bar_and_fish(self):
+        """Find fish bar and icon with the "Fish Detector" from DETECTORS (Contour unless FishSimulator sets one)"""
+        return self._find_bar_and_fish(DETECTORS.get(self.config.get("Fish Detector", "Contour"),
+                                                     DETECTORS["Contour"]))
+
+    def find_bar_and_fish_by_area(self):
+        """Find fish bar and icon area and size based on ROI
+
+        Return: ((has_bar, bar_center, bar_rect), (has_icon, icon_center, icon_rect))
+        Note: bar_center and icon_center are relative to ROI, bar_rect and icon_rect too
+        """
+        return self._find_bar_and_fish(DETECTORS["Contour"])
+
+    def get_fish_roi(self):
+        """Get ROI area and resolution ratio to 1080p"""
+        box = self.box_of_screen_scaled(1920, 1080, 1620, 325, 1645, 725, name="fish_roi")
+        frame_height, _ = self.frame.shape[:2]
+        return box, frame_height / 1080
+
+    def _find_bar_and_fish(self, detect):
+        box, res_ratio = self.get_fish_roi()
+
+        try:
+            roi_img = self.roi_capture.roi(box.name) if self.roi_capture.active else box.crop_frame(self.frame)
+            bar, icon, bar_area, icon_area = detect(roi_img, res_ratio, self.BAR_MIN_AREA, self.ICON_MIN_AREA,
+                                                    self.ICON_MAX_AREA)
+            has_bar, has_icon = bar[0], icon[0]
+
+            if has_bar:
+                zone_ratio = bar_area / box.area()
+                if self.CONTROL_ZONE_RATIO <= 0 or abs(
+                        zone_ratio - self.CONTROL_ZONE_RATIO) / self.CONTROL_ZONE_RATIO > 0.1:
+                    self.CONTROL_ZONE_RATIO = zone_ratio
+                    self.log_info(f"set CONTROL_ZONE_RATIO {self.CONTROL_ZONE_RATIO}")
+
+            # Update stats
+            self.stats.update({
+                "last_bar_found": has_bar,
+                "last_bar_area": float(bar_area),
+                "last_icon_found": has_icon,
+                "last_icon_area": float(icon_area),
+            })
+
+            return bar, icon
+        except TaskDisabledException:
+            raise
+        except Exception as e:
+            self.log_error("find_bar_and_fish_by_area error", e)
+            return (False, None, None), (False, None, None)
+
+    def phase_fight(self) -> bool:
+        cfg = self.config
+        self.stats["current_phase"] = "Fighting"
+        self.info_set("Current Phase", "Fighting")
+        self.log_info("Entering fighting phase...")
+
+        # Hardcoded constants
+        BAR_MISSING_TIMEOUT = 2.5  # Bar missing timeout
+        MERGE_GRACE_SECONDS = 0.20  # Merge grace time
+
+        # Runtime state
+        is_holding_space = False
+        icon_was_visible_prev = False
+        last_known_icon_y_relative = 0.0
+
+        bar_missing_start_time = None
+        merge_start_time = None
+
+        predictive = cfg.get("Fish Controller", "Hysteresis") == "Predictive"
+        controller = self.fish_controller
+        controller.reset()
+        metrics = self.fight_metrics
+        metrics.reset()
+        capture_time = time.monotonic()
+        next_display_time = capture_time + self.METRICS_DISPLAY_INTERVAL
+        if cfg.get("Fish Capture", "Full") == "ROI":
+            self.roi_capture.declare(self.get_fish_roi()[0])
+
+        def set_hold(target_hold: bool):
+            nonlocal is_holding_space
+            if target_hold != is_holding_space:
+                input_start = time.monotonic()
+                if target_hold:
+                    self.send_key_down("space")
+                else:
+                    self.send_key_up("space")
+                input_latency = time.monotonic() - input_start
+                controller.latency.record_input(input_latency)
+                metrics.record_input(input_latency)
+                is_holding_space = target_hold
+                self.stats["last_hold_state"] = is_holding_space
+
+        fight_start = time.monotonic()
+        try:
+            while True:
+                now = time.monotonic()
+                if now - fight_start >= cfg.get("MAX_FIGHT_SEC", 60.0):
+                    self.log_info("Fighting timeout")
+                    return False
+
+                detect_start = time.perf_counter()
+                (has_bar, bar_center, bar_rect), (has_icon, icon_center, icon_rect) = self.find_bar_and_fish()
+                detect_seconds = time.perf_counter() - detect_start
+                controller.update(capture_time, bar_rect if has_bar else None, icon_center if has_icon else None)
+                decision_seconds = time.monotonic() - capture_time
+                controller.latency.record_decision(decision_seconds)
+                metrics.record(capture_time, has_bar, bar_rect, has_icon, icon_center, detect_seconds,
+                               decision_seconds)
+                if capture_time >= next_display_time:
+                    next_display_time = capture_time + self.METRICS_DISPLAY_INTERVAL
+                    self.info_set("Fight Loop", str(metrics))
+
+                # Record icon relative position (for merge handling)
+                if has_bar and has_icon:
+                    last_known_icon_y_relative = icon_center[1] - bar_center[1]
+
+                # Check if bar is missing
+                if not has_bar:
+                    if bar_missing_start_time is None:
+                        bar_missing_start_time = now
+                    elif now - bar_missing_start_time >= BAR_MISSING_TIMEOUT:
+                        self.log_info(f"Bar missing for > {BAR_MISSING_TIMEOUT}s -> Fighting ended")
+                        return True
+                else:
+                    bar_missing_start_time = None
+
+                # Main control logic: Two-layer control system
+                if has_bar and bar_rect:
+                    bar_top = bar_rect[1]
+                    bar_bottom = bar_rect[3]
+                    predicted_icon_y = None
+                    if predictive and controller.ready:
+                        # Act on where icon and bar will be when the input lands
+                        predicted_icon_y, bar_top, bar_bottom = controller.predict(capture_time)
+                    bar_height = bar_bottom - bar_top
+
+                    if bar_height <= 0:
+                        bar_height = 1
+
+                    # Calculate control zone boundaries
+                    control_zone_ratio = self.CONTROL_ZONE_RATIO
+                    control_height = int(bar_height * control_zone_ratio)
+                    control_top = bar_top + control_height
+                    control_bottom = bar_bottom - control_height
+
+                    is_merged = has_bar and (not has_icon) and icon_was_visible_prev
+
+                    if has_icon:
+                        merge_start_time = None
+                        icon_y = icon_center[1] if predicted_icon_y is None else predicted_icon_y
+
+                        # Simplified two-layer control logic
+                        if icon_y < control_top:
+                            # Icon in upper control zone -> Hold Space
+                            set_hold(True)
+                        elif icon_y > control_bottom:
+                            # Icon in lower control zone -> Release Space
+                            set_hold(False)
+                        # else: Icon in neutral zone -> Maintain current state (Hysteresis)
+
+                    else:
+                        # Handle merge case
+                        if is_merged:
+                            if merge_start_time is None:
+                                merge_start_time = now
+                                self.stats["last_merge_event"] = (f"merged, last_rel={last_known_icon_y_relative:.1f}")
+                            elapsed = now - merge_start_time
+                            if elapsed <= MERGE_GRACE_SECONDS and predicted_icon_y is not None:
+                                # Icon hidden by the bar, follow its predicted track
+                                if predicted_icon_y < control_top:
+                                    set_hold(True)
+                                elif predicted_icon_y > control_bottom:
+                                    set_hold(False)
+                            elif elapsed <= MERGE_GRACE_SECONDS:
+                                # Decide based on last known relative position
+                                if last_known_icon_y_relative < 0:
+                                    set_hold(True)
+                                else:
+                                    set_hold(False)
+                        else:
+                            merge_start_time = None
+                else:
+                    set_hold(False)
+
+                icon_was_visible_prev = has_icon
+
+                # Before the capture, so the frame the next decision uses already shows any jitter
+                self.external_movement_tick()
+                if self.roi_capture.active:
+                    self.roi_capture.next()
+                    capture_time = self.roi_capture.capture_time
+                else:
+                    self.next_frame()
+                    # next_frame() returns as soon as the new frame is grabbed; stamp it there, not before the wait
+                    capture_time = time.monotonic()
+
+        finally:
+            self.send_key_up("space")
+            if self.roi_capture.active:
+                capture_stats = self.roi_capture.stats()
+                self.stats["last_capture_stats"] = capture_stats
+                self.log_info(f"ROI capture: {capture_stats['fps']:.0f} fps, "
+                            f"{capture_stats['bytes_per_frame']:.0f} B/frame, "
+                            f"{capture_stats['full_frames']}/{capture_stats['frames']} full frames, "
+                            f"{capture_stats['repeats']} repeated")
+                self.roi_capture.clear()
+
+    def log_fight_metrics(self, success: bool):
+        summary = self.fight_metrics.summary()
+        summary["success"] = success
+        summary["controller"] = self.config.get("Fish Controller", "Hysteresis")
+        summary["detector"] = self.config.get("Fish Detector", "Contour")
+        summary["phase_seconds"] = dict(self.stats.get("phase_seconds", {}))
+        self.stats["last_fight_success"] = success
+        self.stats["last_round_metrics"] = summary
+        phases = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in summary["phase_seconds"].items())
+        self.log_info(f"Fight round: success={success}, controller={summary['controller']}, "
+                    f"detector={summary['detector']}, {summary['loop_hz']:.0f} Hz over {summary['frames']} frames, "
+                    f"time in zone {summary['in_zone_ratio']:.0%} of {summary['tracked_time']:.1f}s, "
+                    f"bar/icon found {summary['bar_found_ratio']:.0%}/{summary['icon_found_ratio']:.0%}, "
+                    f"detect {summary['detect_ms']:.2f} ms (p95 {summary['detect_p95_ms']:.2f}), "
+                    f"capture->decision {summary['capture_to_decision_ms']:.1f} ms "
+                    f"(p95 {summary['capture_to_decision_p95_ms']:.1f}), "
+                    f"decision->input {summary['decision_to_input_ms']:.1f} ms "
+                    f"(p95 {summary['decision_to_input_p95_ms']:.1f}), "
+                    f"hold switches={summary['hold_switches']}, phases: {phases}")
+        self.info_set("Time In Zone", f"{summary['in_zone_ratio']:.0%}")
+        self.info_set("Fight Loop", str(self.fight_metrics))
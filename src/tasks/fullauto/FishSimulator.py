@@ -0,0 +1,367 @@
+"""Offline fishing simulator.
+
+Renders the fish bar / icon strip into synthetic frames and runs the fishing fight logic
+AutoFishTask uses (FishFight.phase_fight and its detectors) headless against it, so
+detector and controller changes can be benchmarked without the game or ok installed:
+
+    python -m src.tasks.fullauto.FishSimulator --rounds 5
+"""
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.tasks.RoiCapture import RoiCapture
+from src.tasks.fullauto.FishController import PredictiveFishController, FightRoundMetrics
+from src.tasks.fullauto.FishDetection import DETECTORS
+from src.tasks.fullauto.FishFight import FishFight
+
+# fish_roi at 1920x1080
+STRIP_X1, STRIP_Y1, STRIP_X2, STRIP_Y2 = 1620, 325, 1645, 725
+STRIP_WIDTH = STRIP_X2 - STRIP_X1
+STRIP_HEIGHT = STRIP_Y2 - STRIP_Y1
+
+BACKGROUND_COLOR = 70
+BAR_COLOR = 225
+ICON_COLOR = 245
+ICON_WIDTH, ICON_HEIGHT = 10, 12
+
+CONTROLLERS = ("Hysteresis", "Predictive")
+
+
+class SimulationFinished(Exception):
+    """Raised from next_frame once the simulated fight is decided."""
+
+    def __init__(self, success):
+        super().__init__("success" if success else "failed")
+        self.success = success
+
+
+class FishMotion:
+    """Fish icon motion profiles, positions in 1080p strip pixels."""
+    PROFILES = ("calm", "sine", "darting", "erratic")
+
+    def __init__(self, profile="sine", seed=None):
+        if profile not in self.PROFILES:
+            raise ValueError(f"Unknown motion profile: {profile}")
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.phase = self.rng.uniform(0, 2 * np.pi)
+        self.y = STRIP_HEIGHT / 2
+        self.target = self.y
+        self.next_jump = 0.0
+
+    def update(self, t, dt):
+        low, high = ICON_HEIGHT, STRIP_HEIGHT - ICON_HEIGHT
+        middle = STRIP_HEIGHT / 2
+        if self.profile == "calm":
+            self.y = middle + 80 * np.sin(2 * np.pi * t / 6 + self.phase)
+        elif self.profile == "sine":
+            self.y = middle + 120 * np.sin(2 * np.pi * t / 3 + self.phase) + 30 * np.sin(2 * np.pi * t / 0.9)
+        else:
+            darting = self.profile == "darting"
+            if t >= self.next_jump:
+                self.target = self.rng.uniform(low, high)
+                self.next_jump = t + (self.rng.uniform(0.8, 2.0) if darting else self.rng.uniform(0.3, 0.9))
+            speed = 6.0 if darting else 10.0
+            self.y += (self.target - self.y) * min(1.0, speed * dt)
+            if not darting:
+                self.y += self.rng.gauss(0, 2.0)
+        self.y = min(max(self.y, low), high)
+        return self.y
+
+
+class FishFightSimulation:
+    """Fish fight physics: holding space lifts the bar, releasing lets it sink.
+
+    Drag limits the bar speed. Catch progress grows while the icon is inside the bar and shrinks otherwise; the fight is
+    won at 1.0 and lost at 0.0. Inputs take effect after input_delay seconds.
+    """
+
+    def __init__(self, motion: FishMotion, bar_height=100, gravity=900.0, lift=1800.0, drag=4.0, max_speed=500.0,
+                 progress_gain=0.35, progress_loss=0.25, start_progress=0.3, input_delay=0.03,
+                 merge_rate=0.5, merge_duration=0.15, seed=None):
+        self.motion = motion
+        self.bar_height = bar_height
+        self.gravity = gravity
+        self.lift = lift
+        self.drag = drag
+        self.max_speed = max_speed
+        self.progress_gain = progress_gain
+        self.progress_loss = progress_loss
+        self.input_delay = input_delay
+        self.merge_rate = merge_rate
+        self.merge_duration = merge_duration
+        self.rng = random.Random(seed)
+        self.bar_top = (STRIP_HEIGHT - bar_height) / 2
+        self.bar_speed = 0.0
+        self.progress = start_progress
+        self.hold = False
+        self.pending = []
+        self.merge_until = 0.0
+        self.icon_y = motion.y
+        self.start_time = None
+        self.last_time = None
+        self.elapsed = 0.0
+        self.in_zone_time = 0.0
+
+    @property
+    def outcome(self):
+        if self.progress >= 1.0:
+            return True
+        if self.progress <= 0.0:
+            return False
+        return None
+
+    def set_hold(self, hold, now):
+        self.pending.append((now + self.input_delay, hold))
+
+    def icon_in_bar(self):
+        return self.bar_top <= self.icon_y <= self.bar_top + self.bar_height
+
+    def merging(self):
+        return self.elapsed < self.merge_until
+
+    def step(self, now):
+        if self.start_time is None:
+            self.start_time = self.last_time = now
+        while self.last_time < now and self.outcome is None:
+            dt = min(0.005, now - self.last_time)
+            t = self.last_time + dt
+            while self.pending and self.pending[0][0] <= t:
+                self.hold = self.pending.pop(0)[1]
+            accel = (-self.lift if self.hold else self.gravity) - self.drag * self.bar_speed
+            self.bar_speed = min(max(self.bar_speed + accel * dt, -self.max_speed), self.max_speed)
+            self.bar_top += self.bar_speed * dt
+            if self.bar_top <= 0 or self.bar_top >= STRIP_HEIGHT - self.bar_height:
+                self.bar_top = min(max(self.bar_top, 0), STRIP_HEIGHT - self.bar_height)
+                self.bar_speed = 0.0
+            self.elapsed = t - self.start_time
+            self.icon_y = self.motion.update(self.elapsed, dt)
+            if self.icon_in_bar():
+                self.in_zone_time += dt
+                self.progress += self.progress_gain * dt
+                if not self.merging() and self.rng.random() < self.merge_rate * dt:
+                    self.merge_until = self.elapsed + self.merge_duration
+            else:
+                self.progress -= self.progress_loss * dt
+            self.last_time = t
+        self.progress = min(max(self.progress, 0.0), 1.0)
+
+    def render(self, strip, res_ratio, noise=4.0, speckle=0.0, rng=None):
+        """Draw the strip (height x width x 3, uint8) for the current state."""
+        rng = rng or np.random.default_rng()
+        height, width = strip.shape[:2]
+        strip[:] = BACKGROUND_COLOR
+        margin = max(1, int(round(2 * res_ratio)))
+        bar_y1 = int(round(self.bar_top * res_ratio))
+        bar_y2 = int(round((self.bar_top + self.bar_height) * res_ratio))
+        strip[bar_y1:bar_y2, margin:width - margin] = BAR_COLOR
+        icon_w, icon_h = int(round(ICON_WIDTH * res_ratio)), int(round(ICON_HEIGHT * res_ratio))
+        icon_x1 = (width - icon_w) // 2
+        icon_y1 = int(round(self.icon_y * res_ratio)) - icon_h // 2
+        if self.icon_in_bar():
+            if self.merging():
+                # Merge event: icon drawn flush with the bar, indistinguishable from it
+                strip[icon_y1:icon_y1 + icon_h, icon_x1:icon_x1 + icon_w] = BAR_COLOR
+            else:
+                border = max(1, int(round(res_ratio)))
+                strip[icon_y1 - border:icon_y1 + icon_h + border,
+                      icon_x1 - border:icon_x1 + icon_w + border] = BACKGROUND_COLOR
+                strip[icon_y1:icon_y1 + icon_h, icon_x1:icon_x1 + icon_w] = ICON_COLOR
+        else:
+            strip[max(icon_y1, 0):icon_y1 + icon_h, icon_x1:icon_x1 + icon_w] = ICON_COLOR
+        if noise > 0:
+            noisy = strip.astype(np.int16) + rng.normal(0, noise, (height, width, 1)).astype(np.int16)
+            np.clip(noisy, 0, 255, out=noisy)
+            strip[:] = noisy
+        if speckle > 0:
+            strip[rng.random((height, width)) < speckle] = 255
+
+
+class InputSink:
+    """Stand-in for the game interaction: records key events and feeds hold state to the simulation."""
+
+    def __init__(self, simulation: FishFightSimulation):
+        self.simulation = simulation
+        self.events = []
+
+    def key_down(self, key):
+        now = time.monotonic()
+        self.events.append((now, "key_down", key))
+        if key == "space":
+            self.simulation.set_hold(True, now)
+
+    def key_up(self, key):
+        now = time.monotonic()
+        self.events.append((now, "key_up", key))
+        if key == "space":
+            self.simulation.set_hold(False, now)
+
+
+class SimBox:
+    def __init__(self, x, y, width, height, name=None):
+        self.x, self.y, self.width, self.height, self.name = x, y, width, height, name
+
+    def crop_frame(self, frame):
+        return frame[self.y:self.y + self.height, self.x:self.x + self.width]
+
+    def area(self):
+        return self.width * self.height
+
+
+class SimulatedFishTask(FishFight):
+    """Headless stand-in for the framework side of AutoFishTask.
+
+    Provides frames, boxes, input and info display backed by a FishFightSimulation; the
+    fishing logic itself (phase_fight, detectors, metrics) is the FishFight code
+    AutoFishTask runs.
+    """
+
+    def __init__(self, simulation: FishFightSimulation, config=None, width=1920, height=1080, fps=None,
+                 noise=4.0, speckle=0.0, max_seconds=60.0, seed=None):
+        self.simulation = simulation
+        self.config = {"Fish Detector": "Contour", "Fish Controller": "Hysteresis", "MAX_FIGHT_SEC": max_seconds}
+        self.config.update(config or {})
+        self.stats = {}
+        self.info = {}
+        self.fish_controller = PredictiveFishController()
+        self.fight_metrics = FightRoundMetrics()
+        self.roi_capture = RoiCapture(self)
+        self.executor = SimpleNamespace(interaction=SimpleNamespace(capture=SimpleNamespace(get_frame=self.grab)))
+        self.input = InputSink(simulation)
+        self.width, self.height = width, height
+        self.res_ratio = height / 1080
+        self.frame = np.full((height, width, 3), BACKGROUND_COLOR, dtype=np.uint8)
+        self.strip_box = self.box_of_screen_scaled(1920, 1080, STRIP_X1, STRIP_Y1, STRIP_X2, STRIP_Y2)
+        self.fps = fps
+        self.noise = noise
+        self.speckle = speckle
+        self.max_seconds = max_seconds
+        self.rng = np.random.default_rng(seed)
+        self.next_frame_time = None
+        self.next_frame()
+
+    def box_of_screen_scaled(self, original_width, original_height, x1, y1, x2, y2, name=None, hcenter=False):
+        sx, sy = self.width / original_width, self.height / original_height
+        return SimBox(int(x1 * sx), int(y1 * sy), int((x2 - x1) * sx), int((y2 - y1) * sy), name=name)
+
+    def grab(self):
+        """Capture stand-in: advance the simulation and render the next frame."""
+        if self.fps:
+            now = time.monotonic()
+            if self.next_frame_time is not None and now < self.next_frame_time:
+                time.sleep(self.next_frame_time - now)
+            self.next_frame_time = max(now, self.next_frame_time or now) + 1 / self.fps
+        now = time.monotonic()
+        self.simulation.step(now)
+        if self.simulation.outcome is not None:
+            raise SimulationFinished(self.simulation.outcome)
+        if self.simulation.elapsed >= self.max_seconds:
+            raise SimulationFinished(False)
+        self.simulation.render(self.strip_box.crop_frame(self.frame), self.res_ratio, self.noise, self.speckle,
+                               self.rng)
+        return self.frame
+
+    def next_frame(self):
+        return self.grab()
+
+    def send_key_down(self, key):
+        self.input.key_down(key)
+
+    def send_key_up(self, key):
+        self.input.key_up(key)
+
+    def send_key(self, key, down_time=0.02, after_sleep=0):
+        self.input.key_down(key)
+        self.input.key_up(key)
+
+    def external_movement_tick(self):
+        pass
+
+    def info_set(self, key, value):
+        self.info[key] = value
+
+    def log_info(self, message, *args):
+        pass
+
+    def log_error(self, message, *args):
+        pass
+
+    def log_debug(self, message, *args):
+        pass
+
+
+def run_round(detector="Contour", controller="Hysteresis", profile="sine", seed=None, fps=None, height=1080,
+              capture="Full", noise=4.0, speckle=0.0, max_seconds=60.0, **simulation_kwargs):
+    """Run one simulated fight and return its outcome, timings and fight metrics"""
+    simulation = FishFightSimulation(FishMotion(profile, seed=seed), seed=seed, **simulation_kwargs)
+    task = SimulatedFishTask(simulation, {"Fish Detector": detector, "Fish Controller": controller,
+                                          "Fish Capture": capture},
+                             width=height * 16 // 9, height=height, fps=fps, noise=noise, speckle=speckle,
+                             max_seconds=max_seconds, seed=seed)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        task.phase_fight()
+        success = False
+    except SimulationFinished as e:
+        success = e.success
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    summary = task.fight_metrics.summary()
+    summary.update({
+        "success": success,
+        "seconds": wall,
+        "cpu_seconds": cpu,
+        "cpu_ms_per_frame": cpu / max(summary["frames"], 1) * 1000,
+        "true_in_zone_ratio": simulation.in_zone_time / simulation.elapsed if simulation.elapsed else 0.0,
+        "key_events": len(task.input.events),
+    })
+    return summary
+
+
+def run_benchmark(rounds=5, detectors=None, controllers=CONTROLLERS, profiles=FishMotion.PROFILES, seed=0,
+                  **round_kwargs):
+    """Run every detector x controller x profile combination and aggregate the results"""
+    report = {}
+    for detector in detectors or DETECTORS.keys():
+        for controller in controllers:
+            for profile in profiles:
+                results = [run_round(detector, controller, profile, seed=seed + i, **round_kwargs)
+                           for i in range(rounds)]
+                frames = sum(r["frames"] for r in results)
+                cpu = sum(r["cpu_seconds"] for r in results)
+                report[f"{detector}/{controller}/{profile}"] = {
+                    "rounds": rounds,
+                    "success_rate": sum(r["success"] for r in results) / rounds,
+                    "mean_seconds": sum(r["seconds"] for r in results) / rounds,
+                    "loop_hz": sum(r["loop_hz"] for r in results) / rounds,
+                    "cpu_seconds_per_round": cpu / rounds,
+                    "cpu_ms_per_frame": cpu / max(frames, 1) * 1000,
+                    "detect_ms": sum(r["detect_ms"] for r in results) / rounds,
+                    "in_zone_ratio": sum(r["true_in_zone_ratio"] for r in results) / rounds,
+                }
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Benchmark fishing detectors and controllers offline")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--detectors", nargs="*", default=list(DETECTORS.keys()))
+    parser.add_argument("--controllers", nargs="*", default=list(CONTROLLERS))
+    parser.add_argument("--profiles", nargs="*", default=list(FishMotion.PROFILES))
+    parser.add_argument("--height", type=int, default=1080, help="Simulated capture height")
+    parser.add_argument("--capture", choices=["Full", "ROI"], default="Full")
+    parser.add_argument("--fps", type=float, default=None, help="Simulated capture rate, unlimited if omitted")
+    parser.add_argument("--noise", type=float, default=4.0)
+    parser.add_argument("--speckle", type=float, default=0.0)
+    parser.add_argument("--input-delay", type=float, default=0.03)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(run_benchmark(args.rounds, args.detectors, args.controllers, args.profiles, seed=args.seed,
+                                   fps=args.fps, height=args.height, capture=args.capture, noise=args.noise,
+                                   speckle=args.speckle, input_delay=args.input_delay), indent=2))